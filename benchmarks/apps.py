@@ -0,0 +1,151 @@
+""" Synthetic apps for the benchmarks. Every scenario builds a VirtualDOM with
+    a single route to render, and makes the browser events to send to it.
+"""
+from pydow import Component
+from pydow import VirtualDOM
+from pydow.components import Input
+from pydow.components import Button
+from pydow.components import Select
+
+
+class Root(Component):
+    def __init__(self, *args, **kwargs):
+        super(Root, self).__init__(template_location=__file__, template_file="templates/root.html", *args, **kwargs)
+        self.bindings = {"router": self.router}
+
+
+class Level(Component):
+    """ A level of a deep tree, the last level has a button that counts clicks.
+    """
+
+    def __init__(self, depth=0, *args, **kwargs):
+        super(Level, self).__init__(template_location=__file__, template_file="templates/level.html", *args, **kwargs)
+        self.child = Level(parent=self, depth=depth - 1) if depth > 1 else None
+        self.button = Button(parent=self, content="Click", onClick=self.onClick) if depth <= 1 else None
+        self.bindings = {"depth": depth, "child": self.child, "button": self.button}
+
+    def leaf(self):
+        return self if self.child is None else self.child.leaf()
+
+    def onClick(self, event):
+        session_id = event.get("session_id")
+        self.store.setState("CLICKS", self.store.getState("CLICKS", 0, session_id=session_id) + 1, session_id=session_id)
+
+    def update(self, session_id=None, *args, **kwargs):
+        self.bindings["clicks"] = self.store.getState("CLICKS", 0, session_id=session_id)
+
+
+class WideList(Component):
+    """ A list of rows with a key, the button adds a row at the top.
+    """
+
+    rows = 1000
+
+    def __init__(self, *args, **kwargs):
+        super(WideList, self).__init__(template_location=__file__, template_file="templates/list.html", *args, **kwargs)
+        self.button = Button(parent=self, content="Add", onClick=self.onClick)
+        self.bindings = {"button": self.button}
+
+    def onClick(self, event):
+        session_id = event.get("session_id")
+        self.store.setState("ADDED", self.store.getState("ADDED", 0, session_id=session_id) + 1, session_id=session_id)
+
+    def update(self, session_id=None, *args, **kwargs):
+        added = self.store.getState("ADDED", 0, session_id=session_id)
+        self.bindings["rows"] = [{"id": index, "name": f"row {index}"} for index in range(self.rows + added - 1, -1, -1)]
+
+
+class Form(Component):
+    """ A form with many input and select fields.
+    """
+
+    fields = 200
+
+    def __init__(self, *args, **kwargs):
+        super(Form, self).__init__(template_location=__file__, template_file="templates/form.html", *args, **kwargs)
+        self.inputs = [Input(parent=self) for _ in range(self.fields // 2)]
+        self.selects = [Select(parent=self, getOptions=self.getOptions) for _ in range(self.fields // 2)]
+        self.bindings = {"fields": [field for pair in zip(self.inputs, self.selects) for field in pair]}
+
+    def getOptions(self, session_id=None):
+        return [{"value": str(index), "name": f"Option {index}"} for index in range(5)]
+
+
+class Page(Component):
+    """ A small page, for apps with many routes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Page, self).__init__(template_location=__file__, template_file="templates/page.html", *args, **kwargs)
+        self.bindings = {"title": self.__class__.__name__, "text": "Lorem ipsum dolor sit amet."}
+
+
+def deepTree(depth: int = 100) -> dict:
+    """ A tree of nested components, every event changes the deepest node.
+    """
+
+    class Deep(Level):
+        def __init__(self, *args, **kwargs):
+            super(Deep, self).__init__(depth=depth, *args, **kwargs)
+
+    vdom = VirtualDOM(root_class=Root, routes={"/": Deep})
+
+    def event(index: int) -> dict:
+        button = vdom.router.routes["/"].leaf().button
+        return {"DOMEventCategory": "MouseEvent click", "target": button.identifier}
+
+    return {"vdom": vdom, "route": "/", "event": event}
+
+
+def wideList(rows: int = 1000) -> dict:
+    """ A list of keyed rows, every event adds a row at the top.
+    """
+
+    class Rows(WideList):
+        pass
+
+    Rows.rows = rows
+    vdom = VirtualDOM(root_class=Root, routes={"/": Rows})
+
+    def event(index: int) -> dict:
+        return {"DOMEventCategory": "MouseEvent click", "target": vdom.router.routes["/"].button.identifier}
+
+    return {"vdom": vdom, "route": "/", "event": event}
+
+
+def manyFields(fields: int = 200) -> dict:
+    """ A form with input and select fields, every event types in one of the inputs.
+    """
+
+    class Fields(Form):
+        pass
+
+    Fields.fields = fields
+    vdom = VirtualDOM(root_class=Root, routes={"/": Fields})
+
+    def event(index: int) -> dict:
+        inputs = vdom.router.routes["/"].inputs
+        return {"DOMEventCategory": "Event input", "target": inputs[index % len(inputs)].identifier, "value": f"value {index}"}
+
+    return {"vdom": vdom, "route": "/", "event": event}
+
+
+def manyRoutes(routes: int = 1000) -> dict:
+    """ An app with many routes, every event navigates to another route.
+    """
+
+    vdom = VirtualDOM(root_class=Root, routes={"/": Page, **{f"/page/{index}": Page for index in range(routes)}})
+
+    def event(index: int) -> dict:
+        return {"DOMEventCategory": "UIEvent load", "link_target": f"/page/{index % routes}", "link_search": "", "link_anchor": ""}
+
+    return {"vdom": vdom, "route": "/", "event": event}
+
+
+# Scenarios by name, with the (full and quick) size of the app
+SCENARIOS = {
+    "deep_tree": (deepTree, {"depth": 100}, {"depth": 20}),
+    "wide_list": (wideList, {"rows": 1000}, {"rows": 100}),
+    "many_fields": (manyFields, {"fields": 200}, {"fields": 20}),
+    "many_routes": (manyRoutes, {"routes": 1000}, {"routes": 50}),
+}
@@ -0,0 +1,564 @@
+""" Load generator that simulates many browser sessions. Every session speaks
+    the Socket.IO protocol of pydow/public/index.js: it asks for a session
+    (REQUEST_SESSION), loads a page (UIEvent load), keeps the VDOM up to
+    date with the updates and patches it receives, and then, after a think
+    time, clicks a button, types into an input, changes a select or
+    navigates to another path. The targets are found in the VDOM, like a
+    user finds them on the page.
+
+    The app is one of the benchmark apps (served by benchmarks/server.py in
+    another process), or any running app (--url, and --pid to measure its
+    memory). Reports:
+
+    - latency_p50_ms, latency_p95_ms, latency_p99_ms: from sending an event
+      to receiving the VDOM_UPDATE (or VDOM_PATCH) that it caused
+    - bytes_per_update: the size (JSON) of the updates
+    - memory_per_session_kb: the growth of the memory (RSS) of the server
+      per session, once all sessions have loaded their page
+    - events_per_second, no_update (events that the server handled without
+      an update, e.g. a click that changes nothing), unanswered events (not
+      handled within --timeout) and errors
+    - client_cpu_percent: the load generator itself (a single process), the
+      results are limited by the generator if this is close to 100%
+
+    Run with python -m benchmarks.load wide_list --sessions 2000 (from the
+    root of the repo). Needs aiohttp (for the Socket.IO client).
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import subprocess
+
+import socketio
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from benchmarks.apps import SCENARIOS
+
+
+# Payload formats the simulated browser accepts (plain JSON, the VDOM is kept as dicts)
+FORMATS = []
+
+# Words to type into inputs
+WORDS = ["pydow", "virtual", "shadow", "benchmark", "session", "latency"]
+
+# Time between two keystrokes (seconds)
+KEYSTROKE = (0.05, 0.2)
+
+
+def raiseFileLimit() -> None:
+    """ Raise the limit on open files to the maximum, every session (and
+        every connection on the server) uses a socket.
+    """
+
+    if resource is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def percentile(values: list, fraction: float) -> float:
+    """ The value below which a fraction of the values fall (nearest rank).
+    """
+
+    if len(values) == 0:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def processMemory(pid: int) -> int:
+    """ The resident memory (in bytes) of a process, or None if it can not
+        be measured on this platform.
+    """
+
+    if psutil is not None:
+        return psutil.Process(pid).memory_info().rss
+    if os.path.exists(f"/proc/{pid}/statm"):
+        with open(f"/proc/{pid}/statm") as file_:
+            return int(file_.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    return None
+
+
+def applyPatch(vdom: dict, patch: dict) -> dict:
+    """ Apply a patch to a VDOM (of dicts), like applyPatch in index.js.
+        Returns the (new) root of the VDOM.
+    """
+
+    path = patch["path"]
+    operation = patch["op"]
+
+    # The root itself
+    if len(path) == 0:
+        if operation == "replace":
+            return patch["node"]
+        if operation == "props":
+            _patchProps(vdom, patch)
+        return vdom
+
+    parent = vdom
+    for index in path[:-1]:
+        parent = parent["children"][index]
+    children = parent["children"]
+    index = path[-1]
+
+    if operation == "insert":
+        children.insert(index, patch["node"])
+    elif operation == "remove":
+        children.pop(index)
+    elif operation == "replace":
+        children[index] = patch["node"]
+    elif operation == "move":
+        children.insert(patch["to"], children.pop(index))
+    elif operation == "props":
+        _patchProps(children[index], patch)
+    elif operation == "text":
+        children[index] = patch["text"]
+    return vdom
+
+
+def _patchProps(node: dict, patch: dict) -> None:
+    for name in patch["remove"]:
+        node["props"].pop(name, None)
+    node["props"].update(patch["set"])
+
+
+def findTargets(node, targets: list = None) -> list:
+    """ Find the elements that a user can interact with (buttons, inputs
+        and selects with an identifier), as (category, node) tuples.
+    """
+
+    if targets is None:
+        targets = []
+
+    # Text nodes
+    if not isinstance(node, dict):
+        return targets
+
+    props = node.get("props", {})
+    if "identifier" in props and "disabled" not in props:
+        if node["type"] == "button":
+            targets.append(("MouseEvent click", node))
+        elif node["type"] in ["input", "textarea"]:
+            targets.append(("Event input", node))
+        elif node["type"] == "select":
+            targets.append(("Event change", node))
+
+    for child in node.get("children", []):
+        findTargets(child, targets)
+    return targets
+
+
+def payloadSize(payload) -> int:
+    """ The size of an update as it is sent (JSON, or bytes for binary formats).
+    """
+
+    if isinstance(payload, (bytes, bytearray)):
+        return len(payload)
+    return len(json.dumps(payload, separators=(",", ":")))
+
+
+class Statistics(object):
+    """ Measurements of all sessions (they share an event loop, so there is
+        no need for locks).
+    """
+
+    def __init__(self: object) -> None:
+        """ Initialization of the statistics.
+        """
+
+        self.latencies = []
+        self.update_bytes = []
+        self.full_updates = 0
+        self.patches = 0
+        self.events = 0
+        self.no_update = 0
+        self.unanswered = 0
+        self.errors = {}
+        self.loaded = 0
+
+    def error(self: object, exception: Exception) -> None:
+        """ Count an error (by type).
+        """
+
+        name = type(exception).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self: object, elapsed: float) -> dict:
+        """ The statistics as metrics (latencies in milliseconds).
+        """
+
+        def milliseconds(value):
+            return None if value is None else value * 1000
+
+        updates = len(self.update_bytes)
+        return {
+            "events": self.events,
+            "events_per_second": self.events / elapsed if elapsed > 0 else 0,
+            "latency_p50_ms": milliseconds(percentile(self.latencies, 0.5)),
+            "latency_p95_ms": milliseconds(percentile(self.latencies, 0.95)),
+            "latency_p99_ms": milliseconds(percentile(self.latencies, 0.99)),
+            "latency_max_ms": milliseconds(max(self.latencies, default=None)),
+            "updates": updates,
+            "full_updates": self.full_updates,
+            "patches": self.patches,
+            "bytes_per_update": sum(self.update_bytes) / updates if updates > 0 else 0,
+            "no_update": self.no_update,
+            "unanswered": self.unanswered,
+            "errors": sum(self.errors.values()),
+            "error_types": self.errors,
+        }
+
+
+class Session(object):
+    """ A simulated browser session.
+    """
+
+    def __init__(
+        self: object, url: str, statistics: Statistics, paths: list, think: float, navigate: float, timeout: float
+    ) -> None:
+        """ Initialization of the session. It thinks for think seconds on
+            average between two actions, and an action navigates to one of
+            the paths with a probability of navigate (or when there is
+            nothing else to do).
+        """
+
+        # Store the input parameters
+        self.url = url
+        self.statistics = statistics
+        self.paths = paths
+        self.think = think
+        self.navigate = navigate
+        self.timeout = timeout
+
+        self.session_id = None
+        self.location = paths[0]
+        self.vdom = None
+
+        # Updates (and patches) that arrived since the last event was sent, with the time they arrived
+        self.received = asyncio.Queue()
+
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.client.on("STORE_SESSION", self.onStoreSession)
+        self.client.on("VDOM_UPDATE", self.onUpdate)
+        self.client.on("VDOM_PATCH", self.onPatch)
+        self.client.on("NAVIGATION_EVENT", self.onNavigation)
+
+    async def onStoreSession(self: object, event: dict) -> None:
+        self.session_id = event["session_id"]
+        self.received.put_nowait(("STORE_SESSION", time.perf_counter()))
+
+    async def onUpdate(self: object, payload) -> None:
+        self.statistics.update_bytes.append(payloadSize(payload))
+        self.statistics.full_updates += 1
+        self.vdom = payload
+        self.received.put_nowait(("VDOM_UPDATE", time.perf_counter()))
+
+    async def onPatch(self: object, payload) -> None:
+        self.statistics.update_bytes.append(payloadSize(payload))
+        self.statistics.patches += 1
+
+        # Ask for the full VDOM when a patch does not fit (like index.js does)
+        try:
+            for patch in payload["patches"]:
+                self.vdom = applyPatch(self.vdom, patch)
+        except (IndexError, KeyError, TypeError) as exception:
+            self.statistics.error(exception)
+            await self.client.emit("REQUEST_VDOM", {})
+        self.received.put_nowait(("VDOM_PATCH", time.perf_counter()))
+
+    async def onNavigation(self: object, details: dict) -> None:
+        self.location = details["link_target"]
+
+    async def start(self: object) -> None:
+        """ Connect, get a session and load the first page.
+        """
+
+        await self.client.connect(self.url, transports=["websocket"], wait_timeout=self.timeout)
+        await self.client.emit("REQUEST_SESSION", {"formats": FORMATS})
+        await asyncio.wait_for(self.received.get(), self.timeout)
+        await self.load(self.location)
+        if self.vdom is not None:
+            self.statistics.loaded += 1
+
+    async def load(self: object, path: str) -> None:
+        """ Navigate to a path.
+        """
+
+        self.location = path
+        await self.send({"DOMEventCategory": "UIEvent load", "link_target": path, "link_search": "", "link_anchor": ""})
+
+    async def send(self: object, message: dict) -> None:
+        """ Send an event and wait until the server has handled it. The
+            server sends the update that the event causes (if anything
+            changed) before it acknowledges the event.
+        """
+
+        # Forget the updates that were not caused by this event (e.g. late or from background listeners)
+        while not self.received.empty():
+            self.received.get_nowait()
+
+        start = time.perf_counter()
+        self.statistics.events += 1
+        try:
+            await self.client.call("DOM_EVENT", message, timeout=self.timeout)
+        except socketio.exceptions.TimeoutError:
+            self.statistics.unanswered += 1
+            return
+
+        if self.received.empty():
+            self.statistics.no_update += 1
+        else:
+            _, received = self.received.get_nowait()
+            self.statistics.latencies.append(received - start)
+
+    async def act(self: object) -> None:
+        """ Do something on the page (or go to another page).
+        """
+
+        # Navigate to another path (loading the same path again changes nothing)
+        targets = findTargets(self.vdom)
+        paths = [path for path in self.paths if path != self.location]
+        if len(targets) == 0 or (len(paths) > 0 and random.random() < self.navigate):
+            await self.load(random.choice(paths or self.paths))
+            return
+
+        category, node = random.choice(targets)
+        identifier = node["props"]["identifier"]
+
+        if category == "MouseEvent click":
+            await self.send({"DOMEventCategory": category, "target": identifier, "value": ""})
+
+        elif category == "Event change":
+            options = [child["props"].get("value", "") for child in node["children"] if isinstance(child, dict)]
+            await self.send({"DOMEventCategory": category, "target": identifier, "value": random.choice(options or [""])})
+
+        else:
+            await self.type(node, random.choice(WORDS))
+
+    async def type(self: object, node: dict, word: str) -> None:
+        """ Type a word into an input, an event per keystroke (unless the
+            input is debounced or throttled, see sendEvent in index.js).
+        """
+
+        identifier = node["props"]["identifier"]
+        debounce = int(node["props"].get("data-debounce", 0) or 0) / 1000
+        throttle = int(node["props"].get("data-throttle", 0) or 0) / 1000
+
+        last_sent = None
+        for length in range(1, len(word) + 1):
+            await asyncio.sleep(random.uniform(*KEYSTROKE))
+            last = length == len(word)
+
+            # Only the last value of a debounced input is sent (after the pause)
+            if debounce > 0 and not last:
+                continue
+            if throttle > 0 and not last and last_sent is not None and time.perf_counter() - last_sent < throttle:
+                continue
+            if debounce > 0:
+                await asyncio.sleep(debounce)
+
+            last_sent = time.perf_counter()
+            await self.send({"DOMEventCategory": "Event input", "target": identifier, "value": word[:length]})
+
+    async def run(self: object, delay: float, loaded: asyncio.Event, total: int, deadline: float) -> None:
+        """ Start after a delay, and act until the deadline (with think time
+            between the actions).
+        """
+
+        await asyncio.sleep(delay)
+        try:
+            await self.start()
+        except Exception as exception:
+            self.statistics.error(exception)
+        finally:
+            if self.statistics.loaded + sum(self.statistics.errors.values()) >= total:
+                loaded.set()
+
+        while self.client.connected and self.vdom is not None:
+            await asyncio.sleep(min(random.expovariate(1 / self.think), max(deadline - time.perf_counter(), 0)))
+            if time.perf_counter() >= deadline:
+                break
+            try:
+                await self.act()
+            except Exception as exception:
+                self.statistics.error(exception)
+                break
+
+    async def stop(self: object) -> None:
+        try:
+            await self.client.disconnect()
+        except Exception:
+            pass
+
+
+async def runLoad(
+    url: str,
+    sessions: int = 100,
+    duration: float = 30,
+    ramp_up: float = 10,
+    think: float = 5,
+    navigate: float = 0.1,
+    paths: list = ["/"],
+    timeout: float = 10,
+    pid: int = None,
+) -> dict:
+    """ Run sessions against the app at the url. Sessions start spread over
+        the ramp up, and all of them act until the duration has passed (after
+        the ramp up). The memory is measured if the pid of the server is known.
+    """
+
+    statistics = Statistics()
+    cpu = time.process_time()
+    memory_idle = processMemory(pid) if pid is not None else None
+    memory_loaded = None
+
+    start = time.perf_counter()
+    deadline = start + ramp_up + duration
+    loaded = asyncio.Event()
+    clients = [Session(url, statistics, paths, think, navigate, timeout) for _ in range(sessions)]
+    tasks = [
+        asyncio.ensure_future(client.run(ramp_up * index / sessions, loaded, sessions, deadline))
+        for index, client in enumerate(clients)
+    ]
+
+    # Measure the memory of the server once every session has loaded its page
+    try:
+        await asyncio.wait_for(loaded.wait(), max(deadline - time.perf_counter(), 0))
+        if pid is not None:
+            memory_loaded = processMemory(pid)
+    except asyncio.TimeoutError:
+        pass
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    await asyncio.gather(*[client.stop() for client in clients])
+
+    results = {"sessions": sessions, "loaded": statistics.loaded, **statistics.summary(elapsed)}
+
+    # The sessions share one process, close to 100% it limits the load (run more load generators)
+    results["client_cpu_percent"] = (time.process_time() - cpu) / elapsed * 100
+    if memory_idle is not None and memory_loaded is not None:
+        results["server_memory_mb"] = memory_loaded / 1024 / 1024
+        results["memory_per_session_kb"] = (memory_loaded - memory_idle) / max(statistics.loaded, 1) / 1024
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in results.items()}
+
+
+def startServer(scenario: str, port: int, async_mode: str = "threading", quick: bool = False, log: str = os.devnull):
+    """ Serve a benchmark app in another process, returns the process once
+        the server accepts connections.
+    """
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [sys.executable, "-m", "benchmarks.server", scenario, "--port", str(port), "--async-mode", async_mode]
+    if quick:
+        command.append("--quick")
+
+    with open(log, "w") as output:
+        process = subprocess.Popen(command, cwd=root, stdout=output, stderr=subprocess.STDOUT)
+
+    # Wait until the server listens
+    started = time.perf_counter()
+    while time.perf_counter() - started < 60:
+        if process.poll() is not None:
+            raise Exception(f"The server of {scenario} stopped (exit code {process.returncode}), see {log}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise Exception(f"The server of {scenario} did not start within a minute")
+
+
+def freePort() -> int:
+    with socket.socket() as socket_:
+        socket_.bind(("127.0.0.1", 0))
+        return socket_.getsockname()[1]
+
+
+def main(arguments: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate many browser sessions against a pydow app.")
+    parser.add_argument("scenario", nargs="?", default="wide_list", help="Benchmark app to serve (default: wide_list)")
+    parser.add_argument("--quick", action="store_true", help="Serve the smaller app")
+    parser.add_argument("--async-mode", default="gevent", help="Async mode of the server (threading, eventlet or gevent)")
+    parser.add_argument("--url", help="Run against this app instead (e.g. http://127.0.0.1:5000)")
+    parser.add_argument("--pid", type=int, help="Process of the app at --url (to measure its memory)")
+    parser.add_argument("--sessions", type=int, default=100, help="Simulated sessions")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run after the ramp up")
+    parser.add_argument("--ramp-up", type=float, default=10, help="Seconds over which the sessions start")
+    parser.add_argument("--think", type=float, default=5, help="Average think time between actions (seconds)")
+    parser.add_argument("--navigate", type=float, default=0.1, help="Chance that an action navigates")
+    parser.add_argument("--paths", nargs="+", default=["/"], help="Paths to navigate to (the first is loaded first)")
+    parser.add_argument("--timeout", type=float, default=10, help="Seconds to wait for the update of an event")
+    parser.add_argument("--server-log", default=os.devnull, help="Write the output of the server to this file")
+    parser.add_argument("--output", help="Write the results (JSON) to this file")
+    arguments = parser.parse_args(arguments)
+
+    raiseFileLimit()
+
+    # Serve the benchmark app (unless there is an app to run against)
+    server = None
+    url, pid = arguments.url, arguments.pid
+    if url is None:
+        if arguments.scenario not in SCENARIOS:
+            parser.error(f"Unknown scenario {arguments.scenario}, choose from {', '.join(SCENARIOS)}")
+        port = freePort()
+        server = startServer(arguments.scenario, port, arguments.async_mode, arguments.quick, arguments.server_log)
+        url, pid = f"http://127.0.0.1:{port}", server.pid
+
+    try:
+        results = asyncio.run(
+            runLoad(
+                url,
+                sessions=arguments.sessions,
+                duration=arguments.duration,
+                ramp_up=arguments.ramp_up,
+                think=arguments.think,
+                navigate=arguments.navigate,
+                paths=arguments.paths,
+                timeout=arguments.timeout,
+                pid=pid,
+            )
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scenario": arguments.scenario if arguments.url is None else arguments.url,
+            "quick": arguments.quick,
+            "async_mode": arguments.async_mode if arguments.url is None else None,
+            "think": arguments.think,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    print(json.dumps(results, indent=2))
+
+    if arguments.output is not None:
+        with open(arguments.output, "w") as file_:
+            json.dump(results, file_, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
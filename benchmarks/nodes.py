@@ -0,0 +1,74 @@
+""" Benchmark of the virtual DOM node representation: builds the nodes of a
+    large parsed template as dicts (the previous representation) and as
+    VNodes, and reports the time, the allocated memory and the size of the
+    JSON. Run with python -m benchmarks.nodes (from the root of the repo).
+"""
+import json
+import time
+import tracemalloc
+
+from lxml import etree
+
+from pydow.core.helpers import JSON
+from pydow.core.helpers import VNode
+
+
+def createDict(element) -> dict:
+    """ The previous representation (a dict per node, children are copied).
+    """
+
+    if len(element) > 0:
+        children = [createDict(child) for child in element]
+    else:
+        children = [element.text] if element.text is not None else []
+    return {"type": element.tag, "props": dict(element.attrib), "children": [child for child in children if child is not None]}
+
+
+def createVNode(element) -> VNode:
+    """ The slotted representation (as built by pydow.core.component).
+    """
+
+    if len(element) > 0:
+        children = [createVNode(child) for child in element]
+    else:
+        children = [element.text] if element.text is not None else []
+    return VNode(element.tag, dict(element.attrib), children)
+
+
+def measure(create, root, repeat: int = 20) -> dict:
+    """ Time the creation of the tree (best of repeat) and trace the memory
+        of a single tree.
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        create(root)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    tree = create(root)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": best, "bytes": memory, "json": len(JSON.dumps(tree, separators=(",", ":")))}
+
+
+def main(rows: int = 2000) -> None:
+    html = "<table>" + "".join(
+        f'<tr class="row" id="row-{index}"><td>{index}</td><td><a href="#">Item {index}</a></td></tr>'
+        for index in range(rows)
+    ) + "</table>"
+    root = etree.fromstring(html)
+
+    results = {"dict": measure(createDict, root), "vnode": measure(createVNode, root)}
+    for name, result in results.items():
+        print(f"{name:6} {result['seconds'] * 1000:8.2f} ms {result['bytes'] / 1024:9.1f} KiB {result['json']:9} bytes JSON")
+
+    # Both representations are sent as the same JSON
+    assert json.loads(JSON.dumps(createVNode(root))) == createDict(root)
+
+
+if __name__ == "__main__":
+    main()
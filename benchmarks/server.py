@@ -0,0 +1,49 @@
+""" Serve one of the benchmark apps (see benchmarks/apps.py) with a full App,
+    for the load generator (benchmarks/load.py). Run with
+    python -m benchmarks.server wide_list --port 5100 --async-mode gevent.
+"""
+import sys
+import argparse
+
+from pydow.core.concurrency import monkey_patch
+
+
+def main(arguments: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve a pydow benchmark app.")
+    parser.add_argument("scenario", help="The app to serve (a scenario of the benchmark suite)")
+    parser.add_argument("--quick", action="store_true", help="Serve the smaller app")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to listen on")
+    parser.add_argument("--port", type=int, default=5100, help="Port to listen on")
+    parser.add_argument("--async-mode", default="threading", help="Async mode of the App (threading, eventlet or gevent)")
+    arguments = parser.parse_args(arguments)
+
+    # Green threads need the standard library patched before anything else is imported (pydow as well)
+    monkey_patch(arguments.async_mode)
+
+    from pydow import App
+    from benchmarks.apps import SCENARIOS
+    from benchmarks.suite import _EMPTY
+    from benchmarks.load import raiseFileLimit
+
+    # Every session keeps a socket open
+    raiseFileLimit()
+
+    create, options, quick_options = SCENARIOS[arguments.scenario]
+    scenario = create(**(quick_options if arguments.quick else options))
+    app = App(
+        scenario["vdom"],
+        plugin_folder=_EMPTY,
+        middleware_folder=_EMPTY,
+        configuration_file=_EMPTY,
+        production=True,
+        async_mode=arguments.async_mode,
+        prerender=False,
+    )
+
+    options = {"allow_unsafe_werkzeug": True} if arguments.async_mode == "threading" else {}
+    app.run(host=arguments.host, port=arguments.port, **options)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
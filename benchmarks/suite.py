@@ -0,0 +1,205 @@
+""" Benchmark suite for the render and event pipeline. Every scenario (see
+    benchmarks/apps.py) runs in its own process and reports:
+
+    - build_ms: creating the VirtualDOM (and the components)
+    - first_render_ms: the first render (creates the component of the route)
+    - render_ms: rendering the VDOM without the render cache
+    - cached_render_ms: rendering the VDOM with the render cache
+    - html_render_ms: rendering the root component into HTML
+    - to_dict_ms: the VDOM as plain dicts
+    - nodes and json_bytes: the size of the VDOM
+    - alloc_peak_kb: the peak of the memory allocated by a render
+    - events_per_second: events through the Socket.IO test client (each one
+      handled, rendered, diffed and sent)
+    - bytes_per_event: the size of the updates that are sent per event
+
+    Run with python -m benchmarks (from the root of the repo), write the
+    results with --output results.json, and compare them with earlier
+    results with --baseline results.json. Timings are the best of a number
+    of repeats (the least disturbed by other processes).
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import multiprocessing
+
+from benchmarks.apps import SCENARIOS
+
+
+# Metrics where a higher value is better (for all others lower is better)
+HIGHER_IS_BETTER = ["events_per_second"]
+
+# Timings (in milliseconds) that differ less than this are never a regression
+NOISE_MS = 0.1
+
+# Nothing to load for the benchmark apps
+_EMPTY = os.path.join(os.path.dirname(__file__), "templates", "missing")
+
+
+def timed(function, repeat: int) -> float:
+    """ The best time (in milliseconds) of calling a function.
+    """
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def runScenario(name: str, quick: bool = False, repeat: int = 20, events: int = 500) -> dict:
+    """ Run a single scenario (in this process) and return its metrics.
+    """
+
+    from pydow import App
+    from pydow.core.diff import countNodes
+    from pydow.core.helpers import JSON
+
+    create, options, quick_options = SCENARIOS[name]
+    session_id = "benchmark"
+    results = {}
+
+    # Build the app and navigate to the route
+    start = time.perf_counter()
+    scenario = create(**(quick_options if quick else options))
+    vdom = scenario["vdom"]
+    results["build_ms"] = (time.perf_counter() - start) * 1000
+    vdom.router.changeRoute({"link_target": scenario["route"], "session_id": session_id})
+
+    start = time.perf_counter()
+    node = vdom.toNode(session_id=session_id)
+    results["first_render_ms"] = (time.perf_counter() - start) * 1000
+
+    # Render latency
+    def render():
+        vdom.render_cache.clear()
+        vdom.toNode(session_id=session_id)
+
+    results["render_ms"] = timed(render, repeat)
+    results["cached_render_ms"] = timed(lambda: vdom.toNode(session_id=session_id), repeat)
+    results["html_render_ms"] = timed(lambda: vdom.root_class.render(session_id=session_id), repeat)
+    results["to_dict_ms"] = timed(lambda: vdom.toDict(session_id=session_id), repeat)
+
+    # Size of the VDOM
+    results["nodes"] = countNodes(node)
+    results["json_bytes"] = len(JSON.dumps(node, separators=(",", ":")))
+
+    # Allocations of a render
+    vdom.render_cache.clear()
+    tracemalloc.start()
+    vdom.toNode(session_id=session_id)
+    results["alloc_peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+
+    # Events through the Socket.IO test client
+    app = App(vdom, plugin_folder=_EMPTY, middleware_folder=_EMPTY, configuration_file=_EMPTY, prerender=False)
+    client = app.socketio.test_client(app.app)
+    client.emit("RESTORE_SESSION", {"session_id": session_id})
+    client.emit("DOM_EVENT", {"DOMEventCategory": "UIEvent load", "link_target": scenario["route"], "link_search": "", "link_anchor": ""})
+    client.get_received()
+
+    sent = 0
+    start = time.perf_counter()
+    for index in range(events):
+        client.emit("DOM_EVENT", scenario["event"](index))
+        for packet in client.get_received():
+            if packet["name"] in ["VDOM_UPDATE", "VDOM_PATCH"]:
+                sent += len(JSON.dumps(packet["args"], separators=(",", ":")))
+    elapsed = time.perf_counter() - start
+    results["events_per_second"] = events / elapsed
+    results["bytes_per_event"] = sent / events
+
+    return {key: round(value, 3) for key, value in results.items()}
+
+
+def _runInProcess(name: str, options: dict, queue: object) -> None:
+    try:
+        queue.put(runScenario(name, **options))
+    except Exception as exception:
+        queue.put({"error": repr(exception)})
+
+
+def runSuite(names: list, quick: bool = False, repeat: int = 20, events: int = 500) -> dict:
+    """ Run scenarios, each in its own process (apps connect to the signals of
+        the process, and would handle each other's events).
+    """
+
+    context = multiprocessing.get_context("fork")
+    results = {}
+    for name in names:
+        queue = context.Queue()
+        options = {"quick": quick, "repeat": repeat, "events": events}
+        process = context.Process(target=_runInProcess, args=(name, options, queue))
+        process.start()
+        results[name] = queue.get()
+        process.join()
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "quick": quick,
+            "repeat": repeat,
+            "events": events,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.1) -> list:
+    """ Compare results with a baseline, returns the (scenario, metric,
+        baseline, current, change) of every metric in both, and prints them.
+        A change worse than the threshold (a fraction) is a regression.
+    """
+
+    changes = []
+    print(f"{'scenario':<12} {'metric':<18} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, metrics in results["results"].items():
+        for metric, value in metrics.items():
+            previous = baseline.get("results", {}).get(name, {}).get(metric)
+            if not isinstance(previous, (int, float)) or not isinstance(value, (int, float)) or previous == 0:
+                continue
+            change = (value - previous) / previous
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            regression = worse > threshold and not (metric.endswith("_ms") and abs(value - previous) < NOISE_MS)
+            flag = "  REGRESSION" if regression else ""
+            print(f"{name:<12} {metric:<18} {previous:>12.3f} {value:>12.3f} {change:>+8.1%}{flag}")
+            changes.append((name, metric, previous, value, regression))
+    return changes
+
+
+def main(arguments: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the pydow render and event pipeline.")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help="Scenarios to run (default: all)")
+    parser.add_argument("--quick", action="store_true", help="Run smaller apps")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeats of every timing (the best is reported)")
+    parser.add_argument("--events", type=int, default=500, help="Events to send through the test client")
+    parser.add_argument("--output", help="Write the results (JSON) to this file")
+    parser.add_argument("--baseline", help="Compare with the results in this file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Change that counts as a regression (0.1 = 10%%)")
+    arguments = parser.parse_args(arguments)
+
+    results = runSuite(arguments.scenarios, quick=arguments.quick, repeat=arguments.repeat, events=arguments.events)
+    print(json.dumps(results, indent=2))
+
+    if arguments.output is not None:
+        with open(arguments.output, "w") as file_:
+            json.dump(results, file_, indent=2)
+
+    # Fail if anything got worse than the baseline
+    if arguments.baseline is not None:
+        with open(arguments.baseline) as file_:
+            baseline = json.load(file_)
+        if any(regression for *_, regression in compare(results, baseline, arguments.threshold)):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
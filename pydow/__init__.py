@@ -1,9 +1,21 @@
-from pydow.core import App
-from pydow.core import VirtualDOM
-from pydow.core import Component
-from pydow.plugins import BasePlugin
-from pydow.router import Link
-from pydow.middleware import BaseMiddleWare
+import importlib
 
 
+# The modules of the public names, imported on first use (so pydow.core.concurrency
+# can patch the standard library before Flask and the rest are imported)
+_exports = {
+    "App": "pydow.core",
+    "VirtualDOM": "pydow.core",
+    "Component": "pydow.core",
+    "BasePlugin": "pydow.plugins",
+    "Link": "pydow.router",
+    "BaseMiddleWare": "pydow.middleware",
+}
+
 __all__ = ["App", "VirtualDOM", "Component", "BasePlugin", "Link", "BaseMiddleWare"]
+
+
+def __getattr__(name: str):
+    if name in _exports:
+        return getattr(importlib.import_module(_exports[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
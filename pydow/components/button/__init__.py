@@ -1,11 +1,11 @@
 from pydow.core import Component
-
-from blinker import signal
+from pydow.core.dispatcher import ON_CLICK
 
 
 class Button(Component):
     """ Component that renders a button on the page and adds onClick behaviour
-        to the button.
+        to the button. The button is disabled while a background onClick
+        (marked as pending) is running.
     """
 
     def __init__(self: object, *args, **kwargs) -> None:
@@ -15,9 +15,6 @@ class Button(Component):
         # Initialize like any other component and point to the template location (this folder)
         super(Button, self).__init__(template_location=__file__, *args, **kwargs)
 
-        # Specific signals for this button
-        self.signal_on_click = signal(f"ON_CLICK_{self.identifier}")
-
         # Add things that can be rendered
         self.bindings = {
             "content": self.content if hasattr(self, "content") else "Button"
@@ -27,4 +24,10 @@ class Button(Component):
         if hasattr(self, "onClick"):
             on_click_method = self.onClick
             if on_click_method is not None:
-                self.signal_on_click.connect(on_click_method)
+                self.dispatcher.addEventListener(ON_CLICK, on_click_method, identifier=self.identifier, owner=self)
+
+    def update(self: object, session_id: str = None, *args, **kwargs) -> None:
+        """ Method that is called at each render. Disables the button while
+            the onClick is pending.
+        """
+        self.bindings["pending"] = self.isPending(session_id)
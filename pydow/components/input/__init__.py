@@ -1,13 +1,18 @@
 from pydow.core import Component
-
-from blinker import signal
+from pydow.core.dispatcher import ON_CLICK
+from pydow.core.dispatcher import ON_CHANGE
 
 
 class Input(Component):
     """ Component that renders an input field on the page and adds onClick
-        and onChange behaviour to the field.
+        and onChange behaviour to the field. Changes can be delayed by the
+        browser until there is a pause of debounce milliseconds, or sent at
+        most once every throttle milliseconds.
     """
 
+    debounce = None
+    throttle = None
+
     def __init__(self: object, *args: list, **kwargs: dict) -> None:
         """ Initialization of the input field
         """
@@ -15,9 +20,10 @@ class Input(Component):
         # Initialize like any other component and point to the template location (this folder)
         super(Input, self).__init__(template_location=__file__, *args, **kwargs)
 
-        # Specific signals for this button
-        self.signal_on_click = signal(f"ON_CLICK_{self.identifier}")
-        self.signal_on_change = signal(f"ON_CHANGE_{self.identifier}")
+        # Let the browser coalesce the change events of this field
+        for window in ["debounce", "throttle"]:
+            if getattr(self, window) is not None:
+                self.attributes[f"data-{window}"] = str(getattr(self, window))
 
         # Add things that can be rendered
         self.bindings = {"value": self.store.getState(f"INPUT_{self.identifier}", "")}
@@ -26,10 +32,10 @@ class Input(Component):
         if hasattr(self, "onClick"):
             on_click_method = self.onClick
             if on_click_method is not None:
-                self.signal_on_click.connect(on_click_method, weak=False)
+                self.dispatcher.addEventListener(ON_CLICK, on_click_method, identifier=self.identifier, owner=self)
 
         # Store the content of the field
-        self.signal_on_change.connect(self.onChange, weak=False)
+        self.dispatcher.addEventListener(ON_CHANGE, self.onChange, identifier=self.identifier, owner=self)
 
     def onChange(self: object, event: dict) -> None:
         """ Default onChange method. Stores the current state of the input
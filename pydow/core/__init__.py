@@ -1,6 +1,19 @@
-from pydow.core.app import App
-from pydow.core.virtual_dom import VirtualDOM
-from pydow.core.component import Component
-from pydow.core.helpers import h
+import importlib
 
-__all__ = ["VirtualDOM", "Component", "h", "App"]
+
+# The modules of the public names, imported on first use (see pydow/__init__.py)
+_exports = {
+    "App": "pydow.core.app",
+    "VirtualDOM": "pydow.core.virtual_dom",
+    "Component": "pydow.core.component",
+    "h": "pydow.core.helpers",
+    "VNode": "pydow.core.helpers",
+}
+
+__all__ = ["VirtualDOM", "Component", "h", "VNode", "App"]
+
+
+def __getattr__(name: str):
+    if name in _exports:
+        return getattr(importlib.import_module(_exports[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
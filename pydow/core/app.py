@@ -1,8 +1,17 @@
 import os
-import sys
+import time
+import uuid
+import logging
+import secrets
+import threading
 import configparser
+import multiprocessing
+
+from multiprocessing.connection import wait
 
 from flask import Flask
+from flask import request
+from flask import render_template
 from flask_socketio import emit
 from flask_socketio import SocketIO
 
@@ -11,19 +20,54 @@ from typing import TypeVar
 
 from .handlers import (
     handle_connect,
+    handle_disconnect,
+    handle_requestVDOM,
     handle_requestSession,
     handle_restoreSession,
     handle_dom_event,
+    handle_dom_event_batch,
     handle_all_json,
 )
 
+from .concurrency import check_async_mode
+from .broker import startBroker
+from .broker import QueueManager
+from .diff import diff
+from .diff import patchSize
+from .diff import countNodes
+from .encoding import COMPACT
+from .encoding import encodePayload
+from .encoding import supportedFormats
+from .prerender import PrerenderCache
+from .helpers import JSON
+from .helpers import renderHTML
+from .helpers import scriptJSON
 from .routes import catch_all
+from .routes import metrics_endpoint
+from .routes import profile_endpoint
+from .metrics import EMIT
+from .metrics import metrics
+from .log import logger
+from .log import events_logger
+from .log import configureLogging as _configureLogging
+from .extensions import Extensions
+from .extensions import StartupProfile
+from .assets import Shell
+from .assets import AssetCache
+
+from pydow.store import Store
+from pydow.store import createStore
+from pydow.store.shared import startServer
+from pydow.store.shared import Store as SharedStore
 
 from pydow.signals import (
     signal_navigation_event,
     signal_state_update,
     signal_clear_input_field_event,
     signal_default_event,
+    signal_client_reset,
+    signal_client_capabilities,
+    signal_client_hydrated,
 )
 
 # Define parameter types (for typing in Python)
@@ -45,10 +89,36 @@ class App(object):
         middleware_folder: str = "./middleware",
         template_folder: str = "../public",
         configuration_file: str = "./server.conf",
+        production: bool = False,
+        store: object = None,
+        message_queue: str = None,
+        async_mode: str = "threading",
+        background_workers: int = 4,
+        background_executor: object = None,
+        compact_payloads: bool = False,
+        compress_threshold: int = 16384,
+        prerender: bool = True,
+        metrics_path: str = None,
+        debug_path: str = None,
         *args: list,
         **kwargs: dict,
     ) -> None:
-        """ Initialization of the app.
+        """ Initialization of the app. The store of the VDOM can be replaced by
+            passing a store (or the name of a store backend), or by configuring
+            a [store] section in the configuration file. The async_mode is
+            passed to Flask-SocketIO, use eventlet or gevent (after monkey
+            patching) for many concurrent connections. Background listeners
+            run on a pool of background_workers threads, or on the
+            background_executor (e.g. a process pool). With compact_payloads,
+            VDOM updates are sent in a compact (binary) format to clients that
+            support it, and deflated if they are at least compress_threshold
+            bytes (None to disable). With prerender, pages are rendered on the
+            server (for the session in the cookie of the browser) and the
+            browser hydrates them when it connects. With a metrics_path (or
+            a [metrics] section), the time spent in the hot paths is measured
+            and served at that path in the Prometheus text format. With a
+            debug_path (or a [debug] section), the render of a session can be
+            profiled at debug_path/profile.
         """
 
         # Get the configuration
@@ -64,114 +134,412 @@ class App(object):
         self.plugin_folder = plugin_folder
         self.middleware_folder = middleware_folder
         self.custom_javascript = custom_javascript
+        self.production = production
+        self.message_queue = message_queue
+        self.async_mode = async_mode
+        self.compact_payloads = compact_payloads
+        self.compress_threshold = compress_threshold
+        self.prerender = prerender
         self.template_folder = os.path.abspath(
             os.path.join(os.path.dirname(__file__), template_folder)
         )
 
-        # Register any plugins in the plugin folder
+        # Log at the configured level (only warnings and errors in production)
+        self.configureLogging()
+
+        # Measure the hot paths if the metrics are served (configured with path, local_only and enabled)
+        if metrics_path is None and "metrics" in self.config and self.config["metrics"].getboolean("enabled", True):
+            metrics_path = self.config["metrics"].get("path", "/metrics")
+        self.metrics_path = metrics_path
+
+        # Serve the debug routes (configured with path, local_only and enabled)
+        if debug_path is None and "debug" in self.config and self.config["debug"].getboolean("enabled", True):
+            debug_path = self.config["debug"].get("path", "/_pydow")
+        self.debug_path = debug_path
+
+        # The last VDOM that was sent to each connected client (by socket id)
+        self.sent_vdom = {}
+        self._client_locks = {}
+
+        # The payload formats that each connected client accepts (by socket id)
+        self.client_formats = {}
+
+        # The pages that were rendered by the server, until the browser hydrates them
+        self.prerendered = PrerenderCache()
+
+        # Templates are only checked for changes during development (for the components of this app)
+        self.vdom.template_auto_reload = not self.production
+
+        # Run background listeners on the configured pool
+        self.vdom.dispatcher.max_workers = background_workers
+        if background_executor is not None:
+            self.vdom.dispatcher.setExecutor(background_executor)
+
+        # Keep track of the time that every step of the startup takes
+        self.startup_profile = StartupProfile()
+
+        # Use the store from the arguments or the configuration (before plugins get a reference)
+        with self.startup_profile.measure("store"):
+            self.configureStore(store)
+
+        # Register the configured plugins (or the plugins in the plugin folder)
         self.registerPlugins()
 
-        # Register any middleware in the middleware folder
+        # Register the configured middleware (or the middleware in the middleware folder)
         self.registerMiddelWare()
 
         # Create the app from the provided VDOM object
-        self.socketio, self.app = self.createApp()
+        with self.startup_profile.measure("app"):
+            self.socketio, self.app = self.createApp()
 
-    def run(self: object, *args: list, **kwargs: dict) -> None:
+    def run(self: object, *args: list, workers: int = 1, **kwargs: dict) -> None:
         """ Wrapper that passes all arguments into the socketio run method.
+            With more than one worker, see runWorkers.
         """
-        self.socketio.run(self.app, *args, **kwargs)
 
-    def registerPlugins(self: object) -> None:
-        """ Method that registers plugins from the plugin folder. All plugins
-            are automatically initialized.
-        """
+        # Report how long the startup took (plugins and middleware that are lazy are added when they load)
+        logger.info("Startup\n%s", self.startup_profile.report())
 
-        # Add the plugin folder to the search path (this is relative to the users app)
-        sys.path.insert(0, self.plugin_folder)
+        if workers > 1:
+            self.runWorkers(workers, *args, **kwargs)
+        else:
+            self.socketio.run(self.app, *args, **kwargs)
 
-        # Start with an empty plugins dict
-        plugins = {}
+    def runWorkers(
+        self: object,
+        workers: int,
+        host: str = "127.0.0.1",
+        port: int = 5000,
+        broker_address: str = "127.0.0.1:50001",
+        store_address: str = "127.0.0.1:50000",
+        **kwargs: dict,
+    ) -> None:
+        """ Run the app in multiple worker processes, listening on port,
+            port + 1, etc. The workers share emits through a message broker
+            (the message_queue of the App, or a local broker that is started
+            here), and share the state through a shared store server (started
+            here if the VDOM uses the in-memory store). Other stores (e.g.
+            sqlite) keep state in every process, they are refused. Clients
+            have to stick to the same worker, e.g. with the configuration that
+            is printed.
+        """
 
-        # Detect plugin files
-        plugin_files = [
-            f
-            for f in os.listdir(self.plugin_folder)
-            if os.path.isfile(os.path.join(self.plugin_folder, f))
-        ]
+        context = multiprocessing.get_context("fork")
+        authkey = secrets.token_hex(16)
+        processes = []
+
+        # Every worker keeps its state in memory (or its own file), share the state or refuse to start
+        if not isinstance(self.vdom.store, (Store, SharedStore)):
+            raise Exception(
+                f"Multiple workers need a store that they share, {type(self.vdom.store).__module__} is not "
+                "shared (use the memory store, a shared store server is started, or the shared store)."
+            )
+
+        # Share emits between the workers (every worker connects to the broker after the fork)
+        if self.message_queue is None:
+            processes.append(startBroker(address=broker_address, authkey=authkey))
+
+        # Share the state between the workers
+        if isinstance(self.vdom.store, Store):
+            processes.append(
+                startServer(
+                    address=store_address,
+                    authkey=authkey,
+                    session_ttl=self.vdom.store.session_ttl,
+                    max_sessions=self.vdom.store.max_sessions,
+                )
+            )
+            self.vdom.setStore(createStore("shared", address=store_address, authkey=authkey))
 
-        # Loop the plugin files
-        for plugin_file in plugin_files:
+        logger.info(
+            "Starting %d workers, use sticky sessions in front of them, e.g. with NGINX:\n%s",
+            workers,
+            self.stickySessionConfig(host=host, port=port, workers=workers),
+        )
 
-            # Split the filename and extention and make sure it's Python code
-            fname, ext = os.path.splitext(plugin_file)
-            if ext == ".py":
+        # Start the workers (the reloader does not work with multiple processes)
+        kwargs["use_reloader"] = False
+        for worker in range(workers):
+            process = context.Process(
+                target=self._runWorker,
+                args=(broker_address, authkey),
+                kwargs=dict(kwargs, host=host, port=port + worker),
+            )
+            process.start()
+            processes.append(process)
+
+        # Wait for the workers, stop everything when one of them stops
+        try:
+            wait([process.sentinel for process in processes])
+        finally:
+            for process in processes:
+                process.terminate()
+
+    def _runWorker(self: object, broker_address: str, authkey: str, **kwargs: dict) -> None:
+        """ Run a worker process (after the fork). The client manager of the
+            Socket.IO server is set up here, so every worker has its own host
+            ID (messages with the ID of the worker itself are skipped) and its
+            own connection and listener thread.
+        """
 
-                # Import the module
-                mod = __import__(fname)
-                config = (
-                    self.config[f"plugins:{fname}"]
-                    if f"plugins:{fname}" in self.config
-                    else None
-                )
-                plugins[fname] = mod.Plugin(app=self, vdom=self.vdom, config=config)
+        if self.message_queue is None:
+            self.useMessageQueue(QueueManager(address=broker_address, authkey=authkey))
+        else:
+            server = self.socketio.server
+            server.manager.host_id = uuid.uuid4().hex
+            server.manager_initialized = False
 
-        self.plugins = plugins
+        self.socketio.run(self.app, **kwargs)
 
-    def registerMiddelWare(self: object) -> None:
+    def useMessageQueue(self: object, manager: object) -> None:
+        """ Method that makes the Socket.IO server share emits with other
+            processes through a client manager (before clients connect).
         """
+
+        server = self.socketio.server
+        server.manager = manager
+        server.manager_initialized = False
+        manager.set_server(server)
+
+    def stickySessionConfig(self: object, host: str, port: int, workers: int) -> str:
+        """ Method that returns an NGINX configuration that sends every client
+            to the same worker (needed for the Socket.IO polling transport).
         """
 
-        # Add the plugin folder to the search path (this is relative to the users app)
-        sys.path.insert(0, self.middleware_folder)
+        servers = "\n".join(f"    server {host}:{port + worker};" for worker in range(workers))
+        return (
+            "upstream pydow {\n"
+            "    ip_hash;\n"
+            f"{servers}\n"
+            "}\n"
+            "server {\n"
+            "    listen 80;\n"
+            "    location / {\n"
+            "        proxy_pass http://pydow;\n"
+            "        proxy_http_version 1.1;\n"
+            "        proxy_set_header Upgrade $http_upgrade;\n"
+            "        proxy_set_header Connection \"upgrade\";\n"
+            "        proxy_set_header Host $host;\n"
+            "    }\n"
+            "}"
+        )
 
-        middleware = {}
+    def configureStore(self: object, store: object = None) -> None:
+        """ Method that replaces the store of the VDOM with the store from the
+            arguments or from the [store] section of the configuration, e.g.:
 
-        if not os.path.isdir(self.middleware_folder):
-            self.middleware = middleware
-            return
+                [store]
+                backend = sqlite
+                filename = ./state.sqlite
+        """
 
-        # Detect middleware files
-        middleware_files = [
-            f
-            for f in os.listdir(self.middleware_folder)
-            if os.path.isfile(os.path.join(self.middleware_folder, f))
-        ]
+        # Use the configuration if there is no store in the arguments
+        if store is None and "store" in self.config:
+            options = {
+                key: _parseOption(value)
+                for key, value in self.config["store"].items()
+                if key != "backend"
+            }
+            store = createStore(self.config["store"].get("backend", "memory"), **options)
+
+        # Create the store by name
+        elif isinstance(store, str):
+            store = createStore(store)
+
+        if store is not None:
+            self.vdom.setStore(store)
+
+    def configureLogging(self: object) -> None:
+        """ Method that configures the logger of pydow with the [logging]
+            section of the configuration, e.g.:
+
+                [logging]
+                level = WARNING
+                sample_rate = 0.01
+                format = json
+                filename = ./pydow.log
+
+            The level is INFO by default (WARNING in production, then nothing
+            is logged per event). Messages are written by a background thread.
+        """
 
-        # Loop the plugin files
-        for middleware_file in middleware_files:
+        options = {}
+        if "logging" in self.config:
+            options = {key: _parseOption(value) for key, value in self.config["logging"].items()}
+        options.setdefault("level", "WARNING" if self.production else "INFO")
+        _configureLogging(**options)
 
-            # Split the filename and extention and make sure it's Python code
-            fname, ext = os.path.splitext(middleware_file)
-            if ext == ".py":
+    def registerPlugins(self: object) -> None:
+        """ Method that registers the plugins in the plugin folder and the
+            plugins that are configured in the configuration file
+            ([plugins:name] sections). Plugins are initialized right away,
+            unless they are lazy (lazy = true in their section), then they are
+            loaded when they are first used (app.plugins[name]).
+        """
 
-                # Import the module
-                mod = __import__(fname)
-                config = (
-                    self.config[f"middleware:{fname}"]
-                    if f"middleware:{fname}" in self.config
-                    else None
-                )
-                if config.getboolean("enabled", fallback=True):
-                    middleware[fname] = mod.MiddleWare(
-                        app=self, vdom=self.vdom, config=config
-                    )
+        self.plugins = Extensions(
+            "plugins",
+            self.plugin_folder,
+            self.config,
+            lambda module, config: module.Plugin(app=self, vdom=self.vdom, config=config),
+            profile=self.startup_profile,
+        )
+        self.plugins.loadAll()
 
-        self.middleware = middleware
+    def registerMiddelWare(self: object) -> None:
+        """ Method that registers the middleware in the middleware folder and
+            the middleware that is configured in the configuration file
+            ([middleware:name] sections). Lazy middleware (lazy = true) is
+            loaded when the middleware runs for the first time.
+        """
+
+        self.middleware = Extensions(
+            "middleware",
+            self.middleware_folder,
+            self.config,
+            lambda module, config: module.MiddleWare(app=self, vdom=self.vdom, config=config),
+            profile=self.startup_profile,
+        )
+        self.middleware.loadAll()
 
     def runMiddleWare(self: object, *args: list, **kwargs: dict) -> None:
         """ Method that triggers the middleware at every request.
         """
 
+        logged = events_logger.isEnabledFor(logging.DEBUG)
         for name, middleware in self.middleware.items():
-            print(f"Running middleware {name}")
+            if logged:
+                events_logger.debug("Running middleware", extra={"fields": {"middleware": name}})
             middleware.run(*args, **kwargs)
 
     def _sendStateUpdate(self: object, event: dict, *args, **kwargs) -> None:
-        """ Method that emits updates to the VDOM to the browser.
+        """ Method that emits updates to the VDOM to the browser. Only the
+            changes since the last update are sent if the client has a VDOM.
+            Events can pass the state they changed ((key, session_id, identifier)
+            tuples) to skip the update if nothing changed for the session, and
+            the socket id of the client (e.g. when sent from a background
+            thread, outside of the request).
         """
         session_id = event.get("session_id")
-        emit("VDOM_UPDATE", self.vdom.toDict(session_id=session_id))
+        sid = event.get("sid")
+        if sid is None:
+            sid = request.sid
+
+        # Nothing to send if the client is up-to-date and the state of the session did not change
+        changes = event.get("changes")
+        if changes is not None and sid in self.sent_vdom:
+            if not any(key[1] is None or key[1] == session_id for key in changes):
+                return
+
+        # Updates for the same client are sent in order (background listeners send updates as well)
+        with self._client_locks.setdefault(sid, threading.Lock()):
+            vdom = self.vdom.toNode(session_id=session_id)
+
+            # Swap the last VDOM of this client for the new one
+            previous = self.sent_vdom.get(sid)
+            self.sent_vdom[sid] = vdom
+
+            # Send a patch, unless it is larger than the VDOM itself
+            if previous is not None:
+                patches = diff(previous, vdom)
+                if patchSize(patches) < countNodes(vdom):
+                    if len(patches) > 0:
+                        self._emit(sid, "VDOM_PATCH", patches, patches=True)
+                    return
+
+            self._emit(sid, "VDOM_UPDATE", vdom)
+
+    def _emit(self: object, sid: str, message: str, value, patches: bool = False) -> None:
+        """ Encode and send a VDOM (or patches) to a client, and measure the
+            time it takes.
+        """
+
+        start = time.perf_counter() if metrics.enabled else None
+        self.socketio.emit(message, self._encode(sid, value, patches=patches), to=sid)
+        if start is not None:
+            EMIT.observe(message, time.perf_counter() - start)
+
+    def _encode(self: object, sid: str, value, patches: bool = False):
+        """ Encode a VDOM (or patches) in the format that the client accepts.
+        """
+
+        formats = self.client_formats.get(sid, [])
+        return encodePayload(value, formats, patches=patches, compress_threshold=self.compress_threshold)
+
+    def assetURL(self: object, path: str) -> str:
+        """ The URL of a file in the public folder, with its fingerprint (the
+            browser can cache it until the file changes), e.g. for extend_head.
+        """
+
+        return self.public_assets.assetURL(path)
+
+    def renderPage(
+        self: object, session_id: str, link_target: str, link_search: str = "", discard: bool = False
+    ) -> dict:
+        """ Render the page at a location for a session, before the browser has
+            connected. Returns the HTML, and the data (JSON) that the browser
+            needs to hydrate it. The VDOM is kept (for a while) until the
+            browser connects, so its first update can be a patch. With
+            discard, the state of the session is removed after the render
+            (e.g. for requests without a session cookie, most of them never
+            connect). Returns None for locations without a route (e.g.
+            /favicon.ico).
+        """
+
+        if self.vdom.router.match(link_target) is None:
+            return None
+
+        # Navigate like the browser does when the page loads (there is no socket to emit to yet)
+        self.vdom.router.changeRoute(
+            {"link_target": link_target, "link_search": link_search, "link_anchor": "", "session_id": session_id}
+        )
+        self.runMiddleWare(session_id=session_id)
+
+        try:
+            vdom = self.vdom.toNode(session_id=session_id)
+        finally:
+
+            # A browser that connects starts the session again (with the same page)
+            if discard:
+                self.vdom.store.evictSession(session_id)
+        render_id = self.prerendered.add(session_id, vdom)
+
+        return {
+            "html": renderHTML(vdom),
+            "data": scriptJSON({"session_id": session_id, "render_id": render_id, "vdom": vdom}),
+        }
+
+    def _hydrateClient(self: object, event: dict) -> None:
+        """ Use the VDOM that was rendered by the server as the last VDOM that
+            was sent to a client that hydrated it.
+        """
+
+        vdom = self.prerendered.pop(event.get("session_id"), event.get("render_id"))
+        if vdom is not None:
+            self.sent_vdom[event.get("sid")] = vdom
+
+    def _negotiateFormats(self: object, event: dict) -> None:
+        """ Use the compact formats that both the client and the server support.
+            The other formats (msgpack, deflate) are only used with compact.
+        """
+
+        formats = []
+        if self.compact_payloads and COMPACT in event.get("formats", []):
+            formats = [format_ for format_ in event.get("formats", []) if format_ in supportedFormats()]
+        self.client_formats[event.get("sid")] = formats
+
+    def _resetClient(self: object, event: dict) -> None:
+        """ Forget the VDOM of a client, the next update will be a full update.
+            Everything else is forgotten when the client disconnects (also the
+            rendered nodes of its session, other clients of the session only
+            render them again).
+        """
+        self.sent_vdom.pop(event.get("sid"), None)
+        if event.get("disconnected"):
+            self._client_locks.pop(event.get("sid"), None)
+            self.client_formats.pop(event.get("sid"), None)
+            if event.get("session_id") is not None:
+                self.vdom.render_cache.dropSession(event.get("session_id"))
 
     def _sendNavigationUpdate(self: object, event: dict) -> None:
         """ Helper method that sends navigation update events to the browser.
@@ -210,50 +578,99 @@ class App(object):
         """ Method that constructs the entire app (assembly).
         """
 
+        # Green threads only work with a patched standard library
+        check_async_mode(self.async_mode)
+
         # Create the Flask app and Socket
         self.app = Flask(__name__, template_folder=self.template_folder)
         self.app.config["SECRET_KEY"] = "secret!"
-        self.socketio = SocketIO(self.app, manage_session=True, async_mode="threading")
+        self.socketio = SocketIO(
+            self.app,
+            manage_session=True,
+            async_mode=self.async_mode,
+            message_queue=self.message_queue,
+            json=JSON,
+        )
 
         # Register callbacks for different event signals
         signal_state_update.connect(self._sendStateUpdate, weak=False)
         signal_navigation_event.connect(self._sendNavigationUpdate, weak=False)
         signal_clear_input_field_event.connect(self._sendClearInputField, weak=False)
         signal_default_event.connect(self._defaultSend, weak=False)
+        signal_client_reset.connect(self._resetClient, weak=False)
+        signal_client_capabilities.connect(self._negotiateFormats, weak=False)
+        signal_client_hydrated.connect(self._hydrateClient, weak=False)
 
         # Register SocketIO events
         self.socketio.on_event("connect", handle_connect)
+        self.socketio.on_event("disconnect", handle_disconnect)
+        self.socketio.on_event("REQUEST_VDOM", handle_requestVDOM)
         self.socketio.on_event("REQUEST_SESSION", handle_requestSession)
         self.socketio.on_event("RESTORE_SESSION", handle_restoreSession)
         self.socketio.on_event("DEFAULT", handle_all_json)
         self.socketio.on_event("DOM_EVENT", handle_dom_event)
+        self.socketio.on_event("DOM_EVENT_BATCH", handle_dom_event_batch)
+
+        # Static files are served from memory, the index page is rendered once
+        self.assets = AssetCache(os.path.join(os.path.dirname(__file__), "../public"), auto_reload=not self.production)
+        self.public_assets = AssetCache(self.public_folder, auto_reload=not self.production)
+        with self.app.app_context():
+            self.shell = Shell(
+                lambda page: render_template(
+                    "index.html",
+                    title=self.title,
+                    extend_head=self.extend_head,
+                    custom_javascript=self.custom_javascript,
+                    index_url=self.assets.assetURL("index.js"),
+                    page=page,
+                )
+            )
+
+        # Serve the metrics of this process (and start measuring)
+        if self.metrics_path is not None:
+            metrics.enabled = True
+            local_only = self.config.getboolean("metrics", "local_only", fallback=True)
+            self.app.add_url_rule(
+                self.metrics_path, "metrics", defaults={"local_only": local_only}, view_func=metrics_endpoint
+            )
+
+        # Profile the render of a session
+        if self.debug_path is not None:
+            local_only = self.config.getboolean("debug", "local_only", fallback=True)
+            self.app.add_url_rule(
+                f"{self.debug_path.rstrip('/')}/profile",
+                "profile",
+                defaults={"vdom": self.vdom, "local_only": local_only},
+                view_func=profile_endpoint,
+            )
 
         # Add url routes for the Flask app
-        self.app.add_url_rule(
-            "/<path:path>",
-            "catch_all",
-            defaults={
-                "app": self.app,
-                "public_folder": self.public_folder,
-                "title": self.title,
-                "extend_head": self.extend_head,
-                "custom_javascript": self.custom_javascript,
-            },
-            view_func=catch_all,
-        )
-        self.app.add_url_rule(
-            "/",
-            "catch_all",
-            defaults={
-                "path": "",
-                "app": self.app,
-                "public_folder": self.public_folder,
-                "title": self.title,
-                "extend_head": self.extend_head,
-                "custom_javascript": self.custom_javascript,
-            },
-            view_func=catch_all,
-        )
+        defaults = {
+            "shell": self.shell,
+            "assets": self.assets,
+            "public_assets": self.public_assets,
+            "render_page": self.renderPage if self.prerender else None,
+        }
+        self.app.add_url_rule("/<path:path>", "catch_all", defaults=defaults, view_func=catch_all)
+        self.app.add_url_rule("/", "catch_all", defaults={"path": "", **defaults}, view_func=catch_all)
 
         # Return the socket and app
         return self.socketio, self.app
+
+
+def _parseOption(value: str):
+    """ Helper method that converts configuration values to Python values.
+    """
+
+    if value.lower() in ["true", "yes", "on"]:
+        return True
+    if value.lower() in ["false", "no", "off"]:
+        return False
+    if value.lower() in ["none", ""]:
+        return None
+    for type_ in [int, float]:
+        try:
+            return type_(value)
+        except ValueError:
+            pass
+    return value
@@ -0,0 +1,208 @@
+import os
+import gzip
+import hashlib
+import mimetypes
+import threading
+
+from typing import Callable
+
+from flask import abort
+from flask import request
+from flask import Response
+from flask import send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# URLs with the fingerprint of an asset can be cached forever, other responses are revalidated
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Types of content that are worth compressing
+_compressible = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml")
+
+# Placeholders for the rendered page in the index page
+_PAGE_HTML = "<!--pydow-page-html-->"
+_PAGE_DATA = "/*pydow-page-data*/"
+
+
+class Asset(object):
+    """ The content of a static file, with its fingerprint (also the ETag) and
+        its compressed variants (compressed once, when the file is loaded).
+    """
+
+    __slots__ = ["content", "mimetype", "mtime", "fingerprint", "variants"]
+
+    def __init__(self: object, content: bytes, mimetype: str, mtime: float = None) -> None:
+        """ Initialization of the asset. Compressed variants are only kept if
+            they are smaller (brotli only if it is installed).
+        """
+
+        # Store the input parameters
+        self.content = content
+        self.mimetype = mimetype
+        self.mtime = mtime
+
+        self.fingerprint = hashlib.sha256(content).hexdigest()[:16]
+
+        # The content by content encoding
+        self.variants = {"identity": content}
+        if mimetype.startswith(_compressible):
+            compressed = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(content)
+            for encoding, data in compressed.items():
+                if len(data) < len(content):
+                    self.variants[encoding] = data
+
+    def response(self: object, cache_control: str = REVALIDATE) -> Response:
+        """ Respond to the current request with the best variant that the client
+            accepts, or with 304 Not Modified if the client has it already.
+        """
+
+        encoding = "identity"
+        for candidate in ["br", "gzip"]:
+            if candidate in self.variants and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+
+        # Every variant has its own ETag
+        etag = self.fingerprint if encoding == "identity" else f"{self.fingerprint}-{encoding}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(self.variants[encoding], mimetype=self.mimetype)
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = cache_control
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+class AssetCache(object):
+    """ Serves the files in a folder from memory. Files are loaded on first use
+        (and again when they change, with auto_reload). Without auto_reload,
+        a file that is loaded is served without looking at the disk again.
+        Files that are larger than max_size are sent from disk.
+    """
+
+    def __init__(self: object, folder: str, url: str = "/public", auto_reload: bool = False, max_size: int = 1048576) -> None:
+        """ Initialization of the cache, url is where the folder is served.
+        """
+
+        # Store the input parameters
+        self.folder = os.path.abspath(folder)
+        self.url = url
+        self.auto_reload = auto_reload
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._assets = {}
+
+        # The assets by the path in their URL (if it is the path of the file)
+        self._paths = {}
+
+    def get(self: object, path: str) -> Asset:
+        """ Get a file as an asset. Returns None if the file does not exist (or
+            is outside of the folder), or if it is too large to keep in memory.
+        """
+
+        # Files that do not change are not checked again
+        if not self.auto_reload:
+            asset = self._paths.get(path)
+            if asset is not None:
+                return asset
+
+        filename = safe_join(self.folder, path)
+        if filename is None or not os.path.isfile(filename):
+            return None
+
+        asset = self._assets.get(filename)
+        if asset is not None and not self.auto_reload:
+            return asset
+
+        # Load the file (again, if it changed)
+        mtime = os.path.getmtime(filename)
+        if asset is not None and asset.mtime == mtime:
+            return asset
+        if os.path.getsize(filename) > self.max_size:
+            return None
+
+        with open(filename, "rb") as file_:
+            content = file_.read()
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        asset = Asset(content, mimetype, mtime=mtime)
+
+        with self._lock:
+            self._assets[filename] = asset
+
+            # Other paths of the file (e.g. ./index.js) are checked every time, there is no end to them
+            if filename == os.path.join(self.folder, path):
+                self._paths[path] = asset
+        return asset
+
+    def assetURL(self: object, path: str) -> str:
+        """ The URL of a file, with its fingerprint so it can be cached forever.
+        """
+
+        asset = self.get(path)
+        if asset is None:
+            return f"{self.url}/{path}"
+        return f"{self.url}/{path}?v={asset.fingerprint}"
+
+    def serve(self: object, path: str) -> Response:
+        """ Respond to the current request with a file. Responses for the URL
+            with the current fingerprint can be cached forever.
+        """
+
+        asset = self.get(path)
+
+        # Large files are sent from disk (with the ETag and range support of Flask)
+        if asset is None:
+            filename = safe_join(self.folder, path)
+            if filename is None or not os.path.isfile(filename):
+                abort(404)
+            return send_file(filename, conditional=True, etag=True, max_age=0)
+
+        if request.args.get("v") == asset.fingerprint:
+            return asset.response(IMMUTABLE)
+        return asset.response(REVALIDATE)
+
+
+class Shell(object):
+    """ The index page, rendered once. Pages that are rendered by the server
+        (for a session) are inserted into it for every request.
+    """
+
+    def __init__(self: object, render: Callable) -> None:
+        """ Initialization of the shell, render is called with the page (or
+            None) and returns the HTML of the index page.
+        """
+
+        # The empty page is the same for everybody
+        self.empty = Asset(render(None).encode("utf-8"), "text/html")
+
+        # The page with placeholders (for the HTML and the data of the page)
+        before, rest = render({"html": _PAGE_HTML, "data": _PAGE_DATA}).split(_PAGE_HTML)
+        between, after = rest.split(_PAGE_DATA)
+        self.parts = [before, between, after]
+
+    def response(self: object, page: dict = None) -> Response:
+        """ Respond to the current request with the index page, with a page that
+            was rendered by the server if there is one (it is private to the
+            session, so it is never cached).
+        """
+
+        if page is None:
+            return self.empty.response(REVALIDATE)
+
+        before, between, after = self.parts
+        response = Response(before + page["html"] + between + page["data"] + after, mimetype="text/html")
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
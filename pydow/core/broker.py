@@ -0,0 +1,114 @@
+import threading
+import multiprocessing
+
+from multiprocessing.connection import Client
+from multiprocessing.connection import Listener
+
+from socketio import PubSubManager
+
+from pydow.store.shared import parseAddress
+from pydow.store.shared import retryConnection
+
+
+def serveBroker(address: str = "127.0.0.1:50001", authkey: str = None) -> None:
+    """ Run a minimal message broker (blocks). Every message that is published
+        is sent to all subscribers (including the process that published it).
+    """
+
+    if authkey is None:
+        raise Exception("The message broker needs an authkey.")
+
+    listener = Listener(parseAddress(address), authkey=authkey.encode("utf-8"))
+    subscribers = []
+    lock = threading.Lock()
+
+    def handleConnection(connection) -> None:
+        """ Register subscribers, or forward everything a publisher sends.
+        """
+
+        if connection.recv() == "SUBSCRIBE":
+            with lock:
+                subscribers.append(connection)
+            return
+
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                return
+
+            # Forward the message, forget subscribers that are gone
+            with lock:
+                for subscriber in list(subscribers):
+                    try:
+                        subscriber.send(message)
+                    except OSError:
+                        subscribers.remove(subscriber)
+
+    while True:
+        connection = listener.accept()
+        threading.Thread(target=handleConnection, args=(connection,), daemon=True).start()
+
+
+def startBroker(address: str = "127.0.0.1:50001", authkey: str = None) -> multiprocessing.Process:
+    """ Start the message broker in a separate (daemon) process.
+    """
+
+    process = multiprocessing.Process(target=serveBroker, args=(address, authkey), daemon=True)
+    process.start()
+    return process
+
+
+class QueueManager(PubSubManager):
+    """ Socket.IO client manager that shares emits between processes through
+        the pydow message broker.
+    """
+
+    name = "pydow"
+
+    def __init__(
+        self: object,
+        address: str = "127.0.0.1:50001",
+        authkey: str = None,
+        channel: str = "socketio",
+        write_only: bool = False,
+        logger: object = None,
+    ) -> None:
+        """ Initialization of the manager. Connections are made on first use.
+        """
+
+        if authkey is None:
+            raise Exception("The message broker needs an authkey.")
+
+        super(QueueManager, self).__init__(channel=channel, write_only=write_only, logger=logger)
+        self.address = address
+        self.authkey = authkey
+        self._lock = threading.Lock()
+        self._publisher = None
+
+    def _connect(self: object, role: str):
+        """ Open a connection to the broker.
+        """
+
+        connection = retryConnection(
+            lambda: Client(parseAddress(self.address), authkey=self.authkey.encode("utf-8"))
+        )
+        connection.send(role)
+        return connection
+
+    def _publish(self: object, data: dict) -> None:
+        """ Send a message to all processes.
+        """
+
+        with self._lock:
+            if self._publisher is None:
+                self._publisher = self._connect("PUBLISH")
+            self._publisher.send(data)
+
+    def _listen(self: object):
+        """ Receive the messages of all processes.
+        """
+
+        subscriber = self._connect("SUBSCRIBE")
+        while True:
+            yield subscriber.recv()
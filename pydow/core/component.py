@@ -1,29 +1,97 @@
 import os
+import time
 import uuid
+import functools
+import threading
+import contextvars
 
 # import xml.etree.ElementTree as ET
 from lxml import etree
 
 from urllib.parse import parse_qs
 
-from jinja2 import Template
 from typing import TypeVar
 from typing import Union
 from typing import Optional
 
 from xml.etree.ElementTree import ParseError
 
+from pydow.store.tracking import track_reads
+from pydow.store.tracking import record_reads
+from pydow.store.tracking import record_volatile
+
+from .helpers import VNode
+from .dispatcher import PENDING
+from .templates import template_cache
+from .metrics import metrics
+from .metrics import COMPONENT_RENDER
+from .profiler import span
+from .log import logger
+
 
 VirtualDOM_type = TypeVar("VirtualDOM")
 Component_type = TypeVar("Component")
 Router_type = TypeVar("Router")
 parser = etree.XMLParser(recover=True)
 
+# Placeholder element for child components that are embedded in a template
+SLOT_TAG = "pydow-slot"
+
+# Stack with the slots of the components that are being rendered (per thread or green thread)
+_render_context = contextvars.ContextVar("pydow_render", default=None)
+
+
+def _slot_stack() -> list:
+    """ Helper method that returns the render stack of the current context.
+    """
+    stack = _render_context.get()
+    if stack is None:
+        stack = []
+        _render_context.set(stack)
+    return stack
+
+
+@functools.lru_cache(maxsize=None)
+def _templateName(filename: str) -> str:
+    """ Short name of a template file (with its folder, e.g. select/template.html).
+    """
+    return os.path.join(os.path.basename(os.path.dirname(filename)), os.path.basename(filename))
+
+
+def _createNode(element, slots: list) -> VNode:
+    """ Convert a parsed element into a virtual DOM node, placeholders are
+        replaced with the nodes of the child components.
+    """
+
+    # Embed the child component
+    if element.tag == SLOT_TAG:
+        return slots[int(element.get("index"))]
+
+    # Check for nested elements
+    if len(element) > 0:
+        element_children = [
+            _createNode(child, slots)
+            for child in element
+            if child is not None
+        ]
+    else:
+        if element.text is not None:
+            element_children = [element.text]
+        else:
+            element_children = []
+
+    # Return the virtual DOM element (the children are new, so they are not copied)
+    return VNode(element.tag, dict(element.attrib), element_children)
+
 
 class Component(object):
     """ Base component that can be used to create custom components.
     """
 
+    # Reuse the rendered node while the state it read does not change. Components
+    # that depend on anything else (time, databases, side effects) should disable this.
+    memoize = True
+
     def __init__(
         self: object,
         parent: Union[VirtualDOM_type, Component_type] = None,
@@ -57,9 +125,10 @@ class Component(object):
             ):
                 attributes[key] = value
 
-        # If no HTML tag is provided, use the class name
+        # If no HTML tag is provided, use the class name as a custom element (e.g. pydow-button), so
+        # the wrapper is never parsed as the HTML element with the same name (e.g. button or input)
         if tag is None:
-            tag = self.__class__.__name__
+            tag = f"pydow-{self.__class__.__name__.lower()}"
 
         # Create an identifier if none is provided in arguments and attributes
         if identifier is None and "identifier" not in attributes:
@@ -67,7 +136,9 @@ class Component(object):
         elif "identifier" in attributes:
             identifier = attributes.get("identifier")
 
-        self.store = parent.store
+        # The virtual DOM this component belongs to (it owns the store)
+        self.vdom = getattr(parent, "vdom", parent)
+        self.render_cache = parent.render_cache
 
         # Store the input parameters
         self.tag = tag
@@ -81,6 +152,27 @@ class Component(object):
         self.context = parent.context
         self.no_wrap = no_wrap
 
+        # The bindings are shared by all sessions, a render of another session waits for them
+        self._render_lock = threading.RLock()
+
+    @property
+    def store(self: object):
+        """ The store of the virtual DOM (which may be replaced, e.g. by the App).
+        """
+        return self.vdom.store
+
+    @property
+    def dispatcher(self: object):
+        """ The event dispatcher of the virtual DOM.
+        """
+        return self.vdom.dispatcher
+
+    def isPending(self: object, session_id: str) -> bool:
+        """ Method that checks if a background listener for an event of this
+            component is running (if it was marked as pending).
+        """
+        return self.store.getState(PENDING, False, session_id=session_id, identifier=self.identifier)
+
     def getURLSearchParameters(self: object, session_id: str) -> dict:
         """ Method that retrieves and parses URL search parameters.
         """
@@ -97,52 +189,87 @@ class Component(object):
         else:
             return(parse_qs(search_parameters.strip("?")))
 
-    def render(self: object, *args: list, **kwargs: dict) -> str:
-        """ Render the component into valid HTML
+    def getRouteParameters(self: object, session_id: str) -> dict:
+        """ Method that retrieves the (typed) path parameters of the current
+            route, e.g. {"user_id": 1} for /users/1 and /users/<int:user_id>.
         """
 
-        if "session_id" not in kwargs:
-            kwargs["session_id"] = None
-
-        # Make sure everything is up-to-date before rendering
-        self.update(*args, **kwargs)
-
-        # Construct the absolute path to the template file
-        filename = os.path.abspath(
-            os.path.join(os.path.dirname(self.template_location), self.template_file)
-        )
-
-        # Open the template file and put the content into a Jinja template
-        with open(filename) as file_:
-            template_content = file_.read()
-            template = Template(f"{template_content}")
+        if self.router is None:
+            return {}
+        return self.router.getRouteParameters(session_id)
 
-        # Use the regular render method to render the component into HTML
-        try:
-            rendered = template.render(self.bindings, *args, **kwargs)
-        except Exception as e:
-            print(e)
-            print("Bindings:", self.bindings)
-            print("Template:", template_content)
-            raise
+    def _renderTemplate(self: object, *args: list, **kwargs: dict) -> str:
+        """ Update the component and render its template into a string.
+        """
 
-        # Parse the new HTML
-        root = etree.fromstring(rendered, parser=parser)
+        # The bindings are changed by update, keep them until the template is rendered
+        with self._render_lock:
+
+            # Make sure everything is up-to-date before rendering
+            with span(f"{self.__class__.__name__}.update", "update"):
+                self.update(*args, **kwargs)
+
+            # Construct the absolute path to the template file
+            filename = os.path.abspath(
+                os.path.join(os.path.dirname(self.template_location), self.template_file)
+            )
+
+            # Get the compiled template from the (process wide) template cache, checked for changes if the App wants it
+            template = template_cache.getTemplate(filename, auto_reload=getattr(self.vdom, "template_auto_reload", None))
+
+            # Use the regular render method to render the component into HTML
+            try:
+                with span(_templateName(filename), "template", component=self.__class__.__name__):
+                    return template.render(self.bindings, *args, **kwargs)
+            except Exception:
+                logger.error(
+                    "Unable to render a template",
+                    extra={"fields": {"component": self.__class__.__name__, "template": template.filename}},
+                )
+                logger.debug("Bindings of the template", extra={"fields": {"bindings": self.bindings}})
+                raise
+
+    def _rootAttributes(self: object, attributes: dict) -> dict:
+        """ Combine the attributes of the root element of the template with the
+            identifier and attributes of the component.
+        """
 
         # Add the object identifier to the element
-        root.set("identifier", self.identifier)
-
-        # Get the current attributes of the element (from the template)
-        attributes = dict(root.attrib)
+        attributes = dict(attributes)
+        attributes["identifier"] = self.identifier
 
         # Loop over the attributes and add the other attributes to the root component
         for key, value in self.attributes.items():
 
             # Make sure we're not overwriting existing attributes
             if key in attributes:
-                root.set(key, value + " " + attributes.get(key))
+                attributes[key] = value + " " + attributes.get(key)
             else:
-                root.set(key, value)
+                attributes[key] = value
+
+        return attributes
+
+    def render(self: object, *args: list, **kwargs: dict) -> str:
+        """ Render the component into valid HTML
+        """
+
+        if "session_id" not in kwargs:
+            kwargs["session_id"] = None
+
+        # Child components called from the template should render HTML as well
+        _slot_stack().append(None)
+        try:
+            rendered = self._renderTemplate(*args, **kwargs)
+        finally:
+            _slot_stack().pop()
+
+        # Parse the new HTML
+        with span("parse", "lxml"):
+            root = etree.fromstring(rendered, parser=parser)
+
+        # Set the attributes of the component on the root element
+        for key, value in self._rootAttributes(root.attrib).items():
+            root.set(key, value)
 
         # Return the new HTML as string
         if self.no_wrap:
@@ -150,6 +277,76 @@ class Component(object):
         else:
             return f"<{self.tag}>" + etree.tostring(root).decode("utf-8") + f"</{self.tag}>"
 
+    def renderNode(self: object, *args: list, **kwargs: dict) -> VNode:
+        """ Render the component into a virtual DOM node. Child components that
+            are called from the template are rendered into nodes directly and
+            are embedded without serializing them to HTML. The node is reused
+            while the state that was read while rendering it does not change
+            (unless memoize is disabled).
+        """
+
+        if "session_id" not in kwargs:
+            kwargs["session_id"] = None
+        session_id = kwargs["session_id"]
+
+        # The component is a span in the trace of the render (if it is profiled)
+        with span(self.__class__.__name__, "component", identifier=self.identifier) as current:
+
+            # Only renders that depend on nothing but the session can be reused
+            reusable = self.memoize and len(args) == 0 and len(kwargs) == 1
+
+            # Reuse the node, the state it depends on is a dependency of the parent as well
+            if reusable:
+                cached = self.render_cache.get(session_id, self.identifier, self.store)
+                if cached is not None:
+                    node, dependencies = cached
+                    record_reads(dependencies)
+                    if current is not None:
+                        current.args["reused"] = True
+                    return node
+
+            # Render the node and keep track of the state it reads (and measure the time it takes)
+            start = time.perf_counter() if metrics.enabled else None
+            with track_reads() as dependencies:
+                node = self._renderNode(*args, **kwargs)
+            if start is not None:
+                COMPONENT_RENDER.observe(self.__class__.__name__, time.perf_counter() - start)
+
+            if reusable:
+                self.render_cache.set(session_id, self.identifier, node, dependencies)
+
+            # Parents that contain this node can not be reused either
+            elif not self.memoize:
+                record_volatile()
+            return node
+
+    def _renderNode(self: object, *args: list, **kwargs: dict) -> VNode:
+        """ Render the component into a virtual DOM node (without the cache).
+        """
+
+        # Collect the nodes of child components that are called from the template
+        slots = []
+        _slot_stack().append(slots)
+        try:
+            rendered = self._renderTemplate(*args, **kwargs)
+        finally:
+            _slot_stack().pop()
+
+        # Parse the HTML of this template only (children are placeholders)
+        with span("parse", "lxml"):
+            root = etree.fromstring(rendered, parser=parser)
+        with span("nodes", "lxml"):
+            node = _createNode(root, slots)
+
+        # Set the attributes of the component on the root node (copy, the root may be a child node)
+        node = VNode(node.type, self._rootAttributes(node.props), node.children)
+
+        # Return the new node (the wrapper has the identifier as key, so lists of components can be matched)
+        if self.no_wrap:
+            return node
+        else:
+            return VNode(self.tag, {"key": self.identifier}, [node])
+
     def update(self: object, session_id=None, *args: list, **kwargs: dict) -> None:
         """ Default update method does nothing. Components may
             over write this method.
@@ -157,7 +354,15 @@ class Component(object):
         pass
 
     def __call__(self: object, *args: list, **kwargs: dict):
-        return self.render(*args, **kwargs)
+
+        # Outside of renderNode, render the component into HTML
+        slots = _slot_stack()[-1] if _slot_stack() else None
+        if slots is None:
+            return self.render(*args, **kwargs)
+
+        # Render the component into a node and leave a placeholder in the parent template
+        slots.append(self.renderNode(*args, **kwargs))
+        return f'<{SLOT_TAG} index="{len(slots) - 1}"/>'
 
     def __str__(self: object):
-        return self.render()
+        return self()
@@ -0,0 +1,44 @@
+import importlib
+
+
+# Async modes that run every connection in a green thread instead of an OS thread
+GREEN_MODES = ["eventlet", "gevent", "gevent_uwsgi"]
+
+
+def monkey_patch(async_mode: str) -> None:
+    """ Patch the standard library for a green thread async mode. This has to
+        happen before anything else is imported, e.g. at the top of the app:
+
+            from pydow.core.concurrency import monkey_patch
+            monkey_patch("gevent")
+    """
+
+    if async_mode == "eventlet":
+        importlib.import_module("eventlet").monkey_patch()
+    elif async_mode in ["gevent", "gevent_uwsgi"]:
+        importlib.import_module("gevent.monkey").patch_all()
+
+
+def is_monkey_patched(async_mode: str) -> bool:
+    """ Check if the standard library is patched for an async mode (always
+        true for modes that use OS threads).
+    """
+
+    if async_mode == "eventlet":
+        return importlib.import_module("eventlet.patcher").is_monkey_patched("thread")
+    elif async_mode in ["gevent", "gevent_uwsgi"]:
+        return importlib.import_module("gevent.monkey").is_module_patched("threading")
+    return True
+
+
+def check_async_mode(async_mode: str) -> None:
+    """ Make sure that the app can run in an async mode. Green threads share
+        a single OS thread, so without monkey patching the locks, sleeps and
+        sockets in the stores (and in the handlers) block every connection.
+    """
+
+    if async_mode in GREEN_MODES and not is_monkey_patched(async_mode):
+        raise Exception(
+            f"Async mode {async_mode} needs a monkey patched standard library, call "
+            f"pydow.core.concurrency.monkey_patch(\"{async_mode}\") before importing anything else."
+        )
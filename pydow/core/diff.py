@@ -0,0 +1,157 @@
+from .helpers import VNode
+
+
+def countNodes(node) -> int:
+    """ Count the number of nodes (elements and text) in a virtual DOM tree.
+    """
+
+    # Text nodes
+    if not isinstance(node, VNode):
+        return 1
+
+    return 1 + sum(countNodes(child) for child in node.children)
+
+
+def patchSize(patches: list) -> int:
+    """ Estimate the size of a patch list in nodes (comparable to countNodes).
+    """
+
+    return sum(1 + countNodes(patch["node"]) if "node" in patch else 1 for patch in patches)
+
+
+def getKey(node):
+    """ Get the key of a node (the key or identifier property), children with
+        a key are matched by key instead of by position. Returns None for
+        nodes without a key.
+    """
+
+    # Text nodes
+    if not isinstance(node, VNode):
+        return None
+
+    return node.props.get("key", node.props.get("identifier"))
+
+
+def diff(old, new) -> list:
+    """ Compare two virtual DOM trees and return the list of patches that
+        turns the old tree into the new one. Paths are lists of child indices
+        starting at the root node and patches should be applied in order.
+    """
+
+    patches = []
+    _diffNode(old, new, [], patches)
+    return patches
+
+
+def _diffNode(old, new, path: list, patches: list) -> None:
+    """ Compare two nodes at the same position in the tree.
+    """
+
+    # Nodes that are reused (not re-rendered) are the same object
+    if old is new:
+        return
+
+    # Text nodes
+    if not isinstance(old, VNode) or not isinstance(new, VNode):
+        if not isinstance(old, VNode) and not isinstance(new, VNode):
+            if old != new:
+                patches.append({"op": "text", "path": path, "text": new})
+        else:
+            patches.append({"op": "replace", "path": path, "node": new})
+        return
+
+    # Replace the node if it changed type (or is forced to update)
+    if old.type != new.type or new.props.get("forceUpdate"):
+        patches.append({"op": "replace", "path": path, "node": new})
+        return
+
+    # Compare the properties
+    _diffProps(old.props, new.props, path, patches)
+
+    # Compare the children
+    _diffChildren(old.children, new.children, path, patches)
+
+
+def _diffChildren(old_children: list, new_children: list, path: list, patches: list) -> None:
+    """ Compare the children of two nodes. Children with a key are matched by
+        key (and moved if needed), other children by position.
+    """
+
+    # Compare children without keys by position
+    if all(getKey(child) is None for child in old_children) and all(getKey(child) is None for child in new_children):
+
+        # Compare the children that exist in both trees
+        common = min(len(old_children), len(new_children))
+        for index in range(common):
+            _diffNode(old_children[index], new_children[index], path + [index], patches)
+
+        # Add new children
+        for index in range(common, len(new_children)):
+            patches.append({"op": "insert", "path": path + [index], "node": new_children[index]})
+
+        # Remove old children (from the back, so the indices stay valid)
+        for index in reversed(range(common, len(old_children))):
+            patches.append({"op": "remove", "path": path + [index]})
+        return
+
+    matches = _matchChildren(old_children, new_children)
+
+    # Remove the old children that are not reused (from the back, so the indices stay valid)
+    reused = set(match for match in matches if match is not None)
+    for index in reversed(range(len(old_children))):
+        if index not in reused:
+            patches.append({"op": "remove", "path": path + [index]})
+
+    # The old children (by index) in their current order, new children are None
+    current = [index for index in range(len(old_children)) if index in reused]
+
+    # Insert or move the children into place (and compare the ones that are reused)
+    for index, (child, match) in enumerate(zip(new_children, matches)):
+        if match is None:
+            patches.append({"op": "insert", "path": path + [index], "node": child})
+            current.insert(index, None)
+            continue
+
+        position = current.index(match, index)
+        if position != index:
+            patches.append({"op": "move", "path": path + [position], "to": index})
+            current.insert(index, current.pop(position))
+        _diffNode(old_children[match], child, path + [index], patches)
+
+
+def _matchChildren(old_children: list, new_children: list) -> list:
+    """ Find the old child (index) that each new child can reuse: the child
+        with the same key, or the next child without a key. None if there is
+        no such child.
+    """
+
+    keyed = {}
+    unkeyed = []
+    for index, child in enumerate(old_children):
+        key = getKey(child)
+        if key is None:
+            unkeyed.append(index)
+        else:
+            keyed.setdefault(key, index)
+
+    matches = []
+    unkeyed.reverse()
+    for child in new_children:
+        key = getKey(child)
+        if key is None:
+            matches.append(unkeyed.pop() if len(unkeyed) > 0 else None)
+        else:
+            matches.append(keyed.pop(key, None))
+    return matches
+
+
+def _diffProps(old_props: dict, new_props: dict, path: list, patches: list) -> None:
+    """ Compare the properties of two nodes.
+    """
+
+    if old_props == new_props:
+        return
+
+    changed = {key: value for key, value in new_props.items() if old_props.get(key) != value}
+    removed = [key for key in old_props if key not in new_props]
+    patches.append({"op": "props", "path": path, "set": changed, "remove": removed})
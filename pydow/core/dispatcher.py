@@ -0,0 +1,237 @@
+import types
+import weakref
+import threading
+
+from typing import Callable
+from concurrent.futures import Executor
+from concurrent.futures import ThreadPoolExecutor
+
+from pydow.signals import signal_state_update
+from pydow.core.log import logger
+
+
+# Types of events that are sent by the browser
+ON_CLICK = "ON_CLICK"
+ON_CHANGE = "ON_CHANGE"
+ON_FORM_SUBMIT = "ON_FORM_SUBMIT"
+
+# State (per session and identifier) that is True while a background listener runs
+PENDING = "PENDING"
+
+
+def background(listener: Callable = None, pending: bool = False) -> Callable:
+    """ Decorator that marks a listener to run in the background (on the
+        executor of the dispatcher) instead of on the socket of the client.
+        The client gets an update when the listener is done. With pending,
+        the PENDING state of the target is True while the listener runs (and
+        the client gets an update right away), e.g.:
+
+            @background(pending=True)
+            def onClick(self, event):
+                ...
+    """
+
+    def decorate(listener: Callable) -> Callable:
+        listener.background = {"pending": pending}
+        return listener
+
+    # Used without arguments (@background)
+    if listener is not None:
+        return decorate(listener)
+    return decorate
+
+
+class Dispatcher(object):
+    """ Registry of the event listeners of a virtual DOM, by event type and the
+        identifier of the component the event is for. Listeners are dropped
+        together with the component (or object) that registered them.
+    """
+
+    def __init__(self: object, vdom: object = None, max_workers: int = 4) -> None:
+        """ Initialization of the dispatcher. Background listeners run on a
+            pool of max_workers threads, unless another executor is set.
+        """
+
+        # Store the input parameters
+        self.vdom = vdom
+        self.max_workers = max_workers
+
+        self._executor = None
+
+        # Reentrant, references can be removed by the garbage collector at any time
+        self._lock = threading.RLock()
+
+        # References to the listeners by (event type, identifier)
+        self._listeners = {}
+
+    def addEventListener(
+        self: object, event_type: str, listener: Callable, identifier: str = None, owner: object = None
+    ) -> None:
+        """ Call the listener (with the event) for every event of the type for
+            the identifier. Listeners are kept until they are removed, or
+            until the owner is garbage collected (if there is one). Methods
+            are referenced weakly if there is an owner, their object (e.g. a
+            parent component) usually keeps the owner alive.
+        """
+
+        key = (event_type, identifier)
+
+        # Keep a weak reference to methods that have an owner, so their object can be collected
+        if owner is not None and isinstance(listener, types.MethodType):
+            owner_reference = weakref.ref(owner)
+            reference = weakref.WeakMethod(listener, lambda reference: self._removeMethod(key, reference, owner_reference))
+        else:
+            reference = _StrongReference(listener)
+
+        with self._lock:
+            self._listeners.setdefault(key, []).append(reference)
+
+        # Drop the listener together with the component that registered it
+        if owner is not None:
+            weakref.finalize(owner, self._remove, key, reference)
+
+    def removeEventListener(self: object, event_type: str, listener: Callable, identifier: str = None) -> None:
+        """ Stop calling the listener for events of the type for the identifier.
+        """
+
+        key = (event_type, identifier)
+        with self._lock:
+            references = [reference for reference in self._listeners.get(key, []) if reference() != listener]
+            if len(references) == 0:
+                self._listeners.pop(key, None)
+            else:
+                self._listeners[key] = references
+
+    def removeEventListeners(self: object, identifier: str) -> None:
+        """ Remove all listeners for an identifier (e.g. of a dropped component).
+        """
+
+        with self._lock:
+            for key in [key for key in self._listeners if key[1] == identifier]:
+                del self._listeners[key]
+
+    def dispatch(self: object, event: dict) -> int:
+        """ Call the listeners for the type and target of an event, returns the
+            number of listeners that were called.
+        """
+
+        with self._lock:
+            references = list(self._listeners.get((event.get("type"), event.get("target")), []))
+
+        called = 0
+        for reference in references:
+            listener = reference()
+            if listener is None:
+                continue
+            if getattr(listener, "background", None) is not None:
+                self._dispatchBackground(listener, event)
+            else:
+                listener(event)
+            called += 1
+        return called
+
+    @property
+    def executor(self: object) -> Executor:
+        """ The executor that runs the background listeners (a thread pool by
+            default, created on first use).
+        """
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pydow")
+            return self._executor
+
+    def setExecutor(self: object, executor: Executor) -> None:
+        """ Run background listeners on another executor, e.g. a process pool
+            (listeners and events are pickled, so the listeners should be plain
+            functions, and the state should be in a store that is shared
+            between processes).
+        """
+
+        self._executor = executor
+
+    def _dispatchBackground(self: object, listener: Callable, event: dict) -> None:
+        """ Run a listener on the executor and update the client when it is done.
+        """
+
+        pending = listener.background["pending"]
+        if pending:
+            self._setPending(event, True)
+
+        future = self.executor.submit(listener, event)
+        future.add_done_callback(lambda future: self._finishBackground(future, event, pending))
+
+    def _finishBackground(self: object, future: object, event: dict, pending: bool) -> None:
+        """ Send an update to the client that sent the event of a background
+            listener (the state it changed is not known, so it is a full check).
+        """
+
+        if future.exception() is not None:
+            exception = future.exception()
+            logger.error(
+                "A background listener failed",
+                exc_info=(type(exception), exception, exception.__traceback__),
+                extra={"fields": {"event": event.get("type"), "target": event.get("target")}},
+            )
+
+        if pending:
+            self._setPending(event, False)
+
+        signal_state_update.send({"session_id": event.get("session_id"), "sid": event.get("sid")})
+
+    def _setPending(self: object, event: dict, value: bool) -> None:
+        """ Mark the target of an event as (no longer) waiting for a background listener.
+        """
+
+        if self.vdom is not None:
+            self.vdom.store.setState(PENDING, value, session_id=event.get("session_id"), identifier=event.get("target"))
+
+    def _remove(self: object, key: tuple, reference: object) -> None:
+        """ Remove a single reference to a listener.
+        """
+
+        with self._lock:
+            references = self._listeners.get(key, [])
+            if reference in references:
+                references.remove(reference)
+            if len(references) == 0:
+                self._listeners.pop(key, None)
+
+    def _removeMethod(self: object, key: tuple, reference: object, owner_reference: weakref.ref) -> None:
+        """ Remove the reference to a method whose object was garbage collected.
+            Events for it are lost if that happened before the owner is gone.
+        """
+
+        self._remove(key, reference)
+        if owner_reference() is not None:
+            logger.warning(
+                "An event listener was garbage collected before its owner",
+                extra={"fields": {"event": key[0], "target": key[1]}},
+            )
+
+    def stats(self: object) -> dict:
+        """ Method that reports the number of live listeners and the number of
+            (event type, identifier) combinations they listen to.
+        """
+
+        with self._lock:
+            return {
+                "listeners": sum(len(references) for references in self._listeners.values()),
+                "targets": len(self._listeners),
+            }
+
+    def __len__(self: object) -> int:
+        return self.stats()["listeners"]
+
+
+class _StrongReference(object):
+    """ Reference to a listener that is kept alive (same interface as weakref).
+    """
+
+    __slots__ = ["listener"]
+
+    def __init__(self: object, listener: Callable) -> None:
+        self.listener = listener
+
+    def __call__(self: object) -> Callable:
+        return self.listener
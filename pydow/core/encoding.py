@@ -0,0 +1,111 @@
+import json
+import zlib
+
+from .helpers import VNode
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# Formats the server can encode payloads in (msgpack only if it is installed)
+COMPACT = "compact"
+MSGPACK = "msgpack"
+DEFLATE = "deflate"
+
+# Codes of the patch operations in the compact format
+_operations = ["insert", "remove", "replace", "props", "text", "move"]
+
+
+def supportedFormats() -> list:
+    """ The formats that this server can encode payloads in.
+    """
+
+    formats = [COMPACT, DEFLATE]
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    return formats
+
+
+def compactNode(node, names: dict):
+    """ Turn a virtual DOM node into its compact form: text stays a string
+        and elements become [type, [name, value, ...], *children] lists. Tag
+        and property names are replaced by their index in names.
+    """
+
+    # Text nodes
+    if not isinstance(node, VNode):
+        return node
+
+    type_ = _intern(node.type, names)
+    props = []
+    for name, value in node.props.items():
+        props.append(_intern(name, names))
+        props.append(value)
+
+    return [type_, props, *[compactNode(child, names) for child in node.children]]
+
+
+def compactPatches(patches: list, names: dict) -> list:
+    """ Turn a list of patches into their compact form: [operation, path, ...]
+        lists with the operation as a code.
+    """
+
+    compact = []
+    for patch in patches:
+        operation = patch["op"]
+        item = [_operations.index(operation), patch["path"]]
+        if "node" in patch:
+            item.append(compactNode(patch["node"], names))
+        elif operation == "props":
+            item.append(patch["set"])
+            item.append(patch["remove"])
+        elif operation == "text":
+            item.append(patch["text"])
+        elif operation == "move":
+            item.append(patch["to"])
+        compact.append(item)
+    return compact
+
+
+def encodePayload(value, formats: list, patches: bool = False, compress_threshold: int = None):
+    """ Encode a VDOM (or a list of patches) in the formats that the client
+        accepts. Returns the VDOM as it is (patches as {"patches": [...]}) if
+        the client does not accept the compact format, the other formats need
+        it, or an {"encoding": [...], "data": ...} envelope. The data is
+        deflated if it is at least compress_threshold bytes.
+    """
+
+    if COMPACT not in formats:
+        return {"patches": value} if patches else value
+
+    # Names are sent once per payload
+    names = {}
+    body = compactPatches(value, names) if patches else compactNode(value, names)
+    data = [list(names), body]
+    encoding = [COMPACT]
+
+    # Binary encoding (Socket.IO sends bytes as a binary attachment)
+    if MSGPACK in formats and msgpack is not None:
+        data = msgpack.packb(data)
+        encoding.append(MSGPACK)
+
+    # Compress large payloads
+    if compress_threshold is not None and DEFLATE in formats:
+        raw = data if isinstance(data, bytes) else json.dumps(data, separators=(",", ":")).encode("utf-8")
+        if len(raw) >= compress_threshold:
+            data = zlib.compress(raw)
+            encoding.append(DEFLATE)
+
+    return {"encoding": encoding, "data": data}
+
+
+def _intern(name: str, names: dict) -> int:
+    """ Get the index of a name in the table of names (adds it if needed).
+    """
+
+    index = names.get(name)
+    if index is None:
+        index = names[name] = len(names)
+    return index
@@ -0,0 +1,170 @@
+import os
+import sys
+import time
+import types
+import threading
+import importlib
+import importlib.util
+
+from typing import Callable
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+
+class StartupProfile(object):
+    """ Timings of the startup of an App: the steps of the App itself and the
+        import and initialization of every plugin and middleware.
+    """
+
+    def __init__(self: object) -> None:
+        """ Initialization of the profile.
+        """
+
+        self._lock = threading.Lock()
+
+        # Seconds by name and stage (import or init), in the order they were measured
+        self.timings = {}
+
+    @contextmanager
+    def measure(self: object, name: str, stage: str = "init"):
+        """ Measure the time of a step (added to earlier timings of the same step).
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, stage, time.perf_counter() - start)
+
+    def record(self: object, name: str, stage: str, seconds: float) -> None:
+        with self._lock:
+            stages = self.timings.setdefault(name, {})
+            stages[stage] = stages.get(stage, 0) + seconds
+
+    def report(self: object) -> str:
+        """ The timings as a table (in milliseconds).
+        """
+
+        with self._lock:
+            timings = dict(self.timings)
+
+        width = max([len(name) for name in timings] + [len("Startup")])
+        lines = [f"{'Startup':<{width}}  {'import':>9}  {'init':>9}  {'total':>9}"]
+        for name, stages in timings.items():
+            values = [stages.get("import"), stages.get("init"), sum(stages.values())]
+            columns = ["-" if value is None else f"{value * 1000:.1f} ms" for value in values]
+            lines.append(f"{name:<{width}}  {columns[0]:>9}  {columns[1]:>9}  {columns[2]:>9}")
+        return "\n".join(lines)
+
+
+class Extensions(Mapping):
+    """ Plugins (or middleware) by name. The entries are every Python file
+        in the folder and every [kind:name] section in the configuration
+        (sections configure the file with that name, enabled = false skips
+        it). Entries are loaded from the folder (or from the module option,
+        e.g. module = package.plugin) when the App starts, or when they are
+        first used if they are lazy (lazy = true).
+    """
+
+    def __init__(
+        self: object, kind: str, folder: str, config: object, create: Callable, profile: StartupProfile = None
+    ) -> None:
+        """ Initialization of the extensions, create is called with the module
+            and the configuration section (or None) and returns the extension.
+        """
+
+        # Store the input parameters
+        self.kind = kind
+        self.folder = folder
+        self.config = config
+        self.create = create
+        self.profile = profile if profile is not None else StartupProfile()
+
+        self._lock = threading.RLock()
+        self._loaded = {}
+
+        # The configuration section of every entry (None for files without a section)
+        self._entries = {}
+        if os.path.isdir(folder):
+            for filename in sorted(os.listdir(folder)):
+                name, ext = os.path.splitext(filename)
+                if ext == ".py" and os.path.isfile(os.path.join(folder, filename)):
+                    self._entries[name] = None
+        for section in [section for section in config.sections() if section.startswith(f"{kind}:")]:
+            name = section.split(":", 1)[1]
+            if config[section].getboolean("enabled", fallback=True):
+                self._entries[name] = config[section]
+            else:
+                self._entries.pop(name, None)
+
+    def loadAll(self: object, lazy: bool = False) -> None:
+        """ Load the entries that are not lazy (or all entries).
+        """
+
+        for name, section in self._entries.items():
+            if lazy or section is None or not section.getboolean("lazy", fallback=False):
+                self[name]
+
+    def _import(self: object, name: str, section: object):
+        """ Import the module of an entry, as pydow_<kind>.<name> (e.g.
+            pydow_plugins.reports), so a file can not replace another module
+            (e.g. json.py). The folder is on sys.path while the module is
+            imported, so it can import the modules next to it (e.g. import
+            helpers).
+        """
+
+        if section is not None and section.get("module") is not None:
+            return importlib.import_module(section.get("module"))
+
+        # The package of the modules of this kind (empty, the modules are loaded from their files)
+        package = f"pydow_{self.kind}"
+        if package not in sys.modules:
+            sys.modules[package] = types.ModuleType(package)
+            sys.modules[package].__path__ = []
+
+        module_name = f"{package}.{name}"
+        filename = os.path.join(self.folder, f"{name}.py")
+        spec = importlib.util.spec_from_file_location(module_name, filename)
+        if spec is None or not os.path.isfile(filename):
+            raise Exception(f"The {self.kind} {name} is not in {self.folder} (and has no module option).")
+        module = importlib.util.module_from_spec(spec)
+
+        folder = os.path.abspath(self.folder)
+        sys.path.insert(0, folder)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            sys.modules.pop(module_name, None)
+            raise
+        finally:
+            sys.path.remove(folder)
+        return module
+
+    def __getitem__(self: object, name: str) -> object:
+        extension = self._loaded.get(name)
+        if extension is not None:
+            return extension
+
+        section = self._entries[name]
+        with self._lock:
+            if name not in self._loaded:
+                with self.profile.measure(f"{self.kind}:{name}", "import"):
+                    module = self._import(name, section)
+                with self.profile.measure(f"{self.kind}:{name}", "init"):
+                    self._loaded[name] = self.create(module, section)
+            return self._loaded[name]
+
+    def __contains__(self: object, name: str) -> bool:
+        return name in self._entries
+
+    def __iter__(self: object):
+        return iter(self._entries)
+
+    def __len__(self: object) -> int:
+        return len(self._entries)
+
+    def loaded(self: object) -> list:
+        """ The names of the entries that are loaded.
+        """
+        return list(self._loaded)
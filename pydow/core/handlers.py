@@ -1,13 +1,35 @@
+import time
 import uuid
+import logging
 
 from flask import session
+from flask import request
 from flask_socketio import emit
 
-from blinker import signal
+from pydow.core.dispatcher import ON_CLICK
+from pydow.core.dispatcher import ON_CHANGE
+from pydow.core.dispatcher import ON_FORM_SUBMIT
+from pydow.core.metrics import metrics
+from pydow.core.metrics import EVENT_DISPATCH
+from pydow.core.log import events_logger
+from pydow.signals import signal_dom_event
 from pydow.signals import signal_navigation_event
 from pydow.signals import signal_state_update
 from pydow.signals import signal_default_event
 from pydow.signals import signal_clear_input_field_event
+from pydow.signals import signal_client_reset
+from pydow.signals import signal_client_capabilities
+from pydow.signals import signal_client_hydrated
+from pydow.store.tracking import track_writes
+
+
+# Types of the events (in the browser) that are sent to the listeners of the target component
+_event_types = {
+    "MouseEvent click": ON_CLICK,
+    "Event input": ON_CHANGE,
+    "Event change": ON_CHANGE,
+    "Event submit": ON_FORM_SUBMIT,
+}
 
 
 def handle_connect() -> None:
@@ -17,45 +39,110 @@ def handle_connect() -> None:
     session["session_id"] = str(uuid.uuid4())
 
 
+def handle_disconnect(*args: list) -> None:
+    """ Forget everything that was sent to the client.
+    """
+
+    signal_client_reset.send({"sid": request.sid, "session_id": session.get("session_id"), "disconnected": True})
+
+
+def handle_requestVDOM(event):
+    """ Send the full VDOM to a client that lost track of its state.
+    """
+
+    signal_client_reset.send({"sid": request.sid})
+    signal_state_update.send({"session_id": session["session_id"], "sid": request.sid})
+
+
 def handle_requestSession(event):
+    signal_client_capabilities.send({"sid": request.sid, "formats": event.get("formats", [])})
     emit("STORE_SESSION", {"session_id": session["session_id"]})
 
 
 def handle_restoreSession(event):
+    signal_client_capabilities.send({"sid": request.sid, "formats": event.get("formats", [])})
     if "session_id" in event:
         session["session_id"] = event.get("session_id")
 
+    # The client shows the page that was rendered by the server (before it connected)
+    if "render_id" in event:
+        signal_client_hydrated.send(
+            {"sid": request.sid, "session_id": session["session_id"], "render_id": event.get("render_id")}
+        )
+
 
 def handle_all_json(json):
     json["session_id"] = session["session_id"]
-    print(json)
+    if events_logger.isEnabledFor(logging.DEBUG):
+        events_logger.debug("Received an event", extra={"fields": {"event": json}})
     signal_default_event.send(json)
 
 
 def handle_dom_event(json: dict) -> None:
 
-    if "DOMEventCategory" in json:
+    # Keep track of the state that is changed by handling the event
+    with track_writes() as changes:
+        dispatch_dom_event(json)
 
-        if json.get("DOMEventCategory", None) == "MouseEvent click":
+    # Update the DOM after the event has been handled (skipped if nothing changed)
+    signal_state_update.send({"session_id": session["session_id"], "sid": request.sid, "changes": changes})
 
-            target_identifier = json.get("target", "")
-            if target_identifier is not "":
-                signal(f"ON_CLICK_{target_identifier}").send({"session_id": session["session_id"]})
 
-        elif (
-            json.get("DOMEventCategory", None) == "Event input"
-            or json.get("DOMEventCategory", None) == "Event change"
-        ):
-            target_identifier = json.get("target", "")
-            if target_identifier is not "":
-                signal(f"ON_CHANGE_{target_identifier}").send({"value": json.get("value", ""), "session_id": session["session_id"]})
+def handle_dom_event_batch(json: dict) -> None:
+    """ Handle events that were queued by the browser (e.g. debounced input)
+        with a single update of the DOM.
+    """
 
-        elif json.get("DOMEventCategory", None) == "Event submit":
-            target_identifier = json.get("target", "")
-            if target_identifier is not "":
-                signal(f"ON_FORM_SUBMIT_{target_identifier}").send({"session_id": session["session_id"]})
+    with track_writes() as changes:
+        for event in json.get("events", []):
+            dispatch_dom_event(event)
 
-        elif json.get("DOMEventCategory", None) == "UIEvent load":
+    signal_state_update.send({"session_id": session["session_id"], "sid": request.sid, "changes": changes})
+
+
+def dispatch_dom_event(json: dict) -> None:
+    """ Send the signals that belong to an event in the browser (and measure
+        the time the listeners take, by the category of the event).
+    """
+
+    start = time.perf_counter() if metrics.enabled else None
+    try:
+        _dispatch_dom_event(json)
+    finally:
+        if start is not None:
+            EVENT_DISPATCH.observe(_event_label(json.get("DOMEventCategory")), time.perf_counter() - start)
+
+
+def _event_label(category: str) -> str:
+    """ The category of an event as label (categories are sent by the client,
+        any other category is unhandled).
+    """
+
+    if category in _event_types or category == "UIEvent load":
+        return category
+    return "unhandled"
+
+
+def _dispatch_dom_event(json: dict) -> None:
+    if "DOMEventCategory" in json:
+
+        category = json.get("DOMEventCategory", None)
+
+        # Events for a component go to its listeners (through the dispatcher of the virtual DOM)
+        if category in _event_types:
+            target_identifier = json.get("target", "")
+            if target_identifier != "":
+                signal_dom_event.send(
+                    {
+                        "type": _event_types[category],
+                        "target": target_identifier,
+                        "value": json.get("value", ""),
+                        "session_id": session["session_id"],
+                        "sid": request.sid,
+                    }
+                )
+
+        elif category == "UIEvent load":
             signal_navigation_event.send(
                 {
                     "link_target": json.get("link_target", "/"),
@@ -66,10 +153,11 @@ def handle_dom_event(json: dict) -> None:
             )
 
         else:
-            print(f"Recieved an unhandled event: {json}")
+            _log_unhandled(json)
     else:
-        print(f"Recieved an unhandled event: {json}")
+        _log_unhandled(json)
+
 
-    # Update the DOM after the event has been handled
-    # TODO: Reduce the number of refresh (only when the vdom actually changed)
-    signal_state_update.send({"session_id": session["session_id"]})
+def _log_unhandled(json: dict) -> None:
+    if events_logger.isEnabledFor(logging.INFO):
+        events_logger.info("Received an unhandled event", extra={"fields": {"event": json}})
@@ -1,9 +1,129 @@
-def h(element_type: str, element_props: dict, *element_children: list) -> dict:
+import json
+import html
+
+
+class VNode(object):
+    """ Element in the virtual DOM (text nodes are plain strings). Nodes have
+        slots instead of a dict per node, which keeps large trees small and
+        cheap to build. They can still be read like the dicts they replace
+        (node["children"]) and toDict returns the plain dict version.
+    """
+
+    __slots__ = ["type", "props", "children"]
+
+    def __init__(self: object, type: str, props: dict, children: list) -> None:
+        self.type = type
+        self.props = props
+        self.children = children
+
+    def toDict(self: object) -> dict:
+        """ Helper method that returns the node (and its children) as a dict.
+        """
+
+        return {
+            "type": self.type,
+            "props": self.props,
+            "children": [child.toDict() if isinstance(child, VNode) else child for child in self.children],
+        }
+
+    def __getitem__(self: object, key: str):
+        if key in VNode.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __eq__(self: object, other) -> bool:
+        if isinstance(other, VNode):
+            return self.type == other.type and self.props == other.props and self.children == other.children
+        if isinstance(other, dict):
+            return self.toDict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __getstate__(self: object) -> tuple:
+        return (self.type, self.props, self.children)
+
+    def __setstate__(self: object, state: tuple) -> None:
+        self.type, self.props, self.children = state
+
+    def __repr__(self: object) -> str:
+        return f"VNode({self.type!r}, {self.props!r}, {self.children!r})"
+
+
+def h(element_type: str, element_props: dict, *element_children: list) -> VNode:
     """ Method to create an element in the virtual DOM (representation of a DOM object).
     """
 
-    return {
-        "type": element_type,
-        "props": element_props,
-        "children": [child for child in element_children if child is not None],
-    }
+    return VNode(element_type, element_props, [child for child in element_children if child is not None])
+
+
+# Elements that have no closing tag in HTML
+_void_elements = frozenset(
+    ["area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"]
+)
+
+
+def _isCustomProp(name: str) -> bool:
+    """ Properties that are not set on the DOM element (same as in index.js).
+    """
+    return name.startswith("on") or name == "forceUpdate" or name == "key"
+
+
+def renderHTML(node) -> str:
+    """ Serialize a virtual DOM node into the HTML that the browser would build
+        from it (without any whitespace between the elements), e.g. to send a
+        pre-rendered page that the browser can hydrate.
+    """
+
+    # Text nodes
+    if not isinstance(node, VNode):
+        return html.escape(str(node), quote=False)
+
+    # Boolean properties are set as "true" by the browser
+    attributes = "".join(
+        f' {name}="{"true" if value is True else html.escape(str(value))}"'
+        for name, value in node.props.items()
+        if not _isCustomProp(name) and value is not False and value is not None
+    )
+    if node.type in _void_elements:
+        return f"<{node.type}{attributes}>"
+    return f"<{node.type}{attributes}>" + "".join(renderHTML(child) for child in node.children) + f"</{node.type}>"
+
+
+def nodeToJSON(node: VNode) -> dict:
+    """ Helper method for json.dumps (default) that serializes nodes without
+        converting the whole tree to dicts first.
+    """
+
+    if isinstance(node, VNode):
+        return {"type": node.type, "props": node.props, "children": node.children}
+    raise TypeError(f"Object of type {type(node).__name__} is not JSON serializable")
+
+
+def scriptJSON(value) -> str:
+    """ Serialize a value (e.g. a node) into JSON that can be embedded in a
+        <script> element.
+    """
+
+    return (
+        JSON.dumps(value, separators=(",", ":"))
+        .replace("<", "\\u003c")
+        .replace(">", "\\u003e")
+        .replace("&", "\\u0026")
+        .replace("'", "\\u0027")
+    )
+
+
+class JSON(object):
+    """ The json module with support for virtual DOM nodes, used by Socket.IO
+        to encode the packets.
+    """
+
+    @staticmethod
+    def dumps(value, *args: list, **kwargs: dict) -> str:
+        kwargs.setdefault("default", nodeToJSON)
+        return json.dumps(value, *args, **kwargs)
+
+    @staticmethod
+    def loads(value, *args: list, **kwargs: dict):
+        return json.loads(value, *args, **kwargs)
@@ -0,0 +1,184 @@
+import os
+import sys
+import copy
+import atexit
+import json
+import queue
+import random
+import logging
+import logging.handlers
+
+
+# Messages about pydow itself (startup, errors)
+logger = logging.getLogger("pydow")
+
+# Messages for every event (sampled), nothing is formatted unless the level is enabled:
+#   if events_logger.isEnabledFor(logging.DEBUG):
+#       events_logger.debug("Received an event", extra={"fields": {"event": event}})
+events_logger = logging.getLogger("pydow.events")
+
+# Attributes of every log record (anything else was passed as a field)
+_record_attributes = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "fields"}
+
+# The listener that writes the queued records (restarted in forked processes)
+_listener = None
+
+
+class SamplingFilter(logging.Filter):
+    """ Keep a fraction of the records below a level (warnings and errors are
+        always kept).
+    """
+
+    def __init__(self: object, rate: float, level: int = logging.WARNING) -> None:
+        super(SamplingFilter, self).__init__()
+        self.rate = rate
+        self.level = level
+
+    def filter(self: object, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.level or random.random() < self.rate
+
+
+class StructuredFormatter(logging.Formatter):
+    """ Formats records as a line of text with key=value fields, or as a JSON
+        object per line. Fields are passed as extra={"fields": {...}}.
+    """
+
+    def __init__(self: object, format: str = "text") -> None:
+        super(StructuredFormatter, self).__init__()
+        self.format_ = format
+
+    def format(self: object, record: logging.LogRecord) -> str:
+        timestamp = self.formatTime(record, "%Y-%m-%dT%H:%M:%S")
+        message = record.getMessage()
+        exception = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+
+        if self.format_ == "json":
+            entry = {"time": timestamp, "level": record.levelname, "logger": record.name, "message": message}
+            entry.update(_fields(record))
+            if exception is not None:
+                entry["exception"] = exception
+            return json.dumps(entry, default=str)
+
+        line = f"{timestamp} {record.levelname:<7} {record.name} {message}"
+        for key, value in _fields(record).items():
+            line += f" {key}={_logValue(value)}"
+        if exception is not None:
+            line += "\n" + exception
+        return line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """ Queues records for the listener thread. The message, the traceback
+        and the fields refer to objects that may change before the record is
+        written, so they are turned into text (and plain JSON values) here.
+        The lines are formatted in the listener thread.
+    """
+
+    def prepare(self: object, record: logging.LogRecord) -> logging.LogRecord:
+        fields = _fields(record)
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        # A snapshot of the fields (extra attributes are moved into the fields)
+        for key in [key for key in record.__dict__ if key not in _record_attributes]:
+            delattr(record, key)
+        record.fields = json.loads(json.dumps(fields, default=str)) if len(fields) > 0 else None
+        return record
+
+
+def configureLogging(
+    level: str = "INFO",
+    sample_rate: float = 1.0,
+    format: str = "text",
+    filename: str = None,
+    propagate: bool = False,
+) -> None:
+    """ Log the messages of pydow at a level (e.g. WARNING in production, then
+        nothing is logged per event) to stderr or a file, as text or JSON
+        lines. Records are queued and written by a background thread, so the
+        handlers never wait for the output. Only sample_rate (0 to 1) of the
+        messages per event below WARNING are kept. With propagate, nothing is
+        written by pydow and the records go to the handlers of the root logger.
+    """
+
+    stopLogging()
+
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = propagate
+    _removeQueueHandlers()
+
+    # Sample the messages per event
+    for filter_ in [filter_ for filter_ in events_logger.filters if isinstance(filter_, SamplingFilter)]:
+        events_logger.removeFilter(filter_)
+    if sample_rate < 1:
+        events_logger.addFilter(SamplingFilter(sample_rate))
+
+    if propagate:
+        return
+
+    handler = logging.FileHandler(filename) if filename is not None else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(StructuredFormatter(format))
+    _startListener(handler)
+
+
+def stopLogging() -> None:
+    """ Write the queued records and stop the listener thread.
+    """
+
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _startListener(handler: logging.Handler) -> None:
+    global _listener
+    records = queue.SimpleQueue()
+    logger.addHandler(_QueueHandler(records))
+    _listener = logging.handlers.QueueListener(records, handler)
+    _listener.start()
+
+
+def _restartInChild() -> None:
+    """ A forked process (e.g. a worker) has no listener thread, start its own.
+    """
+
+    global _listener
+    if _listener is not None:
+        handler = _listener.handlers[0]
+        _listener = None
+        _removeQueueHandlers()
+        _startListener(handler)
+
+
+def _removeQueueHandlers() -> None:
+    for handler in [handler for handler in logger.handlers if isinstance(handler, _QueueHandler)]:
+        logger.removeHandler(handler)
+
+
+def _fields(record: logging.LogRecord) -> dict:
+    """ The fields of a record (extra={"fields": {...}}, and any other extra
+        attributes).
+    """
+
+    fields = dict(getattr(record, "fields", None) or {})
+    fields.update({key: value for key, value in record.__dict__.items() if key not in _record_attributes})
+    return fields
+
+
+def _logValue(value) -> str:
+    """ A field value for the text format (quoted if it has spaces).
+    """
+
+    text = value if isinstance(value, str) else json.dumps(value, default=str, separators=(",", ":"))
+    return json.dumps(text) if " " in text or text == "" else text
+
+
+# Write the queued records before the process stops
+atexit.register(stopLogging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restartInChild)
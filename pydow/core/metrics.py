@@ -0,0 +1,132 @@
+import bisect
+import threading
+
+
+# Upper bounds of the buckets of the histograms (seconds)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Content type of the Prometheus text format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram(object):
+    """ Histogram of durations with one label (e.g. the component class), a
+        set of buckets, a sum and a count per value of the label.
+    """
+
+    def __init__(self: object, name: str, description: str, label: str, buckets: tuple = BUCKETS) -> None:
+        """ Initialization of the histogram.
+        """
+
+        # Store the input parameters
+        self.name = name
+        self.description = description
+        self.label = label
+        self.buckets = buckets
+
+        self._lock = threading.Lock()
+
+        # Per value of the label: [counts per bucket (and +Inf), sum]
+        self._values = {}
+
+    def observe(self: object, value: str, seconds: float) -> None:
+        """ Add a duration for a value of the label.
+        """
+
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            observations = self._values.get(value)
+            if observations is None:
+                observations = self._values[value] = [[0] * (len(self.buckets) + 1), 0.0]
+            observations[0][index] += 1
+            observations[1] += seconds
+
+    def clear(self: object) -> None:
+        with self._lock:
+            self._values = {}
+
+    def render(self: object) -> list:
+        """ The histogram in the Prometheus text format (as lines).
+        """
+
+        with self._lock:
+            values = {value: (list(counts), total) for value, (counts, total) in self._values.items()}
+
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for value, (counts, total) in sorted(values.items()):
+            label = f'{self.label}="{_escape(value)}"'
+
+            # Buckets are cumulative
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+
+class Metrics(object):
+    """ Process wide registry of histograms. Measuring is disabled until an
+        App enables it, code on the hot path checks enabled before it reads
+        the clock:
+
+            start = time.perf_counter() if metrics.enabled else None
+            ...
+            if start is not None:
+                COMPONENT_RENDER.observe(name, time.perf_counter() - start)
+    """
+
+    def __init__(self: object) -> None:
+        """ Initialization of the registry.
+        """
+
+        self.enabled = False
+        self.histograms = {}
+
+    def histogram(self: object, name: str, description: str, label: str, buckets: tuple = BUCKETS) -> Histogram:
+        """ Get (or create) a histogram by name.
+        """
+
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(name, description, label, buckets)
+        return self.histograms[name]
+
+    def clear(self: object) -> None:
+        """ Forget everything that was measured.
+        """
+
+        for histogram in self.histograms.values():
+            histogram.clear()
+
+    def render(self: object) -> str:
+        """ All histograms in the Prometheus text format.
+        """
+
+        lines = []
+        for histogram in self.histograms.values():
+            lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """ Escape the value of a label (backslashes, quotes and newlines).
+    """
+
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# The registry of this process
+metrics = Metrics()
+
+# The histograms of the hot paths
+EVENT_DISPATCH = metrics.histogram(
+    "pydow_event_dispatch_seconds", "Time to dispatch an event from the browser to its listeners.", "event"
+)
+COMPONENT_RENDER = metrics.histogram(
+    "pydow_component_render_seconds",
+    "Time to render a component into a node, including its child components (not for reused nodes).",
+    "component",
+)
+VDOM_RENDER = metrics.histogram("pydow_vdom_render_seconds", "Time to render the virtual DOM of a session.", "route")
+EMIT = metrics.histogram("pydow_emit_seconds", "Time to send an update to a client.", "message")
@@ -0,0 +1,64 @@
+import time
+import uuid
+import threading
+
+from typing import Optional
+from collections import OrderedDict
+
+
+class PrerenderCache(object):
+    """ The pages that were rendered by the server (their VDOM) until the
+        browser hydrates them, by render ID. Most requests without a browser
+        (crawlers, health checks) never hydrate, so the cache keeps at most
+        max_entries pages for at most ttl seconds, in the memory of this
+        process (outside the store of the sessions).
+    """
+
+    def __init__(self: object, max_entries: int = 1000, ttl: float = 60) -> None:
+        """ Initialization of the cache.
+        """
+
+        # Store the input parameters
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+
+        # (session_id, vdom, expires) by render ID (oldest first)
+        self._entries = OrderedDict()
+
+    def add(self: object, session_id: str, vdom: dict) -> str:
+        """ Keep the VDOM of a page that was rendered for a session, returns
+            its render ID.
+        """
+
+        render_id = uuid.uuid4().hex
+        now = time.monotonic()
+
+        with self._lock:
+            self._entries[render_id] = (session_id, vdom, now + self.ttl)
+
+            # Drop the expired pages and make room (the oldest pages go first)
+            while len(self._entries) > 0:
+                _, _, expires = next(iter(self._entries.values()))
+                if expires > now and len(self._entries) <= self.max_entries:
+                    break
+                self._entries.popitem(last=False)
+        return render_id
+
+    def pop(self: object, session_id: str, render_id: str) -> Optional[dict]:
+        """ Take the VDOM of a page that a browser hydrated, or None if it is
+            gone (or was rendered for another session).
+        """
+
+        with self._lock:
+            entry = self._entries.get(render_id)
+            if entry is None or entry[0] != session_id:
+                return None
+            del self._entries[render_id]
+
+        _, vdom, expires = entry
+        return vdom if expires > time.monotonic() else None
+
+    def __len__(self: object) -> int:
+        return len(self._entries)
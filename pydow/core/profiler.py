@@ -0,0 +1,150 @@
+import os
+import time
+import functools
+import threading
+import contextvars
+
+from typing import Callable
+from contextlib import nullcontext
+from contextlib import contextmanager
+
+
+# The trace that is being recorded (in this thread or green thread), if any
+_current_trace = contextvars.ContextVar("pydow_trace", default=None)
+
+# Returned by span when nothing is recorded (reusable, so nothing is created)
+_no_span = nullcontext()
+
+
+class Span(object):
+    """ A step of a render (e.g. a component, its update method or its
+        template), with the steps it took as children.
+    """
+
+    __slots__ = ["name", "category", "args", "start", "end", "children"]
+
+    def __init__(self: object, name: str, category: str, args: dict) -> None:
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+
+    @property
+    def duration(self: object) -> float:
+        """ The time the step took (seconds), including its children.
+        """
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    @property
+    def self_time(self: object) -> float:
+        """ The time the step took (seconds), without its children.
+        """
+        return self.duration - sum(child.duration for child in self.children)
+
+
+class Trace(object):
+    """ The spans of a single render, as a tree. Spans are recorded while the
+        trace is the current trace (see record).
+    """
+
+    def __init__(self: object, name: str = "render", **args: dict) -> None:
+        """ Initialization of the trace, the root span starts right away.
+        """
+
+        self.root = Span(name, "render", args)
+        self._stack = [self.root]
+
+    @contextmanager
+    def span(self: object, name: str, category: str, args: dict):
+        """ Record a span (as a child of the span that is open).
+        """
+
+        span = Span(name, category, args)
+        self._stack[-1].children.append(span)
+        self._stack.append(span)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter()
+            self._stack.pop()
+
+    def finish(self: object) -> None:
+        self.root.end = time.perf_counter()
+
+    def spans(self: object) -> list:
+        """ All spans, depth first.
+        """
+
+        spans = []
+        pending = [self.root]
+        while len(pending) > 0:
+            span = pending.pop()
+            spans.append(span)
+            pending.extend(reversed(span.children))
+        return spans
+
+    def toChromeTrace(self: object) -> dict:
+        """ The trace in the Chrome trace event format (complete events, in
+            microseconds), for chrome://tracing, Perfetto or speedscope.
+        """
+
+        pid = os.getpid()
+        tid = threading.get_ident()
+        events = []
+        for span in self.spans():
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round((span.start - self.root.start) * 1000000, 3),
+                    "dur": round(span.duration * 1000000, 3),
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {key: str(value) for key, value in span.args.items()},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+@contextmanager
+def record(trace: Trace):
+    """ Record the spans of everything that runs in this context into a trace.
+    """
+
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+
+
+def span(name: str, category: str = "function", **args: dict):
+    """ A span in the current trace (does nothing if there is no trace):
+
+            with span("Table.update", "update"):
+                ...
+    """
+
+    trace = _current_trace.get()
+    if trace is None:
+        return _no_span
+    return trace.span(name, category, args)
+
+
+def traced(function: Callable, name: str = None, category: str = "function") -> Callable:
+    """ Wrap a function (e.g. one that templates call) so its calls are
+        spans in the current trace.
+    """
+
+    name = name if name is not None else function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with span(name, category):
+            return function(*args, **kwargs)
+
+    return wrapper
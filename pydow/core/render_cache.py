@@ -0,0 +1,123 @@
+import threading
+
+from typing import Optional
+
+from pydow.signals import signal_state_changed
+from pydow.signals import signal_session_evicted
+from pydow.store.tracking import VOLATILE
+
+
+class RenderCache(object):
+    """ Cache of the rendered nodes of components per session, together with
+        the state (keys and values) they read. Entries are dropped as soon as
+        any of that state is written, and are only reused if all values are
+        still the same in the store (which may be changed by other processes).
+    """
+
+    def __init__(self: object) -> None:
+        """ Initialization of the cache.
+        """
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        # Nodes and dependencies by session and component identifier
+        self._entries = {}
+
+        # Entries that depend on a key in the store
+        self._dependents = {}
+
+        # Drop entries when the state changes or the session is gone
+        signal_state_changed.connect(self.invalidate)
+        signal_session_evicted.connect(self.dropSession)
+
+    def get(self: object, session_id: str, identifier: str, store: object) -> Optional[tuple]:
+        """ Get the (node, dependencies) of a component if the state it read
+            has not changed, or None.
+        """
+
+        cached = self._entries.get(session_id, {}).get(identifier)
+
+        # Compare the values that were read with the current values (in one call to the store)
+        if cached is not None:
+            keys = list(cached[1])
+            for key, current in zip(keys, store.peekStates(keys)):
+                value = cached[1][key]
+                if current is not value and current != value:
+                    cached = None
+                    break
+
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return cached
+
+    def set(self: object, session_id: str, identifier: str, node: dict, dependencies: dict) -> None:
+        """ Store the rendered node of a component and the state it read.
+        """
+
+        # Renders that depend on volatile components can not be reused
+        if VOLATILE in dependencies:
+            return
+
+        with self._lock:
+            self._remove(session_id, identifier)
+            self._entries.setdefault(session_id, {})[identifier] = (node, dependencies)
+            for key in dependencies:
+                self._dependents.setdefault(key, set()).add((session_id, identifier))
+
+    def invalidate(self: object, key: tuple) -> None:
+        """ Drop all entries that depend on a key in the store.
+        """
+
+        with self._lock:
+            for session_id, identifier in self._dependents.pop(key, ()):
+                self._remove(session_id, identifier)
+
+    def dropSession(self: object, session_id: str) -> None:
+        """ Drop all entries of a session.
+        """
+
+        with self._lock:
+            for identifier in list(self._entries.get(session_id, {})):
+                self._remove(session_id, identifier)
+
+    def clear(self: object) -> None:
+        """ Drop all entries.
+        """
+
+        with self._lock:
+            self._entries = {}
+            self._dependents = {}
+
+    def _remove(self: object, session_id: str, identifier: str) -> None:
+        """ Remove an entry (the lock must be held).
+        """
+
+        entries = self._entries.get(session_id)
+        if entries is None or identifier not in entries:
+            return
+
+        # Remove the entry and its references
+        _, dependencies = entries.pop(identifier)
+        for key in dependencies:
+            dependents = self._dependents.get(key)
+            if dependents is not None:
+                dependents.discard((session_id, identifier))
+                if len(dependents) == 0:
+                    del self._dependents[key]
+
+        if len(entries) == 0:
+            del self._entries[session_id]
+
+    def stats(self: object) -> dict:
+        """ Method that returns the cache statistics.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def __len__(self: object) -> int:
+        return sum(len(entries) for entries in self._entries.values())
@@ -1,31 +1,87 @@
-import os
+import json
+import time
+import uuid
 
-from flask import render_template
-from flask import send_from_directory
+from flask import abort
+from flask import request
+from flask import Response
 
+from .metrics import metrics
+from .metrics import CONTENT_TYPE
+from .log import logger
 
-def catch_all(path: str, app, public_folder, title, extend_head, custom_javascript, *args, **kwargs) -> str:
+
+# Cookie with the session of the browser (set by index.js), pages are rendered for this session
+SESSION_COOKIE = "pydow_session"
+
+# Addresses of clients on the same machine
+LOCAL_ADDRESSES = ["127.0.0.1", "::1"]
+
+
+def catch_all(path: str, shell, assets, public_assets, render_page=None, *args, **kwargs):
     """ Catch all routes and redirect them to the index page
         where the Router takes over the rest of the navigation.
+        The page is rendered for the session of the browser if
+        there is a render_page method (the browser hydrates it).
     """
-    with app.test_request_context():
-        if path == "public/index.js":
-            return send_from_directory(
-                os.path.abspath(
-                    os.path.join(os.path.dirname(__file__), "../public")
-                ),
-                "index.js",
-            )
 
-        # Serve from the users public path
-        if path.startswith("public/"):
-            return send_from_directory(
-                os.path.abspath(public_folder), path[7:]
+    if path == "public/index.js":
+        return assets.serve("index.js")
+
+    # Serve from the users public path
+    if path.startswith("public/"):
+        return public_assets.serve(path[7:])
+
+    # Render the page, the browser renders it after connecting if that fails
+    page = None
+    if render_page is not None:
+        session_id = request.cookies.get(SESSION_COOKIE)
+        search = request.query_string.decode("utf-8")
+        try:
+            page = render_page(
+                session_id or str(uuid.uuid4()),
+                f"/{path}",
+                f"?{search}" if search != "" else "",
+                discard=session_id is None,
             )
+        except Exception:
+            logger.exception("Unable to render the page", extra={"fields": {"path": f"/{path}"}})
+
+    return shell.response(page)
+
+
+def metrics_endpoint(local_only: bool = True):
+    """ The metrics of this process in the Prometheus text format (only for
+        clients on the same machine, unless local_only is disabled).
+    """
+
+    _check_local(local_only)
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+
+def profile_endpoint(vdom, local_only: bool = True):
+    """ Render the page of a session with the profiler, and download the
+        trace (Chrome trace JSON). The session is the session_id parameter,
+        or the session of the browser. All components are rendered, unless
+        cached=true (then nodes are reused like in a regular update).
+    """
+
+    _check_local(local_only)
+    session_id = request.args.get("session_id") or request.cookies.get(SESSION_COOKIE)
+    if session_id is None:
+        abort(400, "No session to profile (pass a session_id).")
+
+    cached = request.args.get("cached", "false").lower() in ["true", "yes", "1"]
+    trace = vdom.profile(session_id, cached=cached)
+
+    response = Response(json.dumps(trace.toChromeTrace()), content_type="application/json")
+    response.headers["Content-Disposition"] = f'attachment; filename="pydow-profile-{time.strftime("%Y%m%d-%H%M%S")}.json"'
+    return response
+
+
+def _check_local(local_only: bool) -> None:
+    """ Pretend that debug routes do not exist for clients on other machines.
+    """
 
-        return render_template(
-            "index.html",
-            title=title,
-            extend_head=extend_head,
-            custom_javascript=custom_javascript,
-        )
+    if local_only and request.remote_addr not in LOCAL_ADDRESSES:
+        abort(404)
@@ -0,0 +1,114 @@
+import os
+import threading
+
+from jinja2 import BaseLoader
+from jinja2 import Environment
+from jinja2 import TemplateNotFound
+
+
+class TemplatePathLoader(BaseLoader):
+    """ Jinja loader that uses the resolved (absolute) path of a template file
+        as the name of the template.
+    """
+
+    def __init__(self: object, cache: object) -> None:
+        """ Initialization of the loader.
+        """
+
+        # Keep a reference to the cache to count (re)loads
+        self.cache = cache
+
+    def get_source(self: object, environment: Environment, template: str) -> tuple:
+        """ Method that reads a template file from disk. Jinja only calls this
+            method if the compiled template is not in its cache (or outdated).
+        """
+
+        # Every load is a cache miss
+        self.cache.recordMiss()
+
+        # Read the template and remember when it was last modified
+        try:
+            mtime = os.path.getmtime(template)
+            with open(template) as file_:
+                source = file_.read()
+        except OSError:
+            raise TemplateNotFound(template)
+
+        def uptodate() -> bool:
+            """ Only used when auto reloading is enabled (development).
+            """
+            try:
+                return os.path.getmtime(template) == mtime
+            except OSError:
+                return False
+
+        return source, template, uptodate
+
+
+class TemplateCache(object):
+    """ Process wide cache of compiled Jinja templates. Templates are reloaded
+        when the file changes (development), or never (production). This is
+        decided per lookup (e.g. by the App of the component), auto_reload is
+        the default.
+    """
+
+    def __init__(self: object, auto_reload: bool = True) -> None:
+        """ Initialization of the template cache.
+        """
+
+        self.auto_reload = auto_reload
+
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.misses = 0
+
+        # A single shared environment that compiles the templates, they are cached here (by path)
+        self.environment = Environment(loader=TemplatePathLoader(cache=self), cache_size=0)
+        self._templates = {}
+
+    def recordMiss(self: object) -> None:
+        """ Helper method that counts a (re)compilation of a template.
+        """
+        with self._lock:
+            self.misses += 1
+
+    def getTemplate(self: object, filename: str, auto_reload: bool = None):
+        """ Get the compiled template for a template file. With auto_reload
+            (or the default of the cache if it is None), the template is
+            compiled again if the file has changed.
+        """
+
+        path = os.path.abspath(filename)
+        auto_reload = self.auto_reload if auto_reload is None else auto_reload
+
+        # The number of templates is bounded by the code
+        template = self._templates.get(path)
+        if template is None or (auto_reload and not template.is_up_to_date):
+            template = self._templates[path] = self.environment.get_template(path)
+
+        # Count every lookup, anything that was not a miss was served from the cache
+        with self._lock:
+            self.lookups += 1
+        return template
+
+    def stats(self: object) -> dict:
+        """ Method that returns the cache statistics.
+        """
+        with self._lock:
+            return {
+                "hits": self.lookups - self.misses,
+                "misses": self.misses,
+                "size": len(self._templates),
+            }
+
+    def clear(self: object) -> None:
+        """ Remove all compiled templates and reset the statistics.
+        """
+        with self._lock:
+            self._templates = {}
+            self.lookups = 0
+            self.misses = 0
+
+
+# The cache that is shared by all components in this process
+template_cache = TemplateCache()
@@ -1,17 +1,23 @@
-# import xml.etree.ElementTree as ET
-from lxml import etree
+import time
 
 from pydow.store.filestore import Store
+from pydow.store.tracking import MISSING
 from pydow.router.router import Router
-from pydow.core.helpers import h
+from pydow.core.render_cache import RenderCache
+from pydow.core.dispatcher import Dispatcher
+from pydow.core.helpers import VNode
+from pydow.core.metrics import metrics
+from pydow.core.metrics import VDOM_RENDER
+from pydow.core.profiler import Trace
+from pydow.core.profiler import record
+from pydow.signals import signal_dom_event
 
 from typing import TypeVar
 from typing import Generic
-from typing import Callable
+from typing import Optional
 
 
 Component_type = TypeVar("Component")
-parser = etree.XMLParser(recover=True)
 
 
 class VirtualDOM(object):
@@ -19,20 +25,30 @@ class VirtualDOM(object):
     """
 
     def __init__(
-        self: object, root_class: Generic[Component_type], routes: dict, context: dict = {}
+        self: object,
+        root_class: Generic[Component_type],
+        routes: dict,
+        context: dict = {},
+        store: Optional[Store] = None,
     ) -> None:
-        """ Initialization of the virtual DOM
+        """ Initialization of the virtual DOM. Uses an in-memory store (without
+            eviction) if no store is provided.
         """
 
         # Store the input parameters
-        self.store = Store()
+        self.store = store if store is not None else Store()
         self.context = context
+        self.render_cache = RenderCache()
 
-        # Create the router
-        self.router = Router(
-            parent=self,
-            routes={key: value(parent=self) for key, value in routes.items()},
-        )
+        # Check the templates for changes (None for the default of the process wide template cache)
+        self.template_auto_reload = None
+
+        # Send the events from the browser to the listeners of the components
+        self.dispatcher = Dispatcher(vdom=self)
+        signal_dom_event.connect(self.dispatcher.dispatch)
+
+        # Create the router (it creates the components of the routes when they are visited)
+        self.router = Router(parent=self, routes=routes)
 
         # Create the root object
         self.root_class = root_class(parent=self, router=self.router)
@@ -40,53 +56,69 @@ class VirtualDOM(object):
         # Use the refresh method to build the HTML and actual VDOM
         # self.refresh()
 
-    def toDict(self: object, session_id: str) -> dict:
-        """ Helper method that returns the full virtual DOM as a dict.
+    def setStore(self: object, store: object) -> None:
+        """ Replace the store, e.g. with the store that is configured for the App.
         """
 
-        # Refresh the VDOM
-        self.refresh(session_id=session_id)
+        self.store = store
+
+        # Rendered nodes belong to the state in the old store
+        self.render_cache.clear()
+
+    def toNode(self: object, session_id: str) -> VNode:
+        """ Helper method that returns the full virtual DOM as a tree of nodes.
+        """
 
-        # The VDOM is a dict, so return it
-        return self.vdom
+        return self.refresh(session_id=session_id)
 
-    def refresh(self: object, session_id: str) -> None:
-        """ Refresh the virtual DOM.
+    def toDict(self: object, session_id: str) -> dict:
+        """ Helper method that returns the full virtual DOM as a dict.
         """
 
-        self.vdom = self._createVDOM(session_id=session_id)
+        return self.toNode(session_id=session_id).toDict()
 
-    def _createVDOM(self: object, session_id: str) -> dict:
-        """ Parse the HTML into a VDOM.
+    def refresh(self: object, session_id: str, trace: Trace = None) -> VNode:
+        """ Render the virtual DOM of a session and return it (nothing is kept
+            here, sessions are rendered at the same time by other threads).
+            With a trace, the components, templates and parsing of the render
+            are recorded as spans (see profile).
         """
 
-        def _createVDOMElement(element) -> Callable:
+        start = time.perf_counter() if metrics.enabled else None
+        if trace is not None:
+            with record(trace):
+                vdom = self._createVDOM(session_id=session_id)
+        else:
+            vdom = self._createVDOM(session_id=session_id)
+        if start is not None:
+            VDOM_RENDER.observe(self.currentRoute(session_id) or "", time.perf_counter() - start)
+        return vdom
+
+    def profile(self: object, session_id: str, cached: bool = False) -> Trace:
+        """ Render the virtual DOM of a session and return the trace of the
+            render. All components are rendered, unless cached is set (then
+            reused nodes stay reused, like in a regular update).
+        """
 
-            # Extract information from the elements
-            element_type = element.tag
-            element_props = dict(element.attrib)
+        if not cached:
+            self.render_cache.dropSession(session_id)
 
-            # Check for nested elements
-            if len(element) > 0:
-                element_children = [
-                    _createVDOMElement(element=child)
-                    for child in element
-                    if child is not None
-                ]
-            else:
-                if element.text is not None:
-                    element_children = [element.text]
-                else:
-                    element_children = []
+        trace = Trace("refresh", session_id=session_id, route=self.currentRoute(session_id))
+        self.refresh(session_id=session_id, trace=trace)
+        return trace
 
-            # Return the virtual DOM element
-            return h(element_type, element_props, *element_children)
+    def currentRoute(self: object, session_id: str) -> str:
+        """ The route (e.g. /users/<int:user_id>) that a session is on, or
+            None if there is no route for its location.
+        """
 
-        # Start by converting the root object into HTML
-        html = self.root_class.render(session_id=session_id)
+        current_route = self.store.peekState("ROUTER_CURRENT_ROUTE", session_id=session_id)
+        match = self.router.match("/" if current_route is MISSING else current_route["link_target"])
+        return None if match is None else match[0]
 
-        # Parse the HTML to an element tree
-        root = etree.fromstring(html, parser=parser)
+    def _createVDOM(self: object, session_id: str) -> VNode:
+        """ Render the root component into a VDOM. Components render into
+            nodes directly, so the tree is walked only once.
+        """
 
-        # Use the helper method to run through the tree and create virtual DOM elements
-        return _createVDOMElement(root)
+        return self.root_class.renderNode(session_id=session_id)
@@ -5,8 +5,11 @@ class BaseMiddleWare(object):
         self.app = app
         self.vdom = vdom
         self.config = config
-        self.store = vdom.store
         self.dispatcher = vdom.dispatcher
 
+    @property
+    def store(self):
+        return self.vdom.store
+
     def run(self, *args, **kwargs):
         pass
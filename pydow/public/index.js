@@ -6,6 +6,13 @@ if (typeof(Storage) !== "undefined") {
 
 // Set constants
 const DEBUG = false
+
+// Cookie that tells the server which session to render the page for
+const SESSION_COOKIE = "pydow_session"
+
+// Compact payload formats this client can decode (deflate needs the compression streams API)
+const PAYLOAD_FORMATS = ["compact", "msgpack"].concat(typeof DecompressionStream !== "undefined" ? ["deflate"] : [])
+const PATCH_OPERATIONS = ["insert", "remove", "replace", "props", "text", "move"]
 const DOM_EVENTS = {
     UIEvent: [
         "load",
@@ -111,7 +118,7 @@ function isCustomProp(name) {
     /*  Method that checks if a property is a custom property.
     */
 
-    return isEventProp(name) || name === 'forceUpdate'
+    return isEventProp(name) || name === 'forceUpdate' || name === 'key'
 }
 
 function removeProp($target, name, value) {
@@ -201,20 +208,393 @@ function updateElement($parent, newNode, oldNode, childNode = $parent.childNodes
         // Update the properties of the node
         updateProps(childNode, newNode.props, oldNode.props)
 
+        // Update the children of the node
+        updateChildren(childNode, newNode.children, oldNode.children)
+    }
+    return 0
+}
+
+function getKey(node) {
+    /*  Get the key of a node (the key or identifier property), children with
+        a key are matched by key instead of by position.
+    */
+
+    if (typeof node === 'string' || !node.props) {
+        return null
+    }
+    const key = node.props.key !== undefined ? node.props.key : node.props.identifier
+    return key === undefined ? null : key
+}
+
+function matchChildren(oldChildren, newChildren) {
+    /*  Find the old child (index) that each new child can reuse: the child
+        with the same key, or the next child without a key (or null).
+    */
+
+    const keyed = new Map()
+    const unkeyed = []
+    oldChildren.forEach((child, index) => {
+        const key = getKey(child)
+        if (key === null) {
+            unkeyed.push(index)
+        } else if (!keyed.has(key)) {
+            keyed.set(key, index)
+        }
+    })
+
+    return newChildren.map(child => {
+        const key = getKey(child)
+        if (key === null) {
+            return unkeyed.length > 0 ? unkeyed.shift() : null
+        } else if (keyed.has(key)) {
+            const index = keyed.get(key)
+            keyed.delete(key)
+            return index
+        }
+        return null
+    })
+}
+
+function updateChildren($parent, newChildren, oldChildren) {
+    /*  Update the children of an element. Children with a key are matched by
+        key and moved, so only the changes cost DOM operations.
+    */
+
+    // Without keys, compare the children by position
+    if (newChildren.every(child => getKey(child) === null) && oldChildren.every(child => getKey(child) === null)) {
+
         // Keep track of any adjustments (for removing elements)
         let adjustment = 0;
-        for (let i = 0; i < Math.max(newNode.children.length, oldNode.children.length); i++) {
+        for (let i = 0; i < Math.max(newChildren.length, oldChildren.length); i++) {
 
             // Update each child element
             adjustment += updateElement(
-                childNode,
-                newNode.children[i],
-                oldNode.children[i],
-                childNode.childNodes[i + adjustment]
+                $parent,
+                newChildren[i],
+                oldChildren[i],
+                $parent.childNodes[i + adjustment]
             )
         }
+        return
     }
-    return 0
+
+    const matches = matchChildren(oldChildren, newChildren)
+    const $oldNodes = Array.from($parent.childNodes)
+
+    // Remove the old children that are not reused
+    const reused = new Set(matches)
+    $oldNodes.forEach(($node, index) => {
+        if (!reused.has(index)) {
+            $parent.removeChild($node)
+        }
+    })
+
+    // Insert or move the children into place (and update the ones that are reused)
+    newChildren.forEach((child, index) => {
+        const $current = $parent.childNodes[index] || null
+        if (matches[index] === null) {
+            $parent.insertBefore(createElement(child), $current)
+        } else {
+            const $node = $oldNodes[matches[index]]
+            if ($node !== $current) {
+                $parent.insertBefore($node, $current)
+            }
+            updateElement($parent, child, oldChildren[matches[index]], $node)
+        }
+    })
+}
+
+function matchesDOM(node, $node) {
+    /*  Method that checks if an element in the DOM (e.g. rendered by the
+        server) is exactly what createElement would make of a node.
+    */
+
+    // Text nodes
+    if (typeof node === 'string') {
+        return $node.nodeType === Node.TEXT_NODE && $node.nodeValue === node
+    }
+
+    if ($node.nodeType !== Node.ELEMENT_NODE || $node.nodeName.toLowerCase() !== node.type.toLowerCase()) {
+        return false
+    }
+    if ($node.childNodes.length !== node.children.length) {
+        return false
+    }
+    return node.children.every((child, index) => matchesDOM(child, $node.childNodes[index]))
+}
+
+function hydrate($parent, node) {
+    /*  Take over the DOM that was rendered by the server for a node, or build
+        it if it does not match (e.g. the browser fixed invalid HTML). Returns
+        the node (the virtual DOM of the page).
+    */
+
+    if ($parent.childNodes.length !== 1 || !matchesDOM(node, $parent.childNodes[0])) {
+        if (DEBUG) console.log("The rendered page does not match its VDOM, building it")
+        $parent.textContent = ""
+        $parent.appendChild(createElement(node))
+    }
+    return node
+}
+
+function storeSession(id) {
+    /*  Remember the session in local storage, and in a cookie so the server
+        can render pages for it.
+    */
+
+    session_id = id
+    if (typeof(Storage) !== "undefined") {
+        localStorage.setItem("session_id", id)
+    }
+    document.cookie = SESSION_COOKIE + "=" + encodeURIComponent(id) + "; path=/; SameSite=Lax"
+}
+
+function getNode(tree, path) {
+    /*  Method that finds a node in the virtual DOM by its path (child indices).
+    */
+
+    return path.reduce((node, index) => node.children[index], tree)
+}
+
+function getDOMNode(path) {
+    /*  Method that finds an element in the DOM by its path (child indices).
+    */
+
+    return path.reduce(($node, index) => $node.childNodes[index], $root.childNodes[0])
+}
+
+function applyPatch(patch) {
+    /*  Apply a single patch from the server to the DOM and the old virtual DOM.
+    */
+
+    const path = patch.path
+    const parentPath = path.slice(0, -1)
+    const index = path[path.length - 1]
+
+    // Add a new node
+    if (patch.op === "insert") {
+        const $parent = getDOMNode(parentPath)
+        $parent.insertBefore(createElement(patch.node), $parent.childNodes[index] || null)
+        getNode(old_dom, parentPath).children.splice(index, 0, patch.node)
+
+    // Remove a node
+    } else if (patch.op === "remove") {
+        const $parent = getDOMNode(parentPath)
+        $parent.removeChild($parent.childNodes[index])
+        getNode(old_dom, parentPath).children.splice(index, 1)
+
+    // Replace a node (or the root)
+    } else if (patch.op === "replace") {
+        const $node = getDOMNode(path)
+        $node.parentNode.replaceChild(createElement(patch.node), $node)
+        if (path.length === 0) {
+            old_dom = patch.node
+        } else {
+            getNode(old_dom, parentPath).children[index] = patch.node
+        }
+
+    // Move a node to another position (before the node at that position)
+    } else if (patch.op === "move") {
+        const $parent = getDOMNode(parentPath)
+        $parent.insertBefore($parent.childNodes[index], $parent.childNodes[patch.to])
+        const children = getNode(old_dom, parentPath).children
+        children.splice(patch.to, 0, children.splice(index, 1)[0])
+
+    // Change the properties of a node
+    } else if (patch.op === "props") {
+        const $node = getDOMNode(path)
+        const node = getNode(old_dom, path)
+        patch.remove.forEach(name => {
+            removeProp($node, name, node.props[name])
+            delete node.props[name]
+        })
+        Object.keys(patch.set).forEach(name => {
+            updateProp($node, name, patch.set[name], node.props[name])
+            node.props[name] = patch.set[name]
+        })
+
+    // Change the content of a text node
+    } else if (patch.op === "text") {
+        getDOMNode(path).nodeValue = patch.text
+        getNode(old_dom, parentPath).children[index] = patch.text
+    }
+}
+
+function decodeMsgpack(bytes) {
+    /*  Minimal MessagePack decoder (for the types that the server sends).
+    */
+
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength)
+    const decoder = new TextDecoder()
+    let offset = 0
+
+    function uint(size) {
+        let value
+        if (size === 1) value = view.getUint8(offset)
+        else if (size === 2) value = view.getUint16(offset)
+        else if (size === 4) value = view.getUint32(offset)
+        else value = Number(view.getBigUint64(offset))
+        offset += size
+        return value
+    }
+
+    function int(size) {
+        let value
+        if (size === 1) value = view.getInt8(offset)
+        else if (size === 2) value = view.getInt16(offset)
+        else if (size === 4) value = view.getInt32(offset)
+        else value = Number(view.getBigInt64(offset))
+        offset += size
+        return value
+    }
+
+    function float(size) {
+        const value = size === 4 ? view.getFloat32(offset) : view.getFloat64(offset)
+        offset += size
+        return value
+    }
+
+    function string(length) {
+        const value = decoder.decode(bytes.subarray(offset, offset + length))
+        offset += length
+        return value
+    }
+
+    function binary(length) {
+        const value = bytes.slice(offset, offset + length)
+        offset += length
+        return value
+    }
+
+    function array(length) {
+        const value = []
+        for (let i = 0; i < length; i++) value.push(read())
+        return value
+    }
+
+    function map(length) {
+        const value = {}
+        for (let i = 0; i < length; i++) {
+            const key = read()
+            value[key] = read()
+        }
+        return value
+    }
+
+    function read() {
+        const type = bytes[offset++]
+
+        // Types with the value or length in the type byte
+        if (type < 0x80) return type
+        if (type < 0x90) return map(type & 0x0f)
+        if (type < 0xa0) return array(type & 0x0f)
+        if (type < 0xc0) return string(type & 0x1f)
+        if (type >= 0xe0) return type - 0x100
+
+        switch (type) {
+            case 0xc0: return null
+            case 0xc2: return false
+            case 0xc3: return true
+            case 0xc4: return binary(uint(1))
+            case 0xc5: return binary(uint(2))
+            case 0xc6: return binary(uint(4))
+            case 0xca: return float(4)
+            case 0xcb: return float(8)
+            case 0xcc: return uint(1)
+            case 0xcd: return uint(2)
+            case 0xce: return uint(4)
+            case 0xcf: return uint(8)
+            case 0xd0: return int(1)
+            case 0xd1: return int(2)
+            case 0xd2: return int(4)
+            case 0xd3: return int(8)
+            case 0xd9: return string(uint(1))
+            case 0xda: return string(uint(2))
+            case 0xdb: return string(uint(4))
+            case 0xdc: return array(uint(2))
+            case 0xdd: return array(uint(4))
+            case 0xde: return map(uint(2))
+            case 0xdf: return map(uint(4))
+        }
+        throw new Error("Unsupported MessagePack type " + type)
+    }
+
+    return read()
+}
+
+function inflate(bytes) {
+    /*  Decompress deflated (zlib) data.
+    */
+
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"))
+    return new Response(stream).arrayBuffer().then(buffer => new Uint8Array(buffer))
+}
+
+function expandNode(node, names) {
+    /*  Turn a node in the compact format ([type, [name, value, ...], ...children])
+        into a virtual DOM node.
+    */
+
+    // Text nodes
+    if (typeof node === 'string') {
+        return node
+    }
+
+    const props = {}
+    for (let i = 0; i < node[1].length; i += 2) {
+        props[names[node[1][i]]] = node[1][i + 1]
+    }
+    return {"type": names[node[0]], "props": props, "children": node.slice(2).map(child => expandNode(child, names))}
+}
+
+function expandPatch(patch, names) {
+    /*  Turn a patch in the compact format ([operation, path, ...]) into a patch.
+    */
+
+    const expanded = {"op": PATCH_OPERATIONS[patch[0]], "path": patch[1]}
+    if (expanded.op === "insert" || expanded.op === "replace") {
+        expanded.node = expandNode(patch[2], names)
+    } else if (expanded.op === "props") {
+        expanded.set = patch[2]
+        expanded.remove = patch[3]
+    } else if (expanded.op === "text") {
+        expanded.text = patch[2]
+    } else if (expanded.op === "move") {
+        expanded.to = patch[2]
+    }
+    return expanded
+}
+
+function decodePayload(payload, isPatch) {
+    /*  Decode a VDOM (or the patches) from the server, returns a promise.
+        Payloads in a compact format are in an {"encoding": [...], "data": ...}
+        envelope.
+    */
+
+    if (!payload.encoding) {
+        return Promise.resolve(isPatch ? payload.patches : payload)
+    }
+
+    const encoding = payload.encoding
+    let data = Promise.resolve(payload.data instanceof ArrayBuffer ? new Uint8Array(payload.data) : payload.data)
+
+    // Decompress, and decode the binary (or JSON) data
+    if (encoding.includes("deflate")) {
+        data = data.then(inflate)
+    }
+    data = data.then(function(data) {
+        if (encoding.includes("msgpack")) {
+            return decodeMsgpack(data)
+        } else if (encoding.includes("deflate")) {
+            return JSON.parse(new TextDecoder().decode(data))
+        }
+        return data
+    })
+
+    // Expand the compact nodes
+    return data.then(function([names, body]) {
+        return isPatch ? body.map(patch => expandPatch(patch, names)) : expandNode(body, names)
+    })
 }
 
 function clearInputField(identifier) {
@@ -246,12 +626,104 @@ function getElementByIdentifier(identifier) {
     return $("[identifier='" + identifier + "']")[0]
 }
 
+function getEventWindow(identifier, name) {
+    /*  Get the debounce or throttle window (in ms) of the element that has
+        the identifier (0 if there is none).
+    */
+
+    const $element = identifier ? getElementByIdentifier(identifier) : undefined
+    const value = $element ? parseInt($element.getAttribute("data-" + name)) : NaN
+    return isNaN(value) ? 0 : value
+}
+
+function flushEvents(message) {
+    /*  Send the queued events (and the message, if any) to the backend. Multiple
+        events are sent as a batch, so they are handled with a single update.
+    */
+
+    clearTimeout(flush_timer)
+    flush_timer = null
+
+    let messages = queued_events.map(queued => queued.message)
+    queued_events = []
+    if (message) {
+        messages.push(message)
+    }
+
+    // Remember when the events were sent (for throttling)
+    messages.forEach(sent => last_sent[sent.target] = Date.now())
+
+    if (messages.length == 1) {
+        socket.emit('DOM_EVENT', messages[0])
+    } else if (messages.length > 1) {
+        socket.emit('DOM_EVENT_BATCH', {'events': messages})
+    }
+}
+
+function queueEvent(message, deadline) {
+    /*  Queue an event until the deadline (or until another event is sent). Only
+        the last event of the same type and target is kept.
+    */
+
+    queued_events = queued_events.filter(queued =>
+        queued.message.target !== message.target || queued.message.DOMEventCategory !== message.DOMEventCategory
+    )
+    queued_events.push({'message': message, 'deadline': deadline})
+
+    // Send the queue when the first deadline is reached
+    const first = Math.min(...queued_events.map(queued => queued.deadline))
+    clearTimeout(flush_timer)
+    flush_timer = setTimeout(flushEvents, Math.max(first - Date.now(), 0))
+}
+
+function sendEvent(message) {
+    /*  Send an event to the backend, unless the target wants its events
+        debounced or throttled. Events keep their order.
+    */
+
+    const identifier = message.target
+    const debounce = getEventWindow(identifier, "debounce")
+    const throttle = getEventWindow(identifier, "throttle")
+    const now = Date.now()
+
+    // Wait for a pause
+    if (debounce > 0) {
+        queueEvent(message, now + debounce)
+
+    // Wait until the window since the last event has passed
+    } else if (throttle > 0 && (last_sent[identifier] || 0) + throttle > now) {
+        queueEvent(message, last_sent[identifier] + throttle)
+
+    // Send right away
+    } else {
+        flushEvents(message)
+    }
+}
+
 // Get a reference to the root element
 let $root = document.getElementById('root')
 
 // Initialize other parameters
 let old_dom = undefined
 
+// Updates that are being decoded
+let receiving = Promise.resolve()
+
+// Events that wait for their debounce or throttle window
+let queued_events = []
+let flush_timer = null
+let last_sent = {}
+
+// Take over the page that was rendered by the server (for the session in the cookie)
+let render_id = null
+if (window.__PYDOW_SSR__) {
+    storeSession(window.__PYDOW_SSR__.session_id)
+    render_id = window.__PYDOW_SSR__.render_id
+    old_dom = hydrate($root, window.__PYDOW_SSR__.vdom)
+} else if (session_id) {
+    storeSession(session_id)
+}
+
 // Create a socket connection
 let socket = io.connect('http://' + document.domain + ':' + location.port)
 
@@ -261,10 +733,14 @@ socket.on('connect', function() {
     // Hide the overlay
     document.getElementById("overlay").style.display = "none"
 
-    if (session_id) {
-        socket.emit("RESTORE_SESSION", {"session_id": session_id})
+    // Tell the server which rendered page the client has (only once, it is an update away after a reconnect)
+    if (render_id) {
+        socket.emit("RESTORE_SESSION", {"session_id": session_id, "render_id": render_id, "formats": PAYLOAD_FORMATS})
+        render_id = null
+    } else if (session_id) {
+        socket.emit("RESTORE_SESSION", {"session_id": session_id, "formats": PAYLOAD_FORMATS})
     } else {
-        socket.emit("REQUEST_SESSION", {})
+        socket.emit("REQUEST_SESSION", {"formats": PAYLOAD_FORMATS})
     }
 })
 
@@ -272,34 +748,59 @@ socket.on('disconnect', function () {
     document.getElementById("overlay").style.display = "block"
 })
 
-socket.on('reconnect', function() {
-    socket.emit('DOM_EVENT', {'DOMEventCategory': 'UIEvent load', 'link_target': location.pathname, "link_search": location.search, "link_anchor": location.hash})
+// Reconnects are events of the manager of the socket (socket.io client 3 and newer)
+socket.io.on('reconnect', function() {
+    sendEvent({'DOMEventCategory': 'UIEvent load', 'link_target': location.pathname, "link_search": location.search, "link_anchor": location.hash})
 })
 
 socket.on('STORE_SESSION', function(event) {
-    session_id = event["session_id"]
-    localStorage.setItem("session_id", session_id)
+    storeSession(event["session_id"])
     console.log("Store the session id in local storage")
 })
 
 // Handle the incoming VDOM when an update is received
-socket.on('VDOM_UPDATE', function(new_dom) {
+socket.on('VDOM_UPDATE', function(payload) {
 
-    if (DEBUG) console.group("Handle VDOM update")
+    // Decode the updates in the order they were received
+    receiving = receiving.then(() => decodePayload(payload, false)).then(function(new_dom) {
 
-    // Update
-    if (typeof(old_dom) != undefined){
-        updateElement($root, new_dom, old_dom)
-        old_dom = new_dom
-    } 
+        if (DEBUG) console.group("Handle VDOM update")
 
-    // Create new
-    else {
-        updateElement($root, old_dom)
-    }
+        // Update
+        if (typeof(old_dom) != undefined){
+            updateElement($root, new_dom, old_dom)
+            old_dom = new_dom
+        } 
+
+        // Create new
+        else {
+            updateElement($root, old_dom)
+        }
 
-    if (DEBUG) console.groupEnd()
+        if (DEBUG) console.groupEnd()
 
+    }).catch(function(error) {
+        if (DEBUG) console.log("Unable to handle update, requesting the full VDOM\n", error)
+        socket.emit("REQUEST_VDOM", {})
+    })
+})
+
+// Handle the incoming changes to the VDOM
+socket.on('VDOM_PATCH', function(payload) {
+
+    receiving = receiving.then(() => decodePayload(payload, true)).then(function(patches) {
+
+        if (DEBUG) console.group("Handle VDOM patch")
+
+        // Patches can only be applied to the VDOM they were made for
+        patches.forEach(applyPatch)
+
+        if (DEBUG) console.groupEnd()
+
+    }).catch(function(error) {
+        if (DEBUG) console.log("Unable to apply patch, requesting the full VDOM\n", error)
+        socket.emit("REQUEST_VDOM", {})
+    })
 })
 
 // Reflect the change in location by pushing details to the history
@@ -350,8 +851,8 @@ for (DOMEvent in DOM_EVENTS){
                 })
             }
 
-            // Send the message to the backend
-            socket.emit('DOM_EVENT', message)
+            // Send the message to the backend (or queue it)
+            sendEvent(message)
 
         }, true)
     })
@@ -360,5 +861,5 @@ for (DOMEvent in DOM_EVENTS){
 
 window.addEventListener("popstate", function(event) {
     console.log(location)
-    socket.emit('DOM_EVENT', {"DOMEventCategory": "UIEvent load", "link_target": location.pathname, "link_search": location.search, "link_anchor": location.hash})
+    sendEvent({"DOMEventCategory": "UIEvent load", "link_target": location.pathname, "link_search": location.search, "link_anchor": location.hash})
 })
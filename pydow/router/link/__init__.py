@@ -1,7 +1,6 @@
 from pydow.core.component import Component
 from pydow.signals import signal_navigation_event
-
-from blinker import signal
+from pydow.core.dispatcher import ON_CLICK
 
 
 class Link(Component):
@@ -16,9 +15,6 @@ class Link(Component):
         # Initialize the component
         super(Link, self).__init__(template_location=__file__, tag="pydow_link", *args, **kwargs)
 
-        # Specify specific signals
-        self.signal_on_click = signal(f"ON_CLICK_{self.identifier}")
-
         # Create elements that can be rendered by the template
         self.bindings = {"content": self.content if hasattr(self, "content") else ""}
 
@@ -36,8 +32,7 @@ class Link(Component):
             self.search = parts[1]
 
         # Create the onClick behaviour
-        # self.dispatcher.addEventListener(f"ON_CLICK_{self.identifier}", self.onClick)
-        self.signal_on_click.connect(self.onClick, weak=False)
+        self.dispatcher.addEventListener(ON_CLICK, self.onClick, identifier=self.identifier, owner=self)
 
     def onClick(self: object, event: dict) -> None:
         """ Default onClick handler.
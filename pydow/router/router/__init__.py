@@ -1,4 +1,9 @@
+import threading
+
+from collections.abc import Mapping
+
 from pydow.core.component import Component
+from pydow.router.table import RouteTable
 from pydow.signals import signal_navigation_event
 
 
@@ -9,12 +14,21 @@ class Router(Component):
     """
 
     def __init__(self: object, *args: list, **kwargs: dict) -> None:
-        """ Initialization of the router.
+        """ Initialization of the router. Routes map a path (that can have
+            parameters, e.g. /users/<int:user_id>) to a component class, or
+            to a component. Classes are instantiated on the first visit.
         """
 
         # Initialize the component
         super(Router, self).__init__(template_location=__file__, *args, **kwargs)
 
+        # The components of the routes are children of the router (and use it as their router)
+        self.router = self
+
+        # Compile the routes, and create their components when they are needed
+        self.table = RouteTable(list(self.routes))
+        self.routes = RouteComponents(self, self.routes)
+
         self.bindings = {
             "getContent": self.getContent
         }
@@ -23,9 +37,28 @@ class Router(Component):
         # self.dispatcher.addEventListener("NAVIGATION_EVENT", self.changeRoute)
         signal_navigation_event.connect(self.changeRoute)
 
+    def match(self: object, link_target: str) -> tuple:
+        """ Find the route for a path, returns a (route, parameters) tuple or
+            None if there is no route for the path.
+        """
+        return self.table.match(link_target)
+
+    def getRouteParameters(self: object, session_id: str) -> dict:
+        """ Method that returns the (typed) path parameters of the current route.
+        """
+
+        current_route = self.store.getState("ROUTER_CURRENT_ROUTE", {"link_target": "/"}, session_id=session_id)
+        match = self.match(current_route["link_target"])
+        return {} if match is None else match[1]
+
     def getContent(self, session_id):
         current_route = self.store.getState("ROUTER_CURRENT_ROUTE", {"link_target": "/"}, session_id=session_id)
-        return self.routes.get(current_route["link_target"])(session_id=session_id)
+
+        # Nothing to show for paths without a route
+        match = self.match(current_route["link_target"])
+        if match is None:
+            return ""
+        return self.routes[match[0]](session_id=session_id)
 
     def changeRoute(self: object, event: dict) -> None:
         """ Method that handles updates to the url.
@@ -44,3 +77,50 @@ class Router(Component):
         }
 
         self.store.setState(f"ROUTER_CURRENT_ROUTE", route, session_id=session_id)
+
+
+class RouteComponents(Mapping):
+    """ The components of the routes (by route), a component is created when it
+        is used for the first time.
+    """
+
+    def __init__(self: object, parent: object, routes: dict) -> None:
+        """ Initialization of the mapping, routes map to component classes (or
+            components). The components are created with the parent (the router).
+        """
+
+        # Store the input parameters
+        self.parent = parent
+        self._routes = dict(routes)
+
+        self._lock = threading.Lock()
+        self._components = {}
+
+    def __getitem__(self: object, route: str) -> Component:
+        component = self._components.get(route)
+        if component is not None:
+            return component
+
+        definition = self._routes[route]
+        if not isinstance(definition, type):
+            return definition
+
+        # Create the component once (another thread may be creating it as well)
+        with self._lock:
+            if route not in self._components:
+                self._components[route] = definition(parent=self.parent)
+            return self._components[route]
+
+    def __contains__(self: object, route: str) -> bool:
+        return route in self._routes
+
+    def __iter__(self: object):
+        return iter(self._routes)
+
+    def __len__(self: object) -> int:
+        return len(self._routes)
+
+    def created(self: object) -> list:
+        """ The routes that have a component (that were visited).
+        """
+        return list(self._components)
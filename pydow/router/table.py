@@ -0,0 +1,97 @@
+import re
+import uuid
+
+
+# Converters for typed path parameters (<int:page>), by name: (regular expression, type)
+CONVERTERS = {
+    "string": (r"[^/]+", str),
+    "int": (r"-?\d+", int),
+    "float": (r"-?\d+(?:\.\d+)?", float),
+    "path": (r".+", str),
+    "uuid": (r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}", uuid.UUID),
+}
+
+# Path parameters in a route: <name> or <converter:name>
+_parameter = re.compile(r"<(?:(?P<converter>[a-zA-Z_][a-zA-Z0-9_]*):)?(?P<name>[a-zA-Z_][a-zA-Z0-9_]*)>")
+
+
+class RouteTable(object):
+    """ Matches paths to routes. Routes without parameters are looked up
+        directly, routes with parameters (e.g. /users/<int:user_id>) are
+        compiled into a single regular expression. Routes without parameters
+        win, the others are tried in the order they were added.
+    """
+
+    def __init__(self: object, routes: list = []) -> None:
+        """ Initialization of the route table.
+        """
+
+        self._static = {}
+        self._dynamic = []
+        self._pattern = None
+
+        for route in routes:
+            self.add(route)
+
+    def add(self: object, route: str) -> None:
+        """ Add a route to the table.
+        """
+
+        # Routes without parameters
+        if _parameter.search(route) is None:
+            self._static[route] = route
+            return
+
+        # Compile the route into a regular expression (with a group per parameter)
+        index = len(self._dynamic)
+        expression = ""
+        parameters = []
+        position = 0
+        for match in _parameter.finditer(route):
+            converter = match.group("converter") or "string"
+            if converter not in CONVERTERS:
+                raise Exception(f"Unknown converter {converter} in route {route}")
+            expression += re.escape(route[position:match.start()])
+            expression += f"(?P<_{index}_{len(parameters)}>{CONVERTERS[converter][0]})"
+            parameters.append((match.group("name"), CONVERTERS[converter][1]))
+            position = match.end()
+        expression += re.escape(route[position:])
+
+        self._dynamic.append((route, f"(?P<_{index}>{expression})", parameters))
+        self._pattern = None
+
+    def match(self: object, path: str) -> tuple:
+        """ Find the route for a path, returns a (route, parameters) tuple with
+            the typed parameters, or None if no route matches.
+        """
+
+        route = self._static.get(path)
+        if route is not None:
+            return route, {}
+
+        # Compile all routes with parameters into one expression (once)
+        if self._pattern is None:
+            if len(self._dynamic) == 0:
+                return None
+            self._pattern = re.compile("|".join(expression for _, expression, _ in self._dynamic))
+
+        match = self._pattern.fullmatch(path)
+        if match is None:
+            return None
+
+        # The group of the route is the last one that closed
+        index = int(match.lastgroup[1:])
+        route, _, parameters = self._dynamic[index]
+        return route, {
+            name: type_(match.group(f"_{index}_{number}")) for number, (name, type_) in enumerate(parameters)
+        }
+
+    def __contains__(self: object, route: str) -> bool:
+        return route in self._static or any(route == dynamic for dynamic, _, _ in self._dynamic)
+
+    def __iter__(self: object):
+        yield from self._static
+        yield from (route for route, _, _ in self._dynamic)
+
+    def __len__(self: object) -> int:
+        return len(self._static) + len(self._dynamic)
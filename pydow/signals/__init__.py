@@ -5,6 +5,12 @@ signal_navigation_event = signal("signal_navigation_event")
 signal_state_update = signal("signal_state_update")
 signal_clear_input_field_event = signal("signal_clear_input_field_event")
 signal_default_event = signal("signal_default_event")
+signal_client_reset = signal("signal_client_reset")
+signal_state_changed = signal("signal_state_changed")
+signal_session_evicted = signal("signal_session_evicted")
+signal_dom_event = signal("signal_dom_event")
+signal_client_capabilities = signal("signal_client_capabilities")
+signal_client_hydrated = signal("signal_client_hydrated")
 
 
-__all__ = ["signal_navigation_event", "signal_state_update", "signal_clear_input_field_event", "signal_default_event"]
+__all__ = ["signal_navigation_event", "signal_state_update", "signal_clear_input_field_event", "signal_default_event", "signal_client_reset", "signal_state_changed", "signal_session_evicted", "signal_dom_event", "signal_client_capabilities", "signal_client_hydrated"]
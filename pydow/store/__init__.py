@@ -1,3 +1,24 @@
+import importlib
+
 from pydow.store.filestore import Store
 
-__all__ = ["Store"]
+
+# Short names of the stores that ship with pydow
+_backends = {
+    "memory": "pydow.store.filestore",
+    "sqlite": "pydow.store.sqlite",
+    "shared": "pydow.store.shared",
+}
+
+
+def createStore(backend: str = "memory", **options: dict) -> object:
+    """ Create a store by name ("memory", "sqlite", "shared"), or by the
+        name of a module that has a Store class. Options are passed to the
+        Store class.
+    """
+
+    module = importlib.import_module(_backends.get(backend, backend))
+    return module.Store(**options)
+
+
+__all__ = ["Store", "createStore"]
@@ -1,41 +1,220 @@
+import sys
+import time
+import weakref
+import threading
+
+from collections import OrderedDict
+
+from pydow.signals import signal_session_evicted
+from pydow.store.tracking import MISSING
+from pydow.store.tracking import record_read
+from pydow.store.tracking import record_write
+
+
+# Values of these types can not be changed in place
+_immutable_types = (str, bytes, int, float, bool, tuple, frozenset, type(None))
+
+
 class Store(dict):
-    """ Default store class that handles the state in memory.
+    """ Default store class that handles the state in memory. The state of each
+        session is kept in its own namespace, so idle sessions can be evicted.
     """
 
-    def __init__(self: object, *args, **kwargs) -> None:
+    def __init__(
+        self: object,
+        session_ttl: float = None,
+        max_sessions: int = None,
+        sweep_interval: float = 60,
+        *args,
+        **kwargs
+    ) -> None:
         """ Simple store that takes care of the state of the application.
+            Sessions that are idle for more than session_ttl seconds are
+            evicted, and so are the least recently used sessions when there
+            are more than max_sessions.
         """
 
         # Initialize the object as usual
         super(Store, self).__init__(*args, **kwargs)
 
-        # Create the object that will hold the state (in memory) for the entire application
+        # Store the input parameters
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+
+        self._lock = threading.RLock()
+
+        # Create the object that will hold the state that does not belong to a session
         self._data = {}
 
+        # The state of every session (least recently used first) and when it was last used
+        self._sessions = OrderedDict()
+        self._last_access = {}
+
+        # Evict idle sessions in the background
+        if self.session_ttl is not None:
+            sweeper = threading.Thread(
+                target=_sweep, args=(weakref.ref(self), self.sweep_interval), daemon=True
+            )
+            sweeper.start()
+
+    def _namespace(self: object, session_id: str, create: bool = False) -> dict:
+        """ Get the state of a session (or the global state if there is no
+            session) and mark the session as used.
+        """
+
+        if session_id is None:
+            return self._data
+
+        with self._lock:
+            namespace = self._sessions.get(session_id)
+
+            # Start a new session, make room for it if needed
+            if namespace is None:
+                if not create:
+                    return None
+                namespace = self._sessions[session_id] = {}
+                if self.max_sessions is not None:
+                    while len(self._sessions) > self.max_sessions:
+                        self.evictSession(next(iter(self._sessions)))
+
+            # Mark the session as most recently used
+            else:
+                self._sessions.move_to_end(session_id)
+            self._last_access[session_id] = time.monotonic()
+
+        return namespace
+
     def getState(self: object, key: str, default=None, session_id: str = None, identifier: str = None):
         """ Helper method the retrieve a state.
         """
 
-        # If a session key is provided, use it to postfix the key
-        if session_id is not None:
-            key = f"{key}_{session_id}"
+        state_key = (key, session_id, identifier)
+        value = self.peekState(key, session_id=session_id, identifier=identifier)
 
-        if identifier is not None:
-            key = f"{key}_{identifier}"
+        # Keep track of what is read (e.g. by the component that is rendering)
+        record_read(state_key, value)
 
         # Return the value
-        return self._data.get(key, default)
+        return default if value is MISSING else value
+
+    def peekState(self: object, key: str, session_id: str = None, identifier: str = None):
+        """ Helper method to retrieve a state without tracking the read. Returns
+            MISSING if the state does not exist.
+        """
+
+        namespace = self._namespace(session_id)
+        if namespace is None:
+            return MISSING
+
+        return namespace.get((key, identifier), MISSING)
+
+    def peekStates(self: object, keys: list) -> list:
+        """ Helper method to retrieve multiple (key, session_id, identifier)
+            states at once without tracking the reads.
+        """
+
+        return [self.peekState(key, session_id=session_id, identifier=identifier) for key, session_id, identifier in keys]
 
     def setState(self: object, key: str, value, session_id: str = None, identifier: str = None):
         """ Helper method to store a state.
         """
 
-        # If a session key is provided, use it to postfix the key
-        if session_id is not None:
-            key = f"{key}_{session_id}"
-
-        if identifier is not None:
-            key = f"{key}_{identifier}"
+        namespace = self._namespace(session_id, create=True)
 
         # Set the value in the state
-        self._data[key] = value
+        previous = namespace.get((key, identifier), MISSING)
+        namespace[(key, identifier)] = value
+
+        # Record the change (the same mutable object may have been changed in place)
+        if previous != value or (previous is value and not isinstance(value, _immutable_types)):
+            record_write((key, session_id, identifier))
+
+    def evictSession(self: object, session_id: str) -> None:
+        """ Remove all state of a session.
+        """
+
+        with self._lock:
+            self._last_access.pop(session_id, None)
+            if self._sessions.pop(session_id, None) is None:
+                return
+
+        # Let others (e.g. caches) know that the session is gone
+        signal_session_evicted.send(session_id)
+
+    def evictIdleSessions(self: object) -> list:
+        """ Remove the state of all sessions that were idle for longer than
+            the session TTL, returns the evicted session IDs.
+        """
+
+        if self.session_ttl is None:
+            return []
+
+        # Sessions are ordered by last use, so stop at the first recent session
+        deadline = time.monotonic() - self.session_ttl
+        evicted = []
+        with self._lock:
+            for session_id in list(self._sessions):
+                if self._last_access[session_id] > deadline:
+                    break
+                evicted.append(session_id)
+
+        for session_id in evicted:
+            self.evictSession(session_id)
+        return evicted
+
+    def getSessionStats(self: object) -> dict:
+        """ Method that reports the number of entries, the approximate size in
+            bytes, and the idle time in seconds of every session.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            sessions = list(self._sessions.items())
+            last_access = dict(self._last_access)
+
+        return {
+            session_id: {
+                "entries": len(namespace),
+                "bytes": _approximate_size(namespace),
+                "idle": now - last_access.get(session_id, now),
+            }
+            for session_id, namespace in sessions
+        }
+
+
+def _sweep(store_reference: weakref.ref, interval: float) -> None:
+    """ Background loop that evicts idle sessions (until the store is gone).
+    """
+
+    while True:
+        time.sleep(interval)
+        store = store_reference()
+        if store is None:
+            return
+        store.evictIdleSessions()
+        del store
+
+
+def _approximate_size(value, seen: set = None) -> int:
+    """ Approximate the memory used by a value (including nested values).
+    """
+
+    if seen is None:
+        seen = set()
+
+    # Count shared objects only once
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_approximate_size(key, seen) + _approximate_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_approximate_size(item, seen) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += _approximate_size(vars(value), seen)
+    elif hasattr(type(value), "__slots__"):
+        size += sum(_approximate_size(getattr(value, name, None), seen) for name in type(value).__slots__)
+    return size
@@ -0,0 +1,196 @@
+import time
+import argparse
+import threading
+import multiprocessing
+
+from multiprocessing.managers import BaseManager
+
+from pydow.store.filestore import Store as MemoryStore
+from pydow.store.tracking import MISSING
+from pydow.store.tracking import record_read
+from pydow.store.tracking import record_write
+
+
+class SharedState(object):
+    """ The state that is kept by the store server, wraps an in-memory store.
+    """
+
+    def __init__(self: object, *args: list, **kwargs: dict) -> None:
+        """ Initialization of the shared state, arguments are passed to the
+            in-memory store (e.g. session_ttl and max_sessions).
+        """
+
+        self._store = MemoryStore(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def peekState(self: object, key: str, session_id: str = None, identifier: str = None):
+        return self._store.peekState(key, session_id=session_id, identifier=identifier)
+
+    def peekStates(self: object, keys: list) -> list:
+        return self._store.peekStates(keys)
+
+    def setState(self: object, key: str, value, session_id: str = None, identifier: str = None) -> bool:
+        """ Store a state, returns True if the value changed.
+        """
+
+        with self._lock:
+            previous = self._store.peekState(key, session_id=session_id, identifier=identifier)
+            self._store.setState(key, value, session_id=session_id, identifier=identifier)
+        return previous != value
+
+    def evictSession(self: object, session_id: str) -> None:
+        self._store.evictSession(session_id)
+
+    def evictIdleSessions(self: object) -> list:
+        return self._store.evictIdleSessions()
+
+    def getSessionStats(self: object) -> dict:
+        return self._store.getSessionStats()
+
+
+class _ServerManager(BaseManager):
+    pass
+
+
+class _ClientManager(BaseManager):
+    pass
+
+
+_ClientManager.register("getState")
+
+
+def parseAddress(address: str) -> tuple:
+    """ Helper method that turns "host:port" into a (host, port) tuple.
+    """
+
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def retryConnection(connect, timeout: float = 10):
+    """ Helper method that retries to connect while a server is starting.
+    """
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return connect()
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def serve(address: str = "127.0.0.1:50000", authkey: str = None, **options: dict) -> None:
+    """ Run the store server (blocks). Only processes that know the authkey can
+        connect, and they can run code in the server (the values are pickled),
+        so the server should only listen on a local or private address.
+    """
+
+    if authkey is None:
+        raise Exception("The shared store needs an authkey.")
+
+    # The state is created once and handed to every client
+    state = SharedState(**options)
+    _ServerManager.register("getState", callable=lambda: state)
+
+    manager = _ServerManager(address=parseAddress(address), authkey=authkey.encode("utf-8"))
+    manager.get_server().serve_forever()
+
+
+def startServer(address: str = "127.0.0.1:50000", authkey: str = None, **options: dict) -> multiprocessing.Process:
+    """ Start the store server in a separate (daemon) process.
+    """
+
+    process = multiprocessing.Process(target=serve, args=(address, authkey), kwargs=options, daemon=True)
+    process.start()
+    return process
+
+
+class Store(object):
+    """ Store that keeps the state in a separate store server process, so
+        several App processes can share the state of all sessions.
+    """
+
+    def __init__(self: object, address: str = "127.0.0.1:50000", authkey: str = None, *args: list, **kwargs: dict) -> None:
+        """ Initialization of the store. The connection to the server is made
+            on first use (e.g. after the worker processes have started).
+        """
+
+        if authkey is None:
+            raise Exception("The shared store needs an authkey.")
+
+        # Store the input parameters
+        self.address = address
+        self.authkey = authkey
+
+        self._lock = threading.Lock()
+        self._state = None
+
+    @property
+    def state(self: object):
+        """ Proxy to the state in the server process.
+        """
+
+        if self._state is None:
+            with self._lock:
+                if self._state is None:
+                    manager = _ClientManager(address=parseAddress(self.address), authkey=self.authkey.encode("utf-8"))
+                    retryConnection(manager.connect)
+                    self._state = manager.getState()
+        return self._state
+
+    def getState(self: object, key: str, default=None, session_id: str = None, identifier: str = None):
+        """ Helper method the retrieve a state.
+        """
+
+        value = self.peekState(key, session_id=session_id, identifier=identifier)
+
+        # Keep track of what is read (e.g. by the component that is rendering)
+        record_read((key, session_id, identifier), value)
+
+        # Return the value
+        return default if value is MISSING else value
+
+    def peekState(self: object, key: str, session_id: str = None, identifier: str = None):
+        """ Helper method to retrieve a state without tracking the read. Returns
+            MISSING if the state does not exist.
+        """
+        return self.state.peekState(key, session_id, identifier)
+
+    def peekStates(self: object, keys: list) -> list:
+        """ Helper method to retrieve multiple (key, session_id, identifier)
+            states at once (in a single round trip) without tracking the reads.
+        """
+        return self.state.peekStates(keys)
+
+    def setState(self: object, key: str, value, session_id: str = None, identifier: str = None) -> None:
+        """ Helper method to store a state.
+        """
+
+        if self.state.setState(key, value, session_id, identifier):
+            record_write((key, session_id, identifier))
+
+    def evictSession(self: object, session_id: str) -> None:
+        self.state.evictSession(session_id)
+
+    def evictIdleSessions(self: object) -> list:
+        return self.state.evictIdleSessions()
+
+    def getSessionStats(self: object) -> dict:
+        return self.state.getSessionStats()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the pydow shared store server.")
+    parser.add_argument("--address", default="127.0.0.1:50000", help="host:port to listen on")
+    parser.add_argument("--authkey", required=True, help="Key that clients need to connect")
+    parser.add_argument("--session-ttl", type=float, default=None, help="Evict sessions idle for this many seconds")
+    parser.add_argument("--max-sessions", type=int, default=None, help="Maximum number of sessions to keep")
+    arguments = parser.parse_args()
+    serve(
+        address=arguments.address,
+        authkey=arguments.authkey,
+        session_ttl=arguments.session_ttl,
+        max_sessions=arguments.max_sessions,
+    )
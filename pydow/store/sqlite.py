@@ -0,0 +1,372 @@
+import time
+import pickle
+import atexit
+import logging
+import sqlite3
+import weakref
+import threading
+
+from collections import OrderedDict
+
+from pydow.signals import signal_session_evicted
+from pydow.store.tracking import MISSING
+from pydow.store.tracking import record_read
+from pydow.store.tracking import record_write
+
+
+# Messages of the stores (written by the handlers of the pydow logger)
+logger = logging.getLogger("pydow.store")
+
+# Values of these types can not be changed in place
+_immutable_types = (str, bytes, int, float, bool, tuple, frozenset, type(None))
+
+# Stands for None in the columns of the keys (which can not be NULL), so "" is a key like any other
+_NONE = "\x00"
+
+_schema = [
+    """
+    CREATE TABLE IF NOT EXISTS state (
+        session_id TEXT NOT NULL,
+        key TEXT NOT NULL,
+        identifier TEXT NOT NULL,
+        value BLOB NOT NULL,
+        PRIMARY KEY (session_id, key, identifier)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        accessed REAL NOT NULL
+    )
+    """,
+]
+
+
+class Store(object):
+    """ Persistent store that keeps the state in a SQLite database (in WAL
+        mode). The state of a session is loaded into memory on first use and
+        changes are written to the database in batches by a background thread.
+    """
+
+    def __init__(
+        self: object,
+        filename: str = "./pydow.sqlite",
+        flush_interval: float = 0.5,
+        max_batch: int = 1000,
+        max_cached_sessions: int = 10000,
+        session_ttl: float = None,
+        *args: list,
+        **kwargs: dict
+    ) -> None:
+        """ Initialization of the store. Changes are written at least every
+            flush_interval seconds, or as soon as max_batch changes are waiting.
+            At most max_cached_sessions are kept in memory (the database keeps
+            all of them), and sessions that are idle for more than session_ttl
+            seconds are removed from the database by evictIdleSessions.
+        """
+
+        # Store the input parameters
+        self.filename = filename
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_cached_sessions = max_cached_sessions
+        self.session_ttl = session_ttl
+
+        self._lock = threading.RLock()
+
+        # Writes to the database (one at a time), the state in memory stays available while writing
+        self._write_lock = threading.RLock()
+
+        # Open the database, WAL allows reads while writing and needs fewer fsyncs
+        self._connection = sqlite3.connect(filename, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in _schema:
+            self._connection.execute(statement)
+
+        # The state of the sessions in memory (least recently used first)
+        self._sessions = OrderedDict()
+
+        # Changes that are not written yet (and those that are being written), and sessions that
+        # were used since the last write
+        self._pending = {}
+        self._writing = {}
+        self._touched = set()
+
+        # Write changes in the background, and when the process stops
+        self._writer = threading.Thread(
+            target=_write_behind, args=(weakref.ref(self), self.flush_interval), daemon=True
+        )
+        self._writer.start()
+        atexit.register(_close, weakref.ref(self))
+
+    def _namespace(self: object, session_id: str) -> dict:
+        """ Get the state of a session (loads it from the database if needed).
+        """
+
+        session_key = _column(session_id)
+
+        with self._lock:
+            namespace = self._sessions.get(session_key)
+
+            if namespace is None:
+
+                # Read the full session at once, later misses do not need the database
+                rows = self._connection.execute(
+                    "SELECT key, identifier, value FROM state WHERE session_id = ?", (session_key,)
+                )
+                namespace = {
+                    (key, _value(identifier)): pickle.loads(value) for key, identifier, value in rows
+                }
+
+                # Changes that are not written yet are newer than the database
+                for (pending_session, key, identifier), value in [*self._writing.items(), *self._pending.items()]:
+                    if pending_session == session_key:
+                        namespace[(key, _value(identifier))] = pickle.loads(value)
+
+                self._sessions[session_key] = namespace
+
+                # Make room in memory (the state stays in the database)
+                while len(self._sessions) > self.max_cached_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_key)
+
+            self._touched.add(session_key)
+        return namespace
+
+    def getState(self: object, key: str, default=None, session_id: str = None, identifier: str = None):
+        """ Helper method the retrieve a state.
+        """
+
+        value = self.peekState(key, session_id=session_id, identifier=identifier)
+
+        # Keep track of what is read (e.g. by the component that is rendering)
+        record_read((key, session_id, identifier), value)
+
+        # Return the value
+        return default if value is MISSING else value
+
+    def peekState(self: object, key: str, session_id: str = None, identifier: str = None):
+        """ Helper method to retrieve a state without tracking the read. Returns
+            MISSING if the state does not exist.
+        """
+
+        return self._namespace(session_id).get((key, identifier), MISSING)
+
+    def peekStates(self: object, keys: list) -> list:
+        """ Helper method to retrieve multiple (key, session_id, identifier)
+            states at once without tracking the reads.
+        """
+
+        return [self.peekState(key, session_id=session_id, identifier=identifier) for key, session_id, identifier in keys]
+
+    def setState(self: object, key: str, value, session_id: str = None, identifier: str = None) -> None:
+        """ Helper method to store a state. The state is written to the database
+            in the background (values that can not be pickled raise here).
+        """
+
+        # Pickle now, so the caller gets the error and the writer only sees bytes
+        pickled = pickle.dumps(value)
+
+        with self._lock:
+            namespace = self._namespace(session_id)
+            previous = namespace.get((key, identifier), MISSING)
+            namespace[(key, identifier)] = value
+
+            # Queue the change for the next batch
+            self._pending[(_column(session_id), key, _column(identifier))] = pickled
+            write_now = len(self._pending) >= self.max_batch
+
+        if write_now:
+            self.flush()
+
+        # Record the change (the same mutable object may have been changed in place)
+        if previous != value or (previous is value and not isinstance(value, _immutable_types)):
+            record_write((key, session_id, identifier))
+
+    def flush(self: object) -> None:
+        """ Write all pending changes to the database in a single transaction.
+            The changes are taken from the queue first, the state can be used
+            (and changed) while they are written.
+        """
+
+        with self._write_lock:
+            with self._lock:
+                if self._connection is None:
+                    return
+                pending, self._pending = self._pending, {}
+                touched, self._touched = self._touched, set()
+                if len(pending) == 0 and len(touched) == 0:
+                    return
+                self._writing = pending
+
+            now = time.time()
+            try:
+                self._connection.execute("BEGIN")
+                try:
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO state (session_id, key, identifier, value) VALUES (?, ?, ?, ?)",
+                        [(*state_key, value) for state_key, value in pending.items()],
+                    )
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO sessions (session_id, accessed) VALUES (?, ?)",
+                        [(session_key, now) for session_key in touched],
+                    )
+                    self._connection.execute("COMMIT")
+                except sqlite3.OperationalError:
+                    self._connection.execute("ROLLBACK")
+
+                    # Keep the changes for the next attempt (newer changes win)
+                    with self._lock:
+                        pending.update(self._pending)
+                        self._pending = pending
+                        self._touched.update(touched)
+                    raise
+                except Exception:
+                    self._connection.execute("ROLLBACK")
+
+                    # A change that can not be written (e.g. a key of the wrong type) fails every
+                    # batch, write the changes one by one and drop the ones that fail
+                    self._writeEach(pending, touched, now)
+            finally:
+                with self._lock:
+                    self._writing = {}
+
+    def _writeEach(self: object, pending: dict, touched: set, now: float) -> None:
+        """ Write changes one at a time, changes that fail are logged and dropped.
+        """
+
+        for state_key, value in pending.items():
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO state (session_id, key, identifier, value) VALUES (?, ?, ?, ?)",
+                    (*state_key, value),
+                )
+            except Exception as e:
+                logger.error(
+                    "Dropped a state that can not be written",
+                    extra={"fields": {"filename": self.filename, "state": state_key, "error": str(e)}},
+                )
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO sessions (session_id, accessed) VALUES (?, ?)",
+            [(session_key, now) for session_key in touched],
+        )
+
+    def evictSession(self: object, session_id: str) -> None:
+        """ Remove all state of a session (from memory and the database).
+        """
+
+        session_key = _column(session_id)
+
+        # Wait for a write that may contain the session
+        with self._write_lock, self._lock:
+            self._sessions.pop(session_key, None)
+            self._touched.discard(session_key)
+            self._pending = {
+                state_key: value for state_key, value in self._pending.items() if state_key[0] != session_key
+            }
+            self._connection.execute("DELETE FROM state WHERE session_id = ?", (session_key,))
+            self._connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_key,))
+
+        # Let others (e.g. caches) know that the session is gone
+        signal_session_evicted.send(session_id)
+
+    def evictIdleSessions(self: object) -> list:
+        """ Remove the state of all sessions that were idle for longer than
+            the session TTL, returns the evicted session IDs.
+        """
+
+        if self.session_ttl is None:
+            return []
+
+        # Make sure the access times are up-to-date
+        self.flush()
+
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT session_id FROM sessions WHERE accessed < ? AND session_id != ?",
+                (time.time() - self.session_ttl, _NONE),
+            )
+            evicted = [session_id for session_id, in rows]
+
+        for session_id in evicted:
+            self.evictSession(session_id)
+        return evicted
+
+    def getSessionStats(self: object) -> dict:
+        """ Method that reports the number of entries and the size in bytes
+            (pickled) of every session in the database.
+        """
+
+        self.flush()
+
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT state.session_id, COUNT(*), SUM(LENGTH(state.value)), sessions.accessed
+                FROM state LEFT JOIN sessions ON sessions.session_id = state.session_id
+                WHERE state.session_id != ?
+                GROUP BY state.session_id
+                """,
+                (_NONE,),
+            ).fetchall()
+
+        now = time.time()
+        return {
+            session_id: {"entries": entries, "bytes": size, "idle": now - (accessed or now)}
+            for session_id, entries, size, accessed in rows
+        }
+
+    def close(self: object) -> None:
+        """ Write the pending changes and close the database.
+        """
+
+        with self._write_lock:
+            self.flush()
+            with self._lock:
+                if self._connection is None:
+                    return
+                self._connection.close()
+                self._connection = None
+
+
+def _column(value: str) -> str:
+    """ The value of a session ID or identifier in the database.
+    """
+    return _NONE if value is None else value
+
+
+def _value(column: str) -> str:
+    """ The session ID or identifier of a value in the database.
+    """
+    return None if column == _NONE else column
+
+
+def _write_behind(store_reference: weakref.ref, interval: float) -> None:
+    """ Background loop that writes the pending changes (until the store is gone).
+    """
+
+    while True:
+        time.sleep(interval)
+        store = store_reference()
+        if store is None or store._connection is None:
+            return
+
+        # Failed writes are kept and retried in the next round, nothing stops the thread
+        try:
+            store.flush()
+        except sqlite3.OperationalError as e:
+            logger.error("Unable to write the state", extra={"fields": {"filename": store.filename, "error": str(e)}})
+        except Exception:
+            logger.exception("Unexpected error while writing the state", extra={"fields": {"filename": store.filename}})
+        del store
+
+
+def _close(store_reference: weakref.ref) -> None:
+    """ Close the store (if it still exists) when the process stops.
+    """
+
+    store = store_reference()
+    if store is not None:
+        store.close()
@@ -0,0 +1,112 @@
+import contextvars
+
+from contextlib import contextmanager
+
+from pydow.signals import signal_state_changed
+
+
+# Stacks of the reads and writes that are being tracked, per thread or green
+# thread (each has its own context, a threading.local is shared by all green
+# threads when the standard library is not monkey patched)
+_tracking_context = contextvars.ContextVar("pydow_tracking", default=None)
+
+
+class _Missing(object):
+    """ Marker for keys that are not in the store (also after pickling).
+    """
+
+    def __reduce__(self: object) -> str:
+        return "MISSING"
+
+    def __repr__(self: object) -> str:
+        return "MISSING"
+
+
+# Value that is recorded for keys that are not in the store
+MISSING = _Missing()
+
+# Key that is recorded for things that can not be reused (it never has the same value)
+VOLATILE = ("__volatile__", None, None)
+
+
+def _stack(name: str) -> list:
+    """ Helper method that returns a tracking stack of the current context.
+    """
+    stacks = _tracking_context.get()
+    if stacks is None:
+        stacks = {}
+        _tracking_context.set(stacks)
+    return stacks.setdefault(name, [])
+
+
+@contextmanager
+def track_reads():
+    """ Collect the (key, session_id, identifier) tuples that are read from the
+        store in this block, together with the value that was read. Keys read
+        in nested blocks are also collected.
+    """
+
+    reads = {}
+    stack = _stack("reads")
+    stack.append(reads)
+    try:
+        yield reads
+    finally:
+        stack.pop()
+
+        # Nested reads are reads of the enclosing block as well
+        if len(stack) > 0:
+            stack[-1].update(reads)
+
+
+@contextmanager
+def track_writes():
+    """ Collect the (key, session_id, identifier) tuples that are changed in
+        the store in this block.
+    """
+
+    writes = set()
+    stack = _stack("writes")
+    stack.append(writes)
+    try:
+        yield writes
+    finally:
+        stack.pop()
+
+        # Nested writes are writes of the enclosing block as well
+        if len(stack) > 0:
+            stack[-1].update(writes)
+
+
+def record_read(key: tuple, value) -> None:
+    """ Method that stores should call for every read of the state (with
+        MISSING as value if the key is not in the store).
+    """
+    stack = _stack("reads")
+    if len(stack) > 0:
+        stack[-1][key] = value
+
+
+def record_reads(reads: dict) -> None:
+    """ Record reads that were collected before (e.g. by a cached render).
+    """
+    stack = _stack("reads")
+    if len(stack) > 0:
+        stack[-1].update(reads)
+
+
+def record_volatile() -> None:
+    """ Record that whatever is being tracked can not be reused.
+    """
+    record_read(VOLATILE, MISSING)
+
+
+def record_write(key: tuple) -> None:
+    """ Method that stores should call for every change of the state.
+    """
+    stack = _stack("writes")
+    if len(stack) > 0:
+        stack[-1].add(key)
+
+    # Let others (e.g. caches) know that the state changed
+    signal_state_changed.send(key)
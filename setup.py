@@ -17,8 +17,9 @@ setup(
     license="MIT",
     keywords="example documentation tutorial",
     url="http://packages.python.org/pydow",
-    packages=find_packages(),
-    install_requires=["flask", "flask-socketio"],
+    packages=find_packages(exclude=["benchmarks*", "tests*"]),
+    install_requires=["flask>=3.1", "flask-socketio>=5.7", "lxml"],
+    extras_require={"gevent": ["gevent"], "eventlet": ["eventlet"], "msgpack": ["msgpack"], "brotli": ["brotli"], "load": ["aiohttp"]},
     tests_require=["pytest"],
     long_description=read("README.md"),
     classifiers=["Development Status :: 3 - Alpha", "Topic :: Utilities"],
@@ -0,0 +1,320 @@
+import os
+import time
+import signal
+import socket
+import multiprocessing
+
+import pytest
+import requests
+import socketio
+
+from pydow import App
+from pydow import Component
+from pydow import VirtualDOM
+from pydow.components import Input
+from pydow.components import Button
+from pydow.components import Select
+
+
+# An app has to be the only one in the process (apps connect to the signals of the process)
+TEMPLATES = {
+    "root.html": '<div class="app">{{ router(session_id=session_id) }}</div>',
+    "home.html": (
+        '<div class="home"><p>Clicks {{ clicks }}</p>{{ add(session_id=session_id) }}{{ noop(session_id=session_id) }}'
+        "{{ name(session_id=session_id) }}{{ choice(session_id=session_id) }}</div>"
+    ),
+}
+
+
+class Root(Component):
+    def __init__(self, *args, **kwargs):
+        super(Root, self).__init__(template_location=kwargs.pop("template_location"), template_file="root.html", *args, **kwargs)
+        self.bindings = {"router": self.router}
+
+
+def createHome(folder):
+    class Home(Component):
+        options = ["a"]
+
+        def __init__(self, *args, **kwargs):
+            super(Home, self).__init__(template_location=os.path.join(folder, "home"), template_file="home.html", *args, **kwargs)
+            self.add = Button(parent=self, content="Add", onClick=self.onAdd)
+            self.noop = Button(parent=self, content="Nothing", onClick=self.onNothing)
+            self.name = Input(parent=self)
+            self.choice = Select(parent=self, getOptions=self.getOptions)
+            self.bindings = {"add": self.add, "noop": self.noop, "name": self.name, "choice": self.choice}
+
+        def onAdd(self, event):
+            session_id = event.get("session_id")
+            self.store.setState("CLICKS", self.store.getState("CLICKS", 0, session_id=session_id) + 1, session_id=session_id)
+
+        def onNothing(self, event):
+            pass
+
+        def getOptions(self, session_id=None):
+            return [{"value": option, "name": option} for option in Home.options]
+
+        def update(self, session_id=None, *args, **kwargs):
+            self.bindings["clicks"] = self.store.getState("CLICKS", 0, session_id=session_id)
+
+    return Home
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    folder = str(tmp_path_factory.mktemp("app"))
+    for name, template in TEMPLATES.items():
+        with open(os.path.join(folder, name), "w") as file_:
+            file_.write(template)
+
+    class AppRoot(Root):
+        def __init__(self, *args, **kwargs):
+            super(AppRoot, self).__init__(template_location=os.path.join(folder, "root"), *args, **kwargs)
+
+    empty = os.path.join(folder, "missing")
+    vdom = VirtualDOM(root_class=AppRoot, routes={"/": createHome(folder)})
+    app = App(vdom, plugin_folder=empty, middleware_folder=empty, configuration_file=empty)
+
+    # Lets a test emit from a worker
+    app.app.add_url_rule("/_test/broadcast", "broadcast", view_func=lambda: app.socketio.emit("PING", {}) or "")
+    return app
+
+
+def freePort():
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        return server.getsockname()[1]
+
+
+def test_workers_share_emits(app):
+    port, broker, store = freePort(), freePort(), freePort()
+    options = {
+        "workers": 2,
+        "host": "127.0.0.1",
+        "port": port,
+        "broker_address": f"127.0.0.1:{broker}",
+        "store_address": f"127.0.0.1:{store}",
+        "allow_unsafe_werkzeug": True,
+    }
+    process = multiprocessing.get_context("fork").Process(target=app.run, kwargs=options)
+    process.start()
+
+    received = []
+    client = socketio.Client(reconnection=False)
+    client.on("PING", lambda data: received.append(data))
+    try:
+        # A client of the second worker
+        for _ in range(100):
+            try:
+                client.connect(f"http://127.0.0.1:{port + 1}", transports=["polling"])
+                break
+            except socketio.exceptions.ConnectionError:
+                time.sleep(0.1)
+
+        # Gets an emit of the first worker
+        assert requests.get(f"http://127.0.0.1:{port}/_test/broadcast").status_code == 200
+        for _ in range(50):
+            if len(received) > 0:
+                break
+            time.sleep(0.1)
+        assert received == [{}]
+    finally:
+        client.disconnect()
+        os.kill(process.pid, signal.SIGINT)
+        process.join(10)
+
+
+def test_workers_refuse_unshared_stores(app, tmp_path):
+    from pydow.store.sqlite import Store as SQLiteStore
+
+    store = app.vdom.store
+    app.vdom.store = SQLiteStore(filename=str(tmp_path / "state.sqlite"))
+    try:
+        with pytest.raises(Exception, match="shared"):
+            app.runWorkers(2)
+    finally:
+        app.vdom.store.close()
+        app.vdom.store = store
+
+
+def test_concurrent_renders(app, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from pydow.core.metrics import metrics
+
+    # Reading the route for the metrics takes a while (e.g. a shared store)
+    currentRoute = app.vdom.currentRoute
+
+    def slowRoute(session_id):
+        time.sleep(0.001)
+        return currentRoute(session_id)
+
+    monkeypatch.setattr(app.vdom, "currentRoute", slowRoute)
+    for clicks in range(4):
+        app.vdom.store.setState("CLICKS", clicks, session_id=f"render-{clicks}")
+
+    def render(index):
+        session_id = f"render-{index % 4}"
+        return session_id, app.vdom.toNode(session_id=session_id)
+
+    # Every session gets its own tree, also while other sessions render (and the metrics read the store)
+    metrics.enabled = True
+    try:
+        with ThreadPoolExecutor(8) as executor:
+            for session_id, node in executor.map(render, range(400)):
+                assert f"Clicks {session_id[-1]}" in str(node.toDict())
+    finally:
+        metrics.enabled = False
+        metrics.clear()
+
+
+def matchesDOM(node, element):
+    """ Port of matchesDOM in index.js, for an element that lxml parsed (text is in text and tail).
+    """
+
+    children = ([element.text] if element.text else []) + [
+        part for child in element for part in [child] + ([child.tail] if child.tail else [])
+    ]
+    if element.tag != node["type"].lower() or len(children) != len(node["children"]):
+        return False
+    return all(
+        child == parsed if isinstance(child, str) else not isinstance(parsed, str) and matchesDOM(child, parsed)
+        for child, parsed in zip(node["children"], children)
+    )
+
+
+def test_prerender_hydrate(app):
+    import json
+    import lxml.html
+
+    # The page parses into the same tree as its VDOM (component wrappers are custom elements)
+    page = app.renderPage("hydrate", "/")
+    data = json.loads(page["data"])
+    assert "<pydow-input><input " in page["html"] and "<pydow-button><button " in page["html"]
+    assert matchesDOM(data["vdom"], lxml.html.fragment_fromstring(page["html"]))
+
+    # The browser hydrates the page, the first update is a patch against it
+    client = app.socketio.test_client(app.app)
+    client.emit("RESTORE_SESSION", {"session_id": "hydrate", "render_id": data["render_id"], "formats": []})
+    add = app.vdom.router.routes["/"].add
+    client.emit("DOM_EVENT", {"DOMEventCategory": "MouseEvent click", "target": add.identifier})
+    received = [packet["name"] for packet in client.get_received()]
+    assert received == ["VDOM_PATCH"]
+    client.disconnect()
+
+
+def test_prerender_anonymous(app):
+    client = app.app.test_client()
+    sessions = len(app.vdom.store._sessions)
+    nodes = len(app.vdom.render_cache)
+
+    # Requests without a session cookie leave nothing behind in the store
+    for _ in range(20):
+        body = client.get("/").get_data(as_text=True)
+        assert "Clicks 0" in body
+    assert len(app.vdom.store._sessions) == sessions
+    assert len(app.vdom.render_cache) == nodes
+
+
+def test_select_options_and_disconnect(app, monkeypatch):
+    home = app.vdom.router.routes["/"]
+    client = app.socketio.test_client(app.app)
+    client.emit("RESTORE_SESSION", {"session_id": "options", "formats": []})
+
+    # New options are rendered, although no state changed
+    assert str(app.vdom.toNode(session_id="options").toDict()).count("'option'") == 1
+    monkeypatch.setattr(type(home), "options", ["a", "b"])
+    assert str(app.vdom.toNode(session_id="options").toDict()).count("'option'") == 2
+
+    # The rendered nodes of the session are dropped with its client
+    assert app.vdom.render_cache._entries.get("options")
+    client.disconnect()
+    assert "options" not in app.vdom.render_cache._entries
+
+
+def received(client):
+    return [(packet["name"], packet["args"][0]) for packet in client.get_received()]
+
+
+def click(client, component):
+    client.emit("DOM_EVENT", {"DOMEventCategory": "MouseEvent click", "target": component.identifier})
+
+
+def test_socket_updates(app):
+    home = app.vdom.router.routes["/"]
+    client = app.socketio.test_client(app.app)
+    client.emit("RESTORE_SESSION", {"session_id": "updates", "formats": []})
+
+    # The first update is the full VDOM
+    client.emit("REQUEST_VDOM", {})
+    [(name, vdom)] = received(client)
+    assert name == "VDOM_UPDATE" and vdom["type"] == "pydow-approot"
+
+    # Changes are sent as patches
+    click(client, home.add)
+    [(name, payload)] = received(client)
+    assert name == "VDOM_PATCH" and [(patch["op"], patch["text"]) for patch in payload["patches"]] == [("text", "Clicks 1")]
+
+    # A client that lost its VDOM gets the full VDOM again
+    client.emit("REQUEST_VDOM", {})
+    assert [name for name, _ in received(client)] == ["VDOM_UPDATE"]
+    client.disconnect()
+
+
+def test_socket_no_update(app):
+    home = app.vdom.router.routes["/"]
+    client = app.socketio.test_client(app.app)
+    client.emit("RESTORE_SESSION", {"session_id": "no-update", "formats": []})
+    client.emit("REQUEST_VDOM", {})
+    client.get_received()
+
+    # An event that changes nothing sends nothing
+    click(client, home.noop)
+    assert received(client) == []
+    click(client, home.add)
+    assert [name for name, _ in received(client)] == ["VDOM_PATCH"]
+    client.disconnect()
+
+
+def test_socket_event_batch(app):
+    home = app.vdom.router.routes["/"]
+    client = app.socketio.test_client(app.app)
+    client.emit("RESTORE_SESSION", {"session_id": "batch", "formats": []})
+    client.emit("REQUEST_VDOM", {})
+    client.get_received()
+
+    # Queued events are handled with a single update
+    events = [{"DOMEventCategory": "MouseEvent click", "target": home.add.identifier}] * 3 + [
+        {"DOMEventCategory": "Event input", "target": home.name.identifier, "value": value} for value in ["p", "py"]
+    ]
+    client.emit("DOM_EVENT_BATCH", {"events": events})
+    [(name, payload)] = received(client)
+    assert name == "VDOM_PATCH"
+    assert [patch["op"] for patch in payload["patches"]] == ["text", "props"]
+    assert payload["patches"][0]["text"] == "Clicks 3" and payload["patches"][1]["set"] == {"value": "py"}
+    assert app.vdom.store.getState(f"INPUT_{home.name.identifier}", session_id="batch") == "py"
+    client.disconnect()
+
+
+def test_socket_compact(app, monkeypatch):
+    home = app.vdom.router.routes["/"]
+    monkeypatch.setattr(app, "compact_payloads", True)
+
+    # Clients that accept the compact format get it
+    client = app.socketio.test_client(app.app)
+    client.emit("RESTORE_SESSION", {"session_id": "compact", "formats": ["compact"]})
+    client.emit("REQUEST_VDOM", {})
+    click(client, home.add)
+    [(update, vdom), (patch, patches)] = received(client)
+    assert (update, vdom["encoding"]) == ("VDOM_UPDATE", ["compact"])
+    assert (patch, patches["encoding"]) == ("VDOM_PATCH", ["compact"])
+    client.disconnect()
+
+    # Other formats need the compact format, without it the client gets JSON
+    client = app.socketio.test_client(app.app)
+    client.emit("RESTORE_SESSION", {"session_id": "fallback", "formats": ["deflate"]})
+    client.emit("REQUEST_VDOM", {})
+    click(client, home.add)
+    [(update, vdom), (patch, patches)] = received(client)
+    assert (update, vdom["type"]) == ("VDOM_UPDATE", "pydow-approot")
+    assert (patch, list(patches)) == ("VDOM_PATCH", ["patches"])
+    client.disconnect()
@@ -0,0 +1,57 @@
+import pytest
+
+from flask import Flask
+
+from pydow.core.assets import IMMUTABLE
+from pydow.core.assets import REVALIDATE
+from pydow.core.assets import AssetCache
+
+
+def test_assets(tmp_path):
+    (tmp_path / "style.css").write_text("body { color: red; }\n" * 20)
+    (tmp_path / "large.bin").write_bytes(b"x" * 2000)
+    assets = AssetCache(str(tmp_path), max_size=1000)
+
+    app = Flask(__name__)
+    app.add_url_rule("/public/<path:path>", "public", view_func=assets.serve)
+    client = app.test_client()
+
+    # The URL has the fingerprint, those responses can be cached forever
+    url = assets.assetURL("style.css")
+    assert url.startswith("/public/style.css?v=")
+    response = client.get(url)
+    assert response.headers["Cache-Control"] == IMMUTABLE
+    assert response.get_data(as_text=True) == "body { color: red; }\n" * 20
+
+    # Others have to revalidate, with the ETag
+    response = client.get("/public/style.css")
+    assert response.headers["Cache-Control"] == REVALIDATE
+    assert client.get("/public/style.css", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+    # Compressed if the client accepts it (the compressed variant has its own ETag)
+    response = client.get("/public/style.css", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] != client.get("/public/style.css").headers["ETag"]
+
+    # Large files are sent from disk, files outside of the folder do not exist
+    assert client.get("/public/large.bin").data == b"x" * 2000
+    assert client.get("/public/../test_assets.py").status_code == 404
+    assert client.get("/public/missing.css").status_code == 404
+
+
+def test_assets_from_memory(tmp_path, monkeypatch):
+    import os
+
+    (tmp_path / "index.js").write_text("let a = 1\n")
+    assets = AssetCache(str(tmp_path))
+    asset = assets.get("index.js")
+
+    # Once a file is loaded, the disk is not used again
+    monkeypatch.setattr(os.path, "isfile", lambda filename: pytest.fail(f"checked {filename}"))
+    assert assets.get("index.js") is asset
+    monkeypatch.undo()
+
+    # Other paths of the file are checked, and do not fill the cache
+    assert assets.get("./index.js") is asset
+    assert assets.get("../index.js") is None
+    assert list(assets._paths) == ["index.js"]
@@ -0,0 +1,121 @@
+import os
+
+from lxml import etree
+
+from pydow.core import Component
+from pydow.store import Store
+from pydow.core.render_cache import RenderCache
+from pydow.core.dispatcher import Dispatcher
+
+
+class Parent(object):
+    """ Minimal stand-in for the VirtualDOM that components can be attached to.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.store = Store()
+        self.context = {}
+        self.render_cache = RenderCache()
+        self.dispatcher = Dispatcher()
+
+
+def createComponents(folder):
+    with open(os.path.join(folder, "child.html"), "w") as file_:
+        file_.write('<span class="child">{{ content }}</span>')
+    with open(os.path.join(folder, "parent.html"), "w") as file_:
+        file_.write('<div class="parent"><p>Title</p>{{ child(session_id=session_id) }}</div>')
+
+    template_location = os.path.join(folder, "template.html")
+    parent = Parent()
+    child = Component(parent=parent, template_location=template_location, template_file="child.html", tag="Child")
+    child.bindings = {"content": "Hello"}
+    root = Component(parent=parent, template_location=template_location, template_file="parent.html", tag="Root", title="main")
+    root.bindings = {"child": child}
+    return root, child
+
+
+def test_render_node(tmpdir):
+    root, child = createComponents(str(tmpdir))
+
+    node = root.renderNode(session_id="session")
+    assert node == {
+        "type": "Root",
+        "props": {"key": root.identifier},
+        "children": [
+            {
+                "type": "div",
+                "props": {"class": "parent", "identifier": root.identifier, "title": "main"},
+                "children": [
+                    {"type": "p", "props": {}, "children": ["Title"]},
+                    {
+                        "type": "Child",
+                        "props": {"key": child.identifier},
+                        "children": [
+                            {"type": "span", "props": {"class": "child", "identifier": child.identifier}, "children": ["Hello"]}
+                        ],
+                    },
+                ],
+            }
+        ],
+    }
+
+    # The HTML render path results in the same tree
+    html = etree.fromstring(root.render(session_id="session"))
+    assert html.find("div/Child/span").text == "Hello"
+    assert html.find("div").get("identifier") == root.identifier
+
+
+def test_render_cache(tmpdir):
+    root, child = createComponents(str(tmpdir))
+
+    def update(session_id=None, *args, **kwargs):
+        child.bindings["content"] = child.store.getState("CONTENT", "Hello", session_id=session_id)
+    child.update = update
+
+    # Nodes are reused until the state they read changes
+    child.store.setState("CONTENT", "Hello", session_id="session")
+    node = root.renderNode(session_id="session")
+    assert root.renderNode(session_id="session") is node
+    child.store.setState("CONTENT", "Hello", session_id="session")
+    assert root.renderNode(session_id="session") is node
+
+    child.store.setState("CONTENT", "World", session_id="session")
+    node = root.renderNode(session_id="session")
+    assert node["children"][0]["children"][1]["children"][0]["children"] == ["World"]
+
+    # Other sessions are not affected
+    child.store.setState("CONTENT", "Other", session_id="other")
+    assert root.renderNode(session_id="session") is node
+
+
+def test_memoize(tmpdir):
+    root, child = createComponents(str(tmpdir))
+
+    def update(session_id=None, *args, **kwargs):
+        child.bindings["content"] = child.store.getState("CONTENT", "Hello", session_id=session_id)
+    child.update = update
+
+    # Changes that were not made through setState (e.g. by another process) are detected as well
+    node = root.renderNode(session_id="session")
+    child.store._sessions.setdefault("session", {})[("CONTENT", None)] = "World"
+    node = root.renderNode(session_id="session")
+    assert node["children"][0]["children"][1]["children"][0]["children"] == ["World"]
+    assert root.render_cache.stats()["hits"] == 0
+
+    # Components (and their parents) that are not memoized are always rendered
+    assert root.renderNode(session_id="session") is node
+    child.memoize = False
+    root.render_cache.dropSession("session")
+    node = root.renderNode(session_id="session")
+    assert root.renderNode(session_id="session") is not node
+    assert len(root.render_cache) == 0
+
+
+def test_event_windows():
+    from pydow.components import Input
+
+    # The browser reads the debounce and throttle windows from the root element
+    field = Input(parent=Parent(), debounce=300)
+    node = field.renderNode(session_id="session")
+    assert node["children"][0]["props"]["data-debounce"] == "300"
+    assert "data-throttle" not in node["children"][0]["props"]
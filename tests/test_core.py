@@ -1,6 +1,103 @@
+import os
+import re
+import sys
+import json
+import subprocess
+
+from flask import Flask
+from flask import render_template
+
 from pydow.core import h
+from pydow.core.helpers import renderHTML
+from pydow.core.helpers import scriptJSON
+from pydow.core.routes import catch_all
+from pydow.core.assets import Shell
+from pydow.core.assets import AssetCache
 
 
 def test_core():
     h(element_type="", element_props=[])
     assert 1 == 1
+
+
+def test_render_html():
+    node = h("div", {"key": "a", "class": "x", "onClick": "f"}, h("input", {"value": '"<>'}), "a < b")
+
+    # Custom properties are not rendered, void elements have no closing tag
+    assert renderHTML(node) == '<div class="x"><input value="&quot;&lt;&gt;">a &lt; b</div>'
+
+    # Embedded JSON can not close the script element
+    assert "</script>" not in scriptJSON(h("p", {}, "</script>"))
+    assert json.loads(scriptJSON(h("p", {}, "</script>"))) == {"type": "p", "props": {}, "children": ["</script>"]}
+
+
+def test_prerender():
+    rendered = []
+
+    def render_page(session_id, link_target, link_search, discard=False):
+        rendered.append((session_id, link_target, link_search, discard))
+        return {"html": "<p>Page</p>", "data": scriptJSON({"session_id": session_id})}
+
+    public = os.path.join(os.path.dirname(__file__), "..", "pydow", "public")
+    app = Flask(__name__, template_folder=public)
+    with app.app_context():
+        shell = Shell(lambda page: render_template("index.html", index_url="/public/index.js", page=page))
+    app.add_url_rule(
+        "/<path:path>",
+        "catch_all",
+        defaults={
+            "shell": shell,
+            "assets": AssetCache(public),
+            "public_assets": AssetCache(public),
+            "render_page": render_page,
+        },
+        view_func=catch_all,
+    )
+    client = app.test_client()
+
+    # The page is rendered for the session in the cookie
+    client.set_cookie("pydow_session", "session")
+    body = client.get("/about?page=2").get_data(as_text=True)
+    assert rendered == [("session", "/about", "?page=2", False)]
+    assert '<div id="root"><p>Page</p></div>' in body
+    assert re.search(r'window.__PYDOW_SSR__ = {"session_id":"session"}', body)
+
+    # Without a cookie the page is rendered for a new session, that is discarded afterwards
+    client.delete_cookie("pydow_session")
+    client.get("/home")
+    assert rendered[-1][1:] == ("/home", "", True) and rendered[-1][0] != "session"
+
+
+def test_prerender_cache():
+    from pydow.core.prerender import PrerenderCache
+
+    cache = PrerenderCache(max_entries=2, ttl=60)
+    first = cache.add("a", h("p", {}, "first"))
+    second = cache.add("b", h("p", {}, "second"))
+
+    # Only the session that the page was rendered for can hydrate it (once)
+    assert cache.pop("a", second) is None
+    assert cache.pop("b", second) == h("p", {}, "second")
+    assert cache.pop("b", second) is None
+
+    # The oldest pages are dropped to make room, and pages expire
+    cache.add("c", h("p", {}, "third"))
+    cache.add("d", h("p", {}, "fourth"))
+    assert len(cache) == 2 and cache.pop("a", first) is None
+    cache.ttl = 0
+    expired = cache.add("e", h("p", {}, "fifth"))
+    assert cache.pop("e", expired) is None
+
+
+def test_monkey_patch_first():
+    # Importing the helper imports nothing that gevent has to patch (pydow imports its names on first use)
+    code = (
+        "from pydow.core.concurrency import monkey_patch\n"
+        "monkey_patch('gevent')\n"
+        "from pydow import App\n"
+        "from pydow.core.concurrency import check_async_mode\n"
+        "check_async_mode('gevent')\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "MonkeyPatchWarning" not in result.stderr
@@ -0,0 +1,42 @@
+from pydow.core import h
+from pydow.core.diff import diff
+from pydow.core.diff import patchSize
+from pydow.core.diff import countNodes
+
+
+def test_diff():
+    old = h("ul", {"class": "list"}, h("li", {}, "a"), h("li", {}, "b"), h("li", {}, "c"))
+    new = h("ul", {"id": "list"}, h("li", {}, "a"), h("p", {}, "b"))
+
+    assert diff(old, old) == []
+    assert diff(old, new) == [
+        {"op": "props", "path": [], "set": {"id": "list"}, "remove": ["class"]},
+        {"op": "replace", "path": [1], "node": h("p", {}, "b")},
+        {"op": "remove", "path": [2]},
+    ]
+    assert diff(new, old)[-1] == {"op": "insert", "path": [2], "node": h("li", {}, "c")}
+    assert diff(h("p", {}, "a"), h("p", {}, "b")) == [{"op": "text", "path": [0], "text": "b"}]
+
+
+def test_patch_size():
+    tree = h("div", {}, h("p", {}, "a"), "b")
+    assert countNodes(tree) == 4
+    assert patchSize([{"op": "replace", "path": [], "node": tree}]) > countNodes(tree)
+
+
+def test_keyed_diff():
+    rows = [h("li", {"key": str(index)}, f"row {index}") for index in range(100)]
+
+    # Inserting at the top does not touch the other rows
+    new_row = h("li", {"key": "new"}, "new")
+    assert diff(h("ul", {}, *rows), h("ul", {}, new_row, *rows)) == [
+        {"op": "insert", "path": [0], "node": new_row}
+    ]
+
+    # Rows are moved instead of replaced
+    assert diff(h("ul", {}, *rows[:3]), h("ul", {}, rows[2], rows[0], rows[1])) == [
+        {"op": "move", "path": [2], "to": 0}
+    ]
+    assert diff(h("ul", {}, *rows[:3]), h("ul", {}, rows[0], rows[2])) == [
+        {"op": "remove", "path": [1]}
+    ]
@@ -0,0 +1,104 @@
+import gc
+
+from pydow.core.dispatcher import ON_CLICK
+from pydow.core.dispatcher import ON_CHANGE
+from pydow.core.dispatcher import Dispatcher
+
+
+class Listener(object):
+
+    def __init__(self):
+        self.events = []
+
+    def onClick(self, event):
+        self.events.append(event)
+
+
+def test_dispatcher():
+    dispatcher = Dispatcher()
+    listener = Listener()
+    received = []
+    dispatcher.addEventListener(ON_CLICK, listener.onClick, identifier="button", owner=listener)
+    dispatcher.addEventListener(ON_CHANGE, received.append, identifier="input", owner=listener)
+
+    # Events only go to the listeners of their type and target
+    assert dispatcher.dispatch({"type": ON_CLICK, "target": "button"}) == 1
+    assert dispatcher.dispatch({"type": ON_CLICK, "target": "input"}) == 0
+    assert dispatcher.dispatch({"type": ON_CHANGE, "target": "input", "value": "a"}) == 1
+    assert listener.events == [{"type": ON_CLICK, "target": "button"}]
+    assert received == [{"type": ON_CHANGE, "target": "input", "value": "a"}]
+    assert dispatcher.stats() == {"listeners": 2, "targets": 2}
+
+    # Listeners are dropped together with their owner
+    del listener
+    gc.collect()
+    assert len(dispatcher) == 0
+
+
+def test_listener_references(monkeypatch):
+    from pydow.core.log import logger
+
+    warnings = []
+    monkeypatch.setattr(logger, "warning", lambda message, **kwargs: warnings.append(message))
+    dispatcher = Dispatcher()
+    owner = Listener()
+
+    # Listeners without an owner are kept, also methods of objects that are only referenced here
+    listener = Listener()
+    dispatcher.addEventListener(ON_CLICK, Listener().onClick, identifier="button")
+    dispatcher.addEventListener(ON_CLICK, listener.onClick, identifier="input", owner=owner)
+    gc.collect()
+    assert dispatcher.dispatch({"type": ON_CLICK, "target": "button"}) == 1
+
+    # A method that is collected before its owner can not be called, that is logged
+    del listener
+    gc.collect()
+    assert dispatcher.dispatch({"type": ON_CLICK, "target": "input"}) == 0
+    assert warnings == ["An event listener was garbage collected before its owner"]
+
+
+def test_remove_event_listener():
+    dispatcher = Dispatcher()
+    listener = Listener()
+    dispatcher.addEventListener(ON_CLICK, listener.onClick, identifier="button")
+    dispatcher.removeEventListener(ON_CLICK, listener.onClick, identifier="button")
+    assert dispatcher.dispatch({"type": ON_CLICK, "target": "button"}) == 0
+    assert len(dispatcher) == 0
+
+
+def test_background():
+    import threading
+    from pydow.store import Store
+    from pydow.core.dispatcher import PENDING
+    from pydow.core.dispatcher import background
+    from pydow.signals import signal_state_update
+
+    class VDOM(object):
+        store = Store()
+
+    dispatcher = Dispatcher(vdom=VDOM())
+    started = threading.Event()
+    release = threading.Event()
+    updates = []
+
+    @background(pending=True)
+    def onClick(event):
+        started.set()
+        release.wait(1)
+
+    def onUpdate(event):
+        updates.append(event)
+
+    # The listener runs on the executor, the target is pending until it is done
+    signal_state_update.connect(onUpdate)
+    dispatcher.addEventListener(ON_CLICK, onClick, identifier="button")
+    dispatcher.dispatch({"type": ON_CLICK, "target": "button", "session_id": "session", "sid": "socket"})
+    assert started.wait(1)
+    assert VDOM.store.getState(PENDING, session_id="session", identifier="button") is True
+
+    # The client gets an update when it is done
+    release.set()
+    dispatcher.executor.shutdown(wait=True)
+    assert VDOM.store.getState(PENDING, session_id="session", identifier="button") is False
+    assert updates == [{"session_id": "session", "sid": "socket"}]
+    signal_state_update.disconnect(onUpdate)
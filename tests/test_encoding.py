@@ -0,0 +1,60 @@
+import json
+import zlib
+import pickle
+
+from pydow.core import h
+from pydow.core.helpers import JSON
+from pydow.core.encoding import encodePayload
+
+
+def test_compact_node():
+    tree = h("ul", {"class": "list"}, h("li", {"class": "item"}, "a"), h("li", {"class": "item"}, "b"))
+
+    # Clients that do not accept the compact format get the VDOM as it is
+    assert encodePayload(tree, []) is tree
+    assert encodePayload(tree, ["deflate", "msgpack"], compress_threshold=0) is tree
+
+    # Names are sent once and nodes are lists
+    assert encodePayload(tree, ["compact"]) == {
+        "encoding": ["compact"],
+        "data": [["ul", "class", "li"], [0, [1, "list"], [2, [1, "item"], "a"], [2, [1, "item"], "b"]]],
+    }
+
+
+def test_compact_patches():
+    patches = [
+        {"op": "insert", "path": [0], "node": h("li", {}, "a")},
+        {"op": "props", "path": [1], "set": {"class": "item"}, "remove": []},
+        {"op": "move", "path": [2], "to": 0},
+    ]
+    assert encodePayload(patches, ["compact"], patches=True)["data"] == [
+        ["li"],
+        [[0, [0], [0, [], "a"]], [3, [1], {"class": "item"}, []], [5, [2], 0]],
+    ]
+
+    # Without the compact format patches are still in an envelope (as index.js expects)
+    assert encodePayload(patches, [], patches=True) == {"patches": patches}
+    assert encodePayload(patches, ["deflate"], patches=True, compress_threshold=0) == {"patches": patches}
+
+
+def test_deflate():
+    tree = h("ul", {}, *[h("li", {"class": "item"}, str(index)) for index in range(100)])
+
+    # Large payloads are compressed
+    payload = encodePayload(tree, ["compact", "deflate"], compress_threshold=100)
+    assert payload["encoding"] == ["compact", "deflate"]
+    assert zlib.decompress(payload["data"]).startswith(b'[["ul","li","class"]')
+    assert encodePayload(tree, ["compact", "deflate"], compress_threshold=None)["encoding"] == ["compact"]
+
+
+def test_vnode():
+    tree = h("ul", {"class": "list"}, h("li", {}, "a"), None)
+
+    # Nodes can be read and compared like dicts
+    assert tree["children"][0]["children"] == ["a"]
+    assert tree == {"type": "ul", "props": {"class": "list"}, "children": [{"type": "li", "props": {}, "children": ["a"]}]}
+    assert tree.toDict() == tree
+
+    # Nodes are sent as dicts and survive pickling (e.g. to other workers)
+    assert json.loads(JSON.dumps(tree)) == tree.toDict()
+    assert pickle.loads(pickle.dumps(tree)) == tree
@@ -0,0 +1,59 @@
+import configparser
+
+from pydow.core.extensions import Extensions
+from pydow.core.extensions import StartupProfile
+
+
+def test_extensions(tmp_path):
+    for name in ["auth", "metrics", "unused", "plain"]:
+        (tmp_path / f"{name}.py").write_text(f"class Plugin(object):\n    name = '{name}'\n")
+
+    def create(module, config):
+        return module.Plugin()
+
+    # Without configuration every file in the folder is loaded, a missing folder has none
+    empty = configparser.ConfigParser()
+    assert list(Extensions("plugins", str(tmp_path), empty, create)) == ["auth", "metrics", "plain", "unused"]
+    assert len(Extensions("plugins", str(tmp_path / "missing"), empty, create)) == 0
+
+    # The configuration decides what is loaded, and when (files without a section are loaded too)
+    config = configparser.ConfigParser()
+    config.read_string("[plugins:auth]\n[plugins:metrics]\nlazy = true\n[plugins:unused]\nenabled = false\n")
+    profile = StartupProfile()
+    plugins = Extensions("plugins", str(tmp_path), config, create, profile=profile)
+    plugins.loadAll()
+    assert list(plugins) == ["auth", "metrics", "plain"]
+    assert plugins.loaded() == ["auth", "plain"]
+    assert plugins["metrics"].name == "metrics"
+    assert plugins.loaded() == ["auth", "plain", "metrics"]
+
+    # Every plugin is in the startup report
+    assert set(profile.timings) == {"plugins:auth", "plugins:metrics", "plugins:plain"}
+    assert "plugins:metrics" in profile.report()
+
+
+def test_extension_imports(tmp_path):
+    import sys
+    import json
+
+    # Plugins can import the modules next to them, and are modules in the package of their kind
+    (tmp_path / "pydow_test_shared").mkdir()
+    (tmp_path / "pydow_test_shared" / "__init__.py").write_text("GREETING = 'hello'\n")
+    (tmp_path / "pydow_test_greeter.py").write_text(
+        "from pydow_test_shared import GREETING\n\nclass Plugin(object):\n    greeting = GREETING\n"
+    )
+
+    # A plugin with the name of another module does not replace it
+    (tmp_path / "json.py").write_text("class Plugin(object):\n    greeting = 'json'\n")
+    plugins = Extensions("plugins", str(tmp_path), configparser.ConfigParser(), lambda module, config: module.Plugin())
+    try:
+        assert plugins["pydow_test_greeter"].greeting == "hello"
+        assert sys.modules["pydow_plugins.pydow_test_greeter"].GREETING == "hello"
+        assert plugins["json"].greeting == "json"
+        assert sys.modules["json"] is json
+        assert "pydow_test_greeter" not in sys.modules
+        assert str(tmp_path) not in sys.path
+    finally:
+        sys.modules.pop("pydow_plugins.pydow_test_greeter", None)
+        sys.modules.pop("pydow_plugins.json", None)
+        sys.modules.pop("pydow_test_shared", None)
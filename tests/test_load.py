@@ -0,0 +1,24 @@
+from pydow.core import h
+from pydow.core.diff import diff
+from pydow.core.helpers import JSON
+
+from benchmarks.load import applyPatch
+from benchmarks.load import percentile
+
+
+def test_apply_patches():
+    rows = [h("li", {"key": str(index)}, f"row {index}") for index in range(5)]
+    old = h("ul", {"class": "list"}, *rows, h("p", {}, "a"))
+    new = h("ul", {"id": "list"}, rows[3], h("li", {"key": "new"}, "new"), rows[0], rows[4], h("p", {}, "b"))
+
+    # The load generator keeps the VDOM up to date with the patches (as JSON, like a browser)
+    vdom = JSON.loads(JSON.dumps(old))
+    for patch in JSON.loads(JSON.dumps(diff(old, new))):
+        vdom = applyPatch(vdom, patch)
+    assert vdom == JSON.loads(JSON.dumps(new))
+
+
+def test_percentile():
+    assert percentile([], 0.5) is None
+    assert percentile([3, 1, 2, 4], 0.5) == 2
+    assert percentile(list(range(1, 101)), 0.99) == 99
@@ -0,0 +1,56 @@
+import json
+import logging
+
+from pydow.core.log import logger
+from pydow.core.log import events_logger
+from pydow.core.log import stopLogging
+from pydow.core.log import _QueueHandler
+from pydow.core.log import SamplingFilter
+from pydow.core.log import configureLogging
+from pydow.core.log import StructuredFormatter
+
+
+def test_structured_formatter():
+    record = logging.makeLogRecord(
+        {"name": "pydow.events", "levelno": logging.INFO, "levelname": "INFO", "msg": "Received an event",
+         "fields": {"event": {"target": "a b"}, "session_id": "s1"}}
+    )
+
+    assert StructuredFormatter().format(record).endswith(
+        'INFO    pydow.events Received an event event="{\\"target\\":\\"a b\\"}" session_id=s1'
+    )
+    entry = json.loads(StructuredFormatter("json").format(record))
+    assert entry["message"] == "Received an event" and entry["event"] == {"target": "a b"}
+
+    # Warnings are never sampled away
+    assert SamplingFilter(0).filter(record) is False
+    record.levelno = logging.WARNING
+    assert SamplingFilter(0).filter(record) is True
+
+    # Queued records keep the fields as they were when the message was logged
+    event = {"target": "a"}
+    record = logging.makeLogRecord({"msg": "Received an event", "fields": {"event": event}, "sid": "s1"})
+    queued = _QueueHandler(None).prepare(record)
+    event["target"] = "b"
+    assert queued.fields == {"event": {"target": "a"}, "sid": "s1"}
+
+
+def test_configure_logging(tmpdir):
+    filename = str(tmpdir.join("pydow.log"))
+    configureLogging(level="WARN", format="json", filename=filename)
+    try:
+        assert not events_logger.isEnabledFor(logging.INFO)
+        events_logger.warning("Slow event", extra={"fields": {"duration": 1.5}})
+        try:
+            raise ValueError("failed")
+        except ValueError:
+            logger.exception("Listener failed")
+        stopLogging()
+
+        with open(filename) as file_:
+            entries = [json.loads(line) for line in file_]
+        assert [entry["message"] for entry in entries] == ["Slow event", "Listener failed"]
+        assert entries[0]["duration"] == 1.5
+        assert "ValueError: failed" in entries[1]["exception"]
+    finally:
+        configureLogging(propagate=True)
@@ -0,0 +1,50 @@
+from flask import Flask
+
+from pydow.core.metrics import metrics
+from pydow.core.metrics import Histogram
+from pydow.core.metrics import COMPONENT_RENDER
+from pydow.core.routes import metrics_endpoint
+
+from tests.test_component import createComponents
+
+
+def test_histogram():
+    histogram = Histogram("pydow_test_seconds", "Test.", "component", buckets=(0.01, 0.1))
+    histogram.observe("Root", 0.005)
+    histogram.observe("Root", 0.05)
+    histogram.observe('Quote"d', 1)
+
+    # Buckets are cumulative, labels are escaped
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP pydow_test_seconds Test.", "# TYPE pydow_test_seconds histogram"]
+    assert 'pydow_test_seconds_bucket{component="Root",le="0.01"} 1' in lines
+    assert 'pydow_test_seconds_bucket{component="Root",le="0.1"} 2' in lines
+    assert 'pydow_test_seconds_bucket{component="Root",le="+Inf"} 2' in lines
+    assert 'pydow_test_seconds_count{component="Root"} 2' in lines
+    assert 'pydow_test_seconds_count{component="Quote\\"d"} 1' in lines
+
+
+def test_component_metrics(tmpdir):
+    root, child = createComponents(str(tmpdir))
+    metrics.clear()
+
+    # Nothing is measured while the metrics are disabled
+    root.renderNode(session_id="disabled")
+    assert "pydow_component_render_seconds_count" not in metrics.render()
+
+    metrics.enabled = True
+    try:
+        root.renderNode(session_id="enabled")
+    finally:
+        metrics.enabled = False
+    assert 'pydow_component_render_seconds_count{component="Component"} 2' in COMPONENT_RENDER.render()
+
+    # Served to local clients only
+    app = Flask(__name__)
+    app.add_url_rule("/metrics", "metrics", defaults={"local_only": True}, view_func=metrics_endpoint)
+    client = app.test_client()
+    response = client.get("/metrics")
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    assert "# TYPE pydow_emit_seconds histogram" in response.get_data(as_text=True)
+    assert client.get("/metrics", environ_base={"REMOTE_ADDR": "10.0.0.1"}).status_code == 404
+    metrics.clear()
@@ -0,0 +1,32 @@
+from pydow.core.profiler import Trace
+from pydow.core.profiler import record
+from pydow.core.profiler import traced
+
+from tests.test_component import createComponents
+
+
+def test_profile_render(tmpdir):
+    root, child = createComponents(str(tmpdir))
+    getTitle = traced(lambda: "Title", "getTitle")
+
+    # Nothing is recorded without a trace
+    root.renderNode(session_id="session")
+
+    with record(Trace("render")) as trace:
+        root.renderNode(session_id="profiled")
+        getTitle()
+
+    # The spans are nested: component > template > child component
+    component = trace.root.children[0]
+    assert [span.name for span in trace.root.children] == ["Component", "getTitle"]
+    assert [span.category for span in component.children] == ["update", "template", "lxml", "lxml"]
+    template = component.children[1]
+    assert template.name.endswith("parent.html")
+    assert [span.category for span in template.children] == ["component"]
+    assert all(span.end is not None and span.self_time >= 0 for span in trace.spans())
+
+    # Chrome trace events, in microseconds since the start of the render
+    events = trace.toChromeTrace()["traceEvents"]
+    assert len(events) == len(trace.spans())
+    assert events[0]["name"] == "render" and events[0]["ts"] == 0
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
@@ -0,0 +1,43 @@
+import uuid
+
+from pydow.router.table import RouteTable
+from pydow.router.router import RouteComponents
+
+
+def test_route_table():
+    table = RouteTable(["/", "/users/new", "/users/<int:user_id>", "/users/<int:user_id>/posts/<slug>", "/files/<path:name>"])
+
+    # Routes without parameters win
+    assert table.match("/") == ("/", {})
+    assert table.match("/users/new") == ("/users/new", {})
+
+    # Parameters are typed
+    assert table.match("/users/42") == ("/users/<int:user_id>", {"user_id": 42})
+    assert table.match("/users/42/posts/hello") == ("/users/<int:user_id>/posts/<slug>", {"user_id": 42, "slug": "hello"})
+    assert table.match("/files/a/b.txt") == ("/files/<path:name>", {"name": "a/b.txt"})
+
+    # Paths without a route
+    assert table.match("/users/abc") is None
+    assert table.match("/users/42/") is None
+    assert "/users/<int:user_id>" in table and len(table) == 5
+
+    # Routes can be added later
+    identifier = uuid.uuid4()
+    table.add("/items/<uuid:item_id>")
+    assert table.match(f"/items/{identifier}") == ("/items/<uuid:item_id>", {"item_id": identifier})
+
+
+def test_route_components():
+    created = []
+
+    class Page(object):
+        def __init__(self, parent):
+            created.append(parent)
+
+    components = RouteComponents("router", {"/": Page, "/about": Page})
+
+    # Components are created on first use, once
+    assert "/about" in components and created == []
+    page = components["/"]
+    assert components["/"] is page and created == ["router"]
+    assert components.created() == ["/"]
@@ -0,0 +1,152 @@
+import time
+
+import pytest
+
+from pydow.store import Store
+
+
+def test_store():
+    store = Store()
+    store.setState("KEY", "global")
+    store.setState("KEY", "value", session_id="session")
+    store.setState("KEY", "component", session_id="session", identifier="component")
+
+    assert store.getState("KEY") == "global"
+    assert store.getState("KEY", session_id="session") == "value"
+    assert store.getState("KEY", session_id="session", identifier="component") == "component"
+    assert store.getState("KEY", "default", session_id="other") == "default"
+
+    stats = store.getSessionStats()
+    assert list(stats) == ["session"]
+    assert stats["session"]["entries"] == 2
+    assert stats["session"]["bytes"] > 0
+
+
+def test_store_eviction():
+    store = Store(session_ttl=0.05, max_sessions=2, sweep_interval=0.01)
+    for session_id in ["a", "b", "c"]:
+        store.setState("KEY", session_id, session_id=session_id)
+
+    # The least recently used session is evicted
+    assert store.getState("KEY", session_id="a") is None
+    assert store.getState("KEY", session_id="b") == "b"
+
+    # Idle sessions are evicted in the background, global state is kept
+    store.setState("KEY", "global")
+    time.sleep(0.2)
+    assert store.getSessionStats() == {}
+    assert store.getState("KEY") == "global"
+
+
+def test_sqlite_store(tmpdir):
+    from pydow.store.sqlite import Store as SQLiteStore
+
+    filename = str(tmpdir.join("state.sqlite"))
+    store = SQLiteStore(filename=filename, flush_interval=60)
+    store.setState("KEY", {"value": 1}, session_id="session")
+    store.setState("KEY", "component", session_id="session", identifier="component")
+    store.setState("KEY", "global")
+    assert store.getState("KEY", session_id="session") == {"value": 1}
+
+    # Nothing is written until the batch is flushed
+    assert SQLiteStore(filename=filename).getState("KEY", session_id="session") is None
+    store.close()
+
+    # The state survives a restart
+    store = SQLiteStore(filename=filename)
+    assert store.getState("KEY", session_id="session") == {"value": 1}
+    assert store.getState("KEY", session_id="session", identifier="component") == "component"
+    assert store.getState("KEY") == "global"
+    assert store.getSessionStats()["session"]["entries"] == 2
+
+    store.evictSession("session")
+    assert store.getState("KEY", "default", session_id="session") == "default"
+    store.close()
+
+
+def test_sqlite_store_errors(tmpdir):
+    import threading
+    from pydow.store.sqlite import Store as SQLiteStore
+
+    filename = str(tmpdir.join("state.sqlite"))
+    store = SQLiteStore(filename=filename, flush_interval=0.01)
+
+    # Values that can not be pickled are refused right away
+    with pytest.raises(TypeError):
+        store.setState("LOCK", threading.Lock(), session_id="session")
+
+    # Changes that can not be written are dropped, the other changes are written
+    store.setState(("not", "a", "string"), 1, session_id="session")
+    store.setState("KEY", "value", session_id="session")
+    time.sleep(0.1)
+    assert store._pending == {}
+    assert store._writer.is_alive()
+    store.close()
+
+    store = SQLiteStore(filename=filename)
+    assert store.getState("KEY", session_id="session") == "value"
+    assert store.getState("LOCK", session_id="session") is None
+    store.close()
+
+
+def test_sqlite_store_writes(tmpdir):
+    import threading
+    from pydow.store.sqlite import Store as SQLiteStore
+
+    filename = str(tmpdir.join("state.sqlite"))
+    store = SQLiteStore(filename=filename, flush_interval=60)
+
+    # None and "" are different sessions and identifiers
+    store.setState("KEY", "none")
+    store.setState("KEY", "empty", session_id="", identifier="")
+    store.setState("KEY", "component", session_id="", identifier=None)
+
+    class Connection(object):
+        """ Uses the store from another thread while a batch is committed.
+        """
+
+        def __init__(self, connection):
+            self.connection = connection
+            self.blocked = []
+
+        def __getattr__(self, name):
+            return getattr(self.connection, name)
+
+        def execute(self, statement, *args):
+            if statement == "COMMIT":
+                reader = threading.Thread(target=store.getState, args=("KEY",), kwargs={"session_id": "other"})
+                reader.start()
+                reader.join(5)
+                self.blocked.append(reader.is_alive())
+            return self.connection.execute(statement, *args)
+
+    # The state can be used while the changes are written
+    store._connection = Connection(store._connection)
+    store.flush()
+    assert store._connection.blocked == [False]
+    store._connection = store._connection.connection
+    store.close()
+
+    store = SQLiteStore(filename=filename)
+    assert store.getState("KEY") == "none"
+    assert store.getState("KEY", session_id="", identifier="") == "empty"
+    assert store.getState("KEY", session_id="", identifier=None) == "component"
+    assert list(store.getSessionStats()) == [""]
+    store.close()
+
+
+def test_shared_store():
+    from pydow.store import createStore
+    from pydow.store.shared import startServer
+
+    process = startServer(address="127.0.0.1:50123", authkey="secret")
+    try:
+        stores = [createStore("shared", address="127.0.0.1:50123", authkey="secret") for _ in range(2)]
+
+        # Both clients see the same state
+        stores[0].setState("KEY", {"value": 1}, session_id="session")
+        assert stores[1].getState("KEY", session_id="session") == {"value": 1}
+        assert stores[1].getState("KEY", "default", session_id="other") == "default"
+        assert stores[1].getSessionStats()["session"]["entries"] == 1
+    finally:
+        process.terminate()
@@ -0,0 +1,31 @@
+import os
+
+from pydow.core.templates import TemplateCache
+
+
+def test_template_cache(tmpdir):
+    filename = os.path.join(str(tmpdir), "template.html")
+    with open(filename, "w") as file_:
+        file_.write("<p>{{ content }}</p>")
+
+    cache = TemplateCache(auto_reload=True)
+    assert cache.getTemplate(filename).render(content="a") == "<p>a</p>"
+    assert cache.getTemplate(filename).render(content="b") == "<p>b</p>"
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+    # Changes to the file are picked up during development
+    with open(filename, "w") as file_:
+        file_.write("<div>{{ content }}</div>")
+    os.utime(filename, (0, 0))
+    assert cache.getTemplate(filename).render(content="c") == "<div>c</div>"
+    assert cache.stats()["misses"] == 2
+
+    # But not in production
+    cache.auto_reload = False
+    os.utime(filename, (1, 1))
+    assert cache.getTemplate(filename).render(content="d") == "<div>d</div>"
+    assert cache.stats()["misses"] == 2
+
+    # Unless a lookup asks for it (e.g. the components of an App during development)
+    assert cache.getTemplate(filename, auto_reload=True).render(content="e") == "<div>e</div>"
+    assert cache.stats()["misses"] == 3